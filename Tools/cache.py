@@ -0,0 +1,169 @@
+import hashlib
+import inspect
+import json
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+import numpy as np
+from Tools import tables
+
+
+def tables_fingerprint()->str:
+    """Hash of every catalog table in `Tools/tables.py`; it changes whenever a table does."""
+    data = {name: value for name, value in vars(tables).items() if not name.startswith('_') and isinstance(value, dict)}
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=repr).encode()).hexdigest()[:16]
+
+
+def canonical(value, digits:int=6):
+    """JSON-ready copy of `value`: numbers as floats rounded to `digits` significant digits, containers normalized."""
+    if isinstance(value, dict):
+        return {str(key): canonical(item, digits) for key, item in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, np.ndarray):
+        return canonical(value.tolist(), digits)
+    if isinstance(value, (list, tuple)):
+        return [canonical(item, digits) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = float(value)
+        return float(f'{value:.{digits}g}') if np.isfinite(value) else repr(value)
+    if isinstance(value, str):
+        return value.lower().strip()
+    return value
+
+
+# Tables the running process was built from (the geometry catalog is built once at import too).
+TABLES_FINGERPRINT = tables_fingerprint()
+
+
+def canonical_key(inputs:dict, digits:int=6, namespace:str='')->str:
+    """Cache key of a set of inputs: the table fingerprint, the namespace and the canonical inputs."""
+    payload = json.dumps([namespace, canonical(inputs, digits)], sort_keys=True, separators=(',', ':'))
+    return f'{TABLES_FINGERPRINT}:{hashlib.sha256(payload.encode()).hexdigest()}'
+
+
+class ResultCache:
+    """LRU cache of design results with an optional SQLite store.
+
+    Keys are canonicalized inputs (floats rounded to `digits` significant
+    digits) prefixed with the fingerprint of the catalog tables, so entries
+    computed with other tables are never returned. The in-process LRU keeps
+    at most `maxsize` results. With `path`, results are also written to a
+    SQLite file that survives restarts and can be shared by worker
+    processes; rows of other table fingerprints are dropped on open.
+    """
+
+    def __init__(self, maxsize:int=1024, digits:int=6, path:str|None = None, max_disk_entries:int|None = None):
+        self.maxsize = maxsize
+        self.digits = digits
+        self.max_disk_entries = max_disk_entries
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'disk_evictions': 0}
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._fingerprint = TABLES_FINGERPRINT
+        if path:
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, fingerprint TEXT, value BLOB, used REAL)')
+            self._db.execute('DELETE FROM results WHERE fingerprint != ?', (self._fingerprint,))
+            self._db.commit()
+
+    def key(self, inputs:dict, namespace:str='')->str:
+        return canonical_key(inputs, self.digits, namespace)
+
+    def get(self, key:str, default=None):
+        """Cached value of `key`, looking in memory first and then on disk."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.stats['hits'] += 1
+                return self._memory[key]
+            if self._db is not None:
+                row = self._db.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    self._db.execute('UPDATE results SET used = ? WHERE key = ?', (time.time(), key))
+                    self._db.commit()
+                    self.stats['disk_hits'] += 1
+                    value = pickle.loads(row[0])
+                    self._remember(key, value)
+                    return value
+            self.stats['misses'] += 1
+            return default
+
+    def put(self, key:str, value):
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                self._db.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)',
+                                 (key, self._fingerprint, pickle.dumps(value), time.time()))
+                if self.max_disk_entries is not None:
+                    removed = self._db.execute(
+                        'DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY used DESC LIMIT -1 OFFSET ?)',
+                        (self.max_disk_entries,)
+                    ).rowcount
+                    self.stats['disk_evictions'] += max(removed, 0)
+                self._db.commit()
+
+    def _remember(self, key:str, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def get_or_compute(self, inputs:dict, function, namespace:str=''):
+        """Return the cached result for `inputs`, computing it with `function(**inputs)` on a miss."""
+        key = self.key(inputs, namespace)
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = function(**inputs)
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM results')
+                self._db.commit()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __len__(self)->int:
+        return len(self._memory)
+
+
+def cached(cache:ResultCache):
+    """Decorator routing every call of a design function through `cache`.
+
+    Arguments are bound to the signature with defaults applied, so
+    positional and keyword calls of the same design share one entry.
+    """
+    def decorator(function):
+        signature = inspect.signature(function)
+        namespace = f'{function.__module__}.{function.__qualname__}'
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            inputs = dict(bound.arguments)
+            key = cache.key(inputs, namespace)
+            missing = object()
+            value = cache.get(key, missing)
+            if value is missing:
+                value = function(*args, **kwargs)
+                cache.put(key, value)
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
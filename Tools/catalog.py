@@ -0,0 +1,111 @@
+from fractions import Fraction
+import numpy as np
+from Tools.tables import double_pipe_data, pipe_shell_data, pipe_and_shell_pitch_data
+from Tools.auxiliar import c_prime_shell_and_pipe
+
+# Decimals kept when a float diameter is used as a dict key, so that 0.75 and
+# 0.7500000001 find the same pitch.
+KEY_DECIMALS = 6
+
+
+def double_pipe_geometry(config:str)->tuple[float, float, float]:
+    """Equivalent diameter (ft), annulus area and pipe area (ft^2) of a double-pipe size."""
+    diameter, int_diameter, ext_diameter, flow_area, lin_surface = [
+        value if key == 'linear_suf' else value / 12 for key, value in double_pipe_data[config].items()
+    ]
+    equivalent_diam = (ext_diameter**2 - int_diameter**2) / int_diameter
+    annulus_area = np.pi * (ext_diameter**2 - int_diameter**2) / 4
+    pipe_area = np.pi * diameter**2 / 4
+    return (equivalent_diam, annulus_area, pipe_area)
+
+
+def pipe_shell_geometry(config:str, entry:dict, pitch:float, pipe_arrangement:str)->tuple:
+    """Parameters returned by `flow_area` for one pipe-and-shell tube size, BWG entry and pitch."""
+    thickness, int_diameter, flow_area, lin_surf = list(entry.values())[1:]
+    B:int = 5 # in
+    c_prime = c_prime_shell_and_pipe(pitch, int_diameter, thickness)
+
+    eq_diameter = 4 * (pitch**2 - np.pi * (Fraction(config)**2 / 4)) / np.pi * Fraction(config) if pipe_arrangement == 'square' else \
+    4 * (1/2*pitch*0.86*pitch - 1/2 * np.pi * (Fraction(config)**2 / 4)) / 1/2 * np.pi * Fraction(config) if pipe_arrangement == 'triangle' else None
+    shell_area = 21.25 * c_prime * B / (pitch * 144)
+    pipe_area = (flow_area * 158) / (144 * 4)
+
+    return (thickness, int_diameter, eq_diameter, shell_area, pipe_area, pitch, lin_surf)
+
+
+class GeometryCatalog:
+    """Every exchanger geometry of `Tools/tables.py`, precomputed once.
+
+    Rows are keyed by (nominal size, BWG, arrangement); double-pipe rows use
+    (size, None, None) like `flow_area`'s defaults. Data is stored as
+    struct-of-arrays in `columns` (diameters in ft, areas in ft^2) so sweeps
+    can fetch whole candidate sets at once, while `flow_area` and `pitch`
+    are O(1) dict lookups.
+    """
+
+    def __init__(self, pitch_data:dict=pipe_and_shell_pitch_data):
+        self._pitch = {
+            (array_type, unit, round(diameter, KEY_DECIMALS)): pitch
+            for array_type, data in pitch_data.items()
+            for unit in data['Tube Diameter']
+            for diameter, pitch in zip(data['Tube Diameter'][unit], data['Pitch'][unit])
+        }
+        self._flow_area = {}
+        rows = []
+        for config, data in double_pipe_data.items():
+            parameters = double_pipe_geometry(config)
+            self._flow_area[(config, None, None)] = parameters
+            equivalent_diam, annulus_area, pipe_area = parameters
+            rows.append(dict(
+                exchanger_type='double pipe', size=config, bwg=0, arrangement='', thickness=np.nan, pitch=np.nan,
+                tube_diameter=data['D'] / 12, tube_ext_diameter=data['DE'] / 12, tube_area=pipe_area,
+                shell_diameter=equivalent_diam, shell_area=annulus_area,
+                shell_friction_diameter=(data['DI'] - data['DE']) / 12, linear_surface=data['linear_suf'],
+            ))
+        for config, entries in pipe_shell_data.items():
+            ext_diameter = float(Fraction(config))
+            for arrangement in pitch_data:
+                pitch = self.pitch(arrangement, ext_diameter)
+                if pitch is None:
+                    continue
+                for entry in entries:
+                    parameters = pipe_shell_geometry(config, entry, pitch, arrangement)
+                    self._flow_area[(config, entry['BWG'], arrangement)] = parameters
+                    thickness, int_diameter, eq_diameter, shell_area, pipe_area, pitch, lin_surf = parameters
+                    rows.append(dict(
+                        exchanger_type='pipe and shell', size=config, bwg=entry['BWG'], arrangement=arrangement,
+                        thickness=thickness, pitch=pitch, tube_diameter=int_diameter / 12,
+                        tube_ext_diameter=ext_diameter / 12, tube_area=pipe_area, shell_diameter=eq_diameter / 12,
+                        shell_area=shell_area, shell_friction_diameter=eq_diameter / 12, linear_surface=lin_surf,
+                    ))
+        self.columns = {key: np.array([row[key] for row in rows]) for key in rows[0]}
+        for column in self.columns.values():
+            column.flags.writeable = False
+        self._index = {
+            (row['size'], row['bwg'] or None, row['arrangement'] or None): i for i, row in enumerate(rows)
+        }
+
+    def __len__(self)->int:
+        return len(self.columns['size'])
+
+    def index(self, config:str, bwg:int|None = None, pipe_arrangement:str|None = None)->int|None:
+        """Row of a geometry in `columns`, or None if the catalog has no such geometry."""
+        return self._index.get((config, bwg, pipe_arrangement))
+
+    def flow_area(self, config:str, bwg:int|None = None, pipe_arrangement:str|None = None)->tuple|None:
+        """Precomputed `flow_area` parameters of a geometry, or None if unknown."""
+        return self._flow_area.get((config, bwg, pipe_arrangement))
+
+    def pitch(self, array_type:str, diameter:float, unit:str="in")->float|None:
+        """Pitch for a tube diameter, tolerant to float rounding. None if not tabulated."""
+        return self._pitch.get((array_type, unit, round(float(diameter), KEY_DECIMALS)))
+
+    def select(self, exchanger_types:tuple[str, ...]=('double pipe', 'pipe and shell'), **filters)->dict[str, np.ndarray]:
+        """Columns of every geometry of the given types matching `filters` (column=value or column=list)."""
+        mask = np.isin(self.columns['exchanger_type'], exchanger_types)
+        for key, value in filters.items():
+            mask &= np.isin(self.columns[key], value)
+        return {key: column[mask] for key, column in self.columns.items()}
+
+
+CATALOG = GeometryCatalog()
@@ -1,5 +1,13 @@
 # If you need import libraries it's the site.
 import numpy as np
+from Tools.instrumentation import stage, count
+
+class UnsupportedConfiguration(ValueError):
+    """Exchanger type or flow configuration not covered by the formulas."""
+
+
+def _unknown_config(error:Exception)->bool:
+    return isinstance(error, UnsupportedConfiguration)
 
 def heat_flow(mass_flow_rate:float, heat_capacity:float, inlet_temperature:float, outlet_temperature:float)->float:
     return mass_flow_rate * heat_capacity * abs(inlet_temperature - outlet_temperature)
@@ -53,20 +61,26 @@ def convective_coeff(Reynold:float, Prandtl:float, thermal_conductivity:float, d
     Nusselt = calculate_nusselt(Reynold, Prandtl)
     return Nusselt * thermal_conductivity / diameter
 
+# Reynolds bands (low, high) and their (coefficient, exponent) for the Nusselt correlation.
+NUSSELT_BANDS = [
+    ((0.4, 4), (0.989, 0.330)),
+    ((4, 40), (0.911, 0.385)),
+    ((40, 4000), (0.683, 0.466)),
+    ((4000, 40000), (0.193, 0.618)),
+    ((40000, float('inf')), (0.027, 0.805)),
+]
+_NUSSELT_EDGES = np.array([band[0][0] for band in NUSSELT_BANDS] + [NUSSELT_BANDS[-1][0][1]])
+_NUSSELT_COEF = np.array([band[1][0] for band in NUSSELT_BANDS])
+_NUSSELT_EXP = np.array([band[1][1] for band in NUSSELT_BANDS])
+
 def calculate_nusselt(Reynold:float, Prandtl:float)->float:
     """Calculate the Nusselt number based on Reynold and Prandtl numbers."""
     if Reynold <= 0:
         raise ValueError("Reynold's number must be greater than zero.")
-    conditions = [
-        ((0.4, 4), (0.989, 0.330)),
-        ((4, 40), (0.911, 0.385)),
-        ((40, 4000), (0.683, 0.466)),
-        ((4000, 40000), (0.193, 0.618)),
-        ((40000, float('inf')), (0.027, 0.805)),
-    ]
-    for (low, high), (coef, exp) in conditions:
+    for (low, high), (coef, exp) in NUSSELT_BANDS:
         if low <= Reynold < high:
             return coef * Reynold**exp * Prandtl**(1/3)
+    count('zero_nusselt')
     return 0  # Default return if none of the conditions match
 
 def C_value(mass_flow_rate:float, Cp_value:float)->float:
@@ -84,6 +98,7 @@ def NTU(U_d:float, A_s:float, c_NTU:float)->float:
     """Calculate the NTU (Number of Thermal Units) value."""
     return U_d * A_s / c_NTU
 
+@stage(degenerate={'nan_lmtd': np.isnan}, errors={'unknown_config': _unknown_config})
 def lmtd(exchanger_type: str, config: str, T_hot_in: float, T_hot_out: float, T_cold_in: float, T_cold_out: float) -> float:
     """Calculate the Logarithmic Mean Temperature Difference (LMTD) and apply correction factor if needed.
     
@@ -99,7 +114,7 @@ def lmtd(exchanger_type: str, config: str, T_hot_in: float, T_hot_out: float, T_
     - The LMTD value, corrected if applicable for the heat exchanger type.
     
     Raises:
-    - ValueError: If an unsupported configuration or exchanger type is provided.
+    - UnsupportedConfiguration (a ValueError): If an unsupported configuration or exchanger type is provided.
     """
     config = config.lower()
     exchanger_type = exchanger_type.lower()
@@ -110,7 +125,7 @@ def lmtd(exchanger_type: str, config: str, T_hot_in: float, T_hot_out: float, T_
     (None, None)
 
     if delta_t1 is None or delta_t2 is None:
-        raise ValueError(f'Unsupported configuration: {config}')
+        raise UnsupportedConfiguration(f'Unsupported configuration: {config}')
     
     lmtd_value = (delta_t2 - delta_t1) / np.log(delta_t2 / delta_t1)
 
@@ -124,4 +139,139 @@ def lmtd(exchanger_type: str, config: str, T_hot_in: float, T_hot_out: float, T_
         F = numerator / denominator
         return lmtd_value * F
     else:
-        raise ValueError(f'Unsupported exchanger type: {exchanger_type}')
\ No newline at end of file
+        raise UnsupportedConfiguration(f'Unsupported exchanger type: {exchanger_type}')
+
+
+# Batch API: array versions of the correlations above. Every function accepts
+# NumPy arrays or scalars that broadcast against them and returns a tuple
+# (values, valid) where `valid` masks the points the scalar path would reject
+# or silently zero. Invalid points hold NaN.
+
+@stage(degenerate={'non_positive_reynolds': lambda result: ~result[1]})
+def reynolds_batch(diameter:np.ndarray, mass_vel:np.ndarray, viscosity:np.ndarray)->tuple[np.ndarray, np.ndarray]:
+    """Reynolds number for arrays of diameter (ft), mass velocity (lb/h*ft^2) and viscosity (lb/ft*h).
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Reynolds numbers and mask of points with all arguments positive.
+    """
+    diameter, mass_vel, viscosity = np.broadcast_arrays(
+        np.asarray(diameter, dtype=float), np.asarray(mass_vel, dtype=float), np.asarray(viscosity, dtype=float)
+    )
+    valid = (diameter > 0) & (mass_vel > 0) & (viscosity > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        Re = diameter * mass_vel / viscosity
+    return np.where(valid, Re, np.nan), valid
+
+def prandtl_batch(specific_heat:np.ndarray, viscosity:np.ndarray, conductivity:np.ndarray)->tuple[np.ndarray, np.ndarray]:
+    """Prandtl number for arrays of specific heat, viscosity and conductivity.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Prandtl numbers and mask of finite, positive results.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        Pr = np.asarray(specific_heat, dtype=float) * np.asarray(viscosity, dtype=float) / np.asarray(conductivity, dtype=float)
+    valid = np.isfinite(Pr) & (Pr > 0)
+    return np.where(valid, Pr, np.nan), valid
+
+def nusselt_band(Reynold:np.ndarray)->np.ndarray:
+    """Index of the NUSSELT_BANDS entry for every Reynolds number, -1 when out of band."""
+    Reynold = np.asarray(Reynold, dtype=float)
+    band = np.searchsorted(_NUSSELT_EDGES, Reynold, side='right') - 1
+    return np.where((Reynold >= _NUSSELT_EDGES[0]) & (Reynold < _NUSSELT_EDGES[-1]), band, -1)
+
+@stage(degenerate={'zero_nusselt': lambda result: ~result[1]})
+def calculate_nusselt_batch(Reynold:np.ndarray, Prandtl:np.ndarray)->tuple[np.ndarray, np.ndarray]:
+    """Nusselt number for arrays of Reynolds and Prandtl numbers.
+
+    The correlation band of every point is found with a single vectorized
+    lookup. Points with Reynold <= 0 or outside every band are masked. Valid
+    points select the same band as `calculate_nusselt` and are bit-identical
+    to it: the powers go through `np.float_power`, which calls the same C
+    `pow` as Python floats (the SIMD loop of `np.power` may differ by 1 ulp),
+    in the scalar formula's order.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Nusselt numbers and validity mask.
+    """
+    Reynold, Prandtl = np.broadcast_arrays(np.asarray(Reynold, dtype=float), np.asarray(Prandtl, dtype=float))
+    band = nusselt_band(Reynold)
+    valid = band >= 0
+    safe = np.where(valid, band, 0)
+    with np.errstate(invalid='ignore'):
+        Nu = _NUSSELT_COEF[safe] * np.float_power(Reynold, _NUSSELT_EXP[safe]) * np.float_power(Prandtl, 1/3)
+    return np.where(valid, Nu, np.nan), valid
+
+@stage()
+def convective_coeff_batch(Reynold:np.ndarray, Prandtl:np.ndarray, thermal_conductivity:np.ndarray, diameter:np.ndarray)->tuple[np.ndarray, np.ndarray]:
+    """Convective heat transfer coefficient for arrays of operating points.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Coefficients and validity mask.
+    """
+    Nusselt, valid = calculate_nusselt_batch(Reynold, Prandtl)
+    diameter = np.asarray(diameter, dtype=float)
+    valid = valid & (diameter > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        h = Nusselt * thermal_conductivity / diameter
+    return np.where(valid, h, np.nan), valid
+
+def _log1p_ratio(x:np.ndarray)->np.ndarray:
+    """log1p(x) / x with its analytic limit 1 - x/2 near x = 0."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(np.abs(x) < 1e-12, 1 - x / 2, np.log1p(x) / np.where(x == 0, 1, x))
+
+@stage(errors={'unknown_config': _unknown_config})
+def lmtd_engine(exchanger_type:str, config:str):
+    """Build a vectorized LMTD evaluator for one exchanger type and flow configuration.
+
+    The strings are parsed once here. The returned function takes arrays (or
+    broadcasting scalars) T_hot_in, T_hot_out, T_cold_in, T_cold_out and
+    returns (lmtd, F, valid), where lmtd already includes the correction
+    factor F (F is 1 for 'double pipe'). The singular points ΔT1 == ΔT2 and
+    R == 1 are evaluated through their analytic limits. Temperature crosses
+    and points outside the F-factor domain are masked and hold NaN.
+
+    Raises:
+        UnsupportedConfiguration (a ValueError): If an unsupported configuration or exchanger type is provided.
+    """
+    config = config.lower()
+    exchanger_type = exchanger_type.lower()
+    if config not in ('parallel', 'counter-current'):
+        raise UnsupportedConfiguration(f'Unsupported configuration: {config}')
+    if exchanger_type not in ('double pipe', 'pipe and shell'):
+        raise UnsupportedConfiguration(f'Unsupported exchanger type: {exchanger_type}')
+    parallel = config == 'parallel'
+    shell = exchanger_type == 'pipe and shell'
+
+    def engine(T_hot_in, T_hot_out, T_cold_in, T_cold_out)->tuple[np.ndarray, np.ndarray, np.ndarray]:
+        T_hot_in, T_hot_out, T_cold_in, T_cold_out = np.broadcast_arrays(
+            *(np.asarray(T, dtype=float) for T in (T_hot_in, T_hot_out, T_cold_in, T_cold_out))
+        )
+        if parallel:
+            delta_t1, delta_t2 = T_hot_out - T_cold_out, T_hot_in - T_cold_in
+        else:
+            delta_t1, delta_t2 = T_hot_out - T_cold_in, T_hot_in - T_cold_out
+        valid = (delta_t1 > 0) & (delta_t2 > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lmtd_value = delta_t1 / _log1p_ratio((delta_t2 - delta_t1) / delta_t1)
+            F = np.ones_like(lmtd_value)
+            if shell:
+                cold_rise = T_cold_out - T_cold_in
+                R = (T_hot_in - T_hot_out) / cold_rise
+                S = cold_rise / (T_hot_in - T_cold_in)
+                root = np.sqrt(R**2 + 1)
+                low = 2 - S * (R + 1 + root)
+                valid &= (cold_rise > 0) & (R >= 0) & (S < 1) & (1 - R * S > 0) & (low > 0)
+                # ln((1-S)/(1-RS)) / (R-1) written so that R == 1 needs no special case.
+                x = S * (R - 1) / (1 - R * S)
+                F = root * S / (1 - R * S) * _log1p_ratio(x) / np.log((2 - S * (R + 1 - root)) / low)
+                valid &= np.isfinite(F) & (F > 0)
+        lmtd_value = np.where(valid, lmtd_value * F, np.nan)
+        return lmtd_value, np.where(valid, F, np.nan), valid
+
+    return stage('lmtd_engine.evaluate', degenerate={'nan_lmtd': lambda result: ~result[2]})(engine)
+
+def lmtd_batch(exchanger_type:str, config:str, T_hot_in:np.ndarray, T_hot_out:np.ndarray, T_cold_in:np.ndarray, T_cold_out:np.ndarray)->tuple[np.ndarray, np.ndarray]:
+    """Array version of `lmtd`. Returns the corrected LMTD and its validity mask."""
+    lmtd_value, _, valid = lmtd_engine(exchanger_type, config)(T_hot_in, T_hot_out, T_cold_in, T_cold_out)
+    return lmtd_value, valid
@@ -0,0 +1,150 @@
+import inspect
+from collections import defaultdict
+from Tools.tables import double_pipe_data
+from Tools.general import heat_flow, flow_rate, mass_velocity, reynolds, Prandtl, convective_coeff, lmtd
+from Tools.tools import (
+    flow_area, corrected_inside_coeff, clean_total_coeff, total_coefficient, calculate_area, calculate_length,
+    numb_forks, corrected_length, friction_factor, Fanning_factor, pressure_drop
+)
+
+
+class ModelGraph:
+    """Lazily evaluated dependency graph of named quantities.
+
+    Inputs are set with `graph[name] = value`; nodes are functions whose
+    parameter names are the quantities they depend on. Reading a node
+    computes it (and whatever it needs) once and caches the value. Setting
+    an input drops only the cached values downstream of it, so a what-if
+    change recomputes just the affected part of the model.
+    """
+
+    def __init__(self, inputs:dict|None = None, nodes:dict|None = None):
+        self._functions = {}
+        self._dependencies = {}
+        self._dependents = defaultdict(set)
+        self._downstream = {}
+        self._values = {}
+        self._inputs = set()
+        self.computations = 0
+        for name, function in (nodes or {}).items():
+            self.add_node(name, function)
+        for name, value in (inputs or {}).items():
+            self[name] = value
+
+    def add_node(self, name:str, function, dependencies:tuple[str, ...]|None = None):
+        """Add `name = function(*dependencies)`; dependencies default to the function's parameter names."""
+        if dependencies is None:
+            dependencies = tuple(inspect.signature(function).parameters)
+        self._functions[name] = function
+        self._dependencies[name] = tuple(dependencies)
+        for dependency in dependencies:
+            self._dependents[dependency].add(name)
+        self._downstream.clear()
+        self._values.pop(name, None)
+
+    def downstream(self, name:str)->frozenset[str]:
+        """Every node that depends on `name`, directly or not."""
+        if name not in self._downstream:
+            seen, stack = set(), [name]
+            while stack:
+                for dependent in self._dependents[stack.pop()]:
+                    if dependent not in seen:
+                        seen.add(dependent)
+                        stack.append(dependent)
+            self._downstream[name] = frozenset(seen)
+        return self._downstream[name]
+
+    def affected(self, *names:str)->set[str]:
+        """Nodes an input change would recompute."""
+        return set().union(*(self.downstream(name) for name in names))
+
+    def __setitem__(self, name:str, value):
+        if name in self._functions:
+            raise KeyError(f'{name} is a computed node, not an input.')
+        if name in self._values and _same(self._values[name], value):
+            return
+        self._inputs.add(name)
+        self._values[name] = value
+        for dependent in self.downstream(name):
+            self._values.pop(dependent, None)
+
+    def update(self, **values):
+        for name, value in values.items():
+            self[name] = value
+
+    def __getitem__(self, name:str):
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+        if name not in self._functions:
+            raise KeyError(f'{name} is neither an input nor a node.')
+        value = self._functions[name](*(self[dependency] for dependency in self._dependencies[name]))
+        self._values[name] = value
+        self.computations += 1
+        return value
+
+    def evaluate(self, names)->dict:
+        return {name: self[name] for name in names}
+
+    def is_cached(self, name:str)->bool:
+        return name in self._values
+
+    @property
+    def inputs(self)->set[str]:
+        return set(self._inputs)
+
+    @property
+    def nodes(self)->tuple[str, ...]:
+        return tuple(self._functions)
+
+
+def _same(old, new)->bool:
+    """True when a new input value is identical to the cached one (arrays compared element-wise)."""
+    if old is new:
+        return True
+    try:
+        result = old == new
+        return bool(result.all()) if hasattr(result, 'all') else bool(result)
+    except (TypeError, ValueError):
+        return False
+
+
+def double_pipe_graph(**inputs)->ModelGraph:
+    """Lazy graph of the double-pipe design chain of `Tools/tools.py` (hot fluid in the inner pipe).
+
+    Inputs: size, config, hot_flow, T_hot_in, T_hot_out, T_cold_in, T_cold_out,
+    hot_/cold_ density, cp, viscosity (lb/ft*h) and conductivity, fouling_factor.
+    """
+    nodes = {
+        'geometry': lambda size: flow_area(size, 'double pipe'),
+        'tube_diameter': lambda size: double_pipe_data[size]['D'] / 12,
+        'tube_ext_diameter': lambda size: double_pipe_data[size]['DE'] / 12,
+        'linear_surface': lambda size: double_pipe_data[size]['linear_suf'],
+        'heat': lambda hot_flow, hot_cp, T_hot_in, T_hot_out: heat_flow(hot_flow, hot_cp, T_hot_in, T_hot_out),
+        'cold_flow': lambda heat, cold_cp, T_cold_in, T_cold_out: flow_rate(heat, cold_cp, T_cold_in, T_cold_out),
+        'G_tube': lambda hot_flow, geometry: mass_velocity(hot_flow, geometry[2]),
+        'G_annulus': lambda cold_flow, geometry: mass_velocity(cold_flow, geometry[1]),
+        'Re_tube': lambda tube_diameter, G_tube, hot_viscosity: reynolds(tube_diameter, G_tube, hot_viscosity),
+        'Re_annulus': lambda geometry, G_annulus, cold_viscosity: reynolds(geometry[0], G_annulus, cold_viscosity),
+        'h_io': lambda Re_tube, hot_cp, hot_viscosity, hot_conductivity, tube_diameter, tube_ext_diameter: corrected_inside_coeff(
+            convective_coeff(Re_tube, Prandtl(hot_cp, hot_viscosity, hot_conductivity), hot_conductivity, tube_diameter),
+            (tube_diameter, tube_ext_diameter)
+        ),
+        'h_o': lambda Re_annulus, cold_cp, cold_viscosity, cold_conductivity, geometry: convective_coeff(
+            Re_annulus, Prandtl(cold_cp, cold_viscosity, cold_conductivity), cold_conductivity, geometry[0]
+        ),
+        'U_c': lambda h_io, h_o: clean_total_coeff(h_io, h_o),
+        'U_d': lambda U_c, fouling_factor: total_coefficient(U_c, fouling_factor),
+        'delta_T_log': lambda config, T_hot_in, T_hot_out, T_cold_in, T_cold_out: lmtd(
+            'double pipe', config, T_hot_in, T_hot_out, T_cold_in, T_cold_out
+        ),
+        'area': lambda heat, U_d, delta_T_log: calculate_area(heat, U_d, delta_T_log),
+        'length': lambda area, linear_surface: calculate_length(area, linear_surface),
+        'forks': lambda length: numb_forks(length),
+        'corrected_length': lambda forks: corrected_length(forks),
+        'dp_tube': lambda Re_tube, G_tube, corrected_length, hot_density, tube_diameter: pressure_drop(
+            Fanning_factor(friction_factor(Re_tube), G_tube, corrected_length, hot_density, tube_diameter), 0, hot_density
+        ),
+    }
+    return ModelGraph({'config': 'counter-current', 'fouling_factor': 0, **inputs}, nodes)
@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+import numpy as np
+
+# Opt-in: off unless enable() is called or HEAT_EXCHANGER_INSTRUMENTATION=1.
+# While off, an instrumented function costs one global lookup and a call.
+_ENABLED = os.environ.get('HEAT_EXCHANGER_INSTRUMENTATION', '') not in ('', '0')
+_LOCK = threading.Lock()
+_STAGES = {}
+_COUNTERS = {}
+
+
+def enable():
+    global _ENABLED
+    _ENABLED = True
+
+
+def disable():
+    global _ENABLED
+    _ENABLED = False
+
+
+def is_enabled()->bool:
+    return _ENABLED
+
+
+def reset():
+    """Drop every recorded stage and counter."""
+    with _LOCK:
+        _STAGES.clear()
+        _COUNTERS.clear()
+
+
+@contextmanager
+def instrumented(clear:bool=True):
+    """Record within a block: `with instrumented(): design_sweep(...)`, then read `snapshot()`."""
+    global _ENABLED
+    previous = _ENABLED
+    if clear:
+        reset()
+    _ENABLED = True
+    try:
+        yield
+    finally:
+        _ENABLED = previous
+
+
+def count(name:str, n:int=1):
+    """Add `n` to a degenerate-result counter (no-op while disabled)."""
+    if _ENABLED and n:
+        with _LOCK:
+            _COUNTERS[name] = _COUNTERS.get(name, 0) + int(n)
+
+
+def stage(name:str|None = None, degenerate:dict|None = None, errors:dict|None = None):
+    """Decorator recording calls, time and batch sizes of a pipeline stage.
+
+    Args:
+        name (str): Stage name, the function name by default.
+        degenerate (dict): Counter name -> function of the result returning
+        how many degenerate values it holds (a bool counts as 0 or 1).
+        errors (dict): Counter name -> predicate of a raised exception; the
+        exception is re-raised after counting.
+    """
+    def decorator(function):
+        label = name or function.__name__
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _ENABLED:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            except Exception as error:
+                _record(label, start, _size((args, kwargs)), failed=True)
+                for counter, matches in (errors or {}).items():
+                    if matches(error):
+                        count(counter)
+                raise
+            _record(label, start, _size(result) if result is not None else _size((args, kwargs)))
+            for counter, check in (degenerate or {}).items():
+                count(counter, np.count_nonzero(check(result)))
+            return result
+
+        return wrapper
+    return decorator
+
+
+def _size(value, depth:int=2)->int:
+    """Batch size of a result or of the arguments: the largest array found, 1 for scalars."""
+    if isinstance(value, np.ndarray):
+        return value.size
+    if depth and isinstance(value, (tuple, list, dict)):
+        return max((_size(item, depth - 1) for item in (value.values() if isinstance(value, dict) else value)), default=1)
+    return 1
+
+
+def _record(label:str, start:float, items:int, failed:bool=False):
+    elapsed = time.perf_counter() - start
+    with _LOCK:
+        entry = _STAGES.get(label)
+        if entry is None:
+            entry = _STAGES[label] = {'calls': 0, 'seconds': 0.0, 'items': 0, 'max_batch': 0, 'errors': 0}
+        entry['calls'] += 1
+        entry['seconds'] += elapsed
+        entry['items'] += items
+        entry['max_batch'] = max(entry['max_batch'], items)
+        entry['errors'] += failed
+
+
+def snapshot()->dict:
+    """Copy of the records: `stages` (calls, seconds, items, max_batch, mean_batch, errors) and `counters`."""
+    with _LOCK:
+        stages = {label: dict(entry, mean_batch=entry['items'] / entry['calls']) for label, entry in _STAGES.items()}
+        return {'enabled': _ENABLED, 'stages': stages, 'counters': dict(_COUNTERS)}
+
+
+def to_json(indent:int|None = 2)->str:
+    return json.dumps(snapshot(), indent=indent, sort_keys=True)
+
+
+def to_prometheus(prefix:str='heat_exchanger')->str:
+    """Records in the Prometheus text exposition format."""
+    data = snapshot()
+    metrics = (
+        ('stage_calls_total', 'calls', 'counter', 'Calls of each pipeline stage.'),
+        ('stage_seconds_total', 'seconds', 'counter', 'Time spent in each pipeline stage.'),
+        ('stage_items_total', 'items', 'counter', 'Points evaluated by each pipeline stage.'),
+        ('stage_errors_total', 'errors', 'counter', 'Calls of each pipeline stage that raised.'),
+        ('stage_max_batch', 'max_batch', 'gauge', 'Largest batch seen by each pipeline stage.'),
+    )
+    lines = []
+    for metric, key, kind, help_text in metrics:
+        lines += [f'# HELP {prefix}_{metric} {help_text}', f'# TYPE {prefix}_{metric} {kind}']
+        lines += [f'{prefix}_{metric}{{stage="{label}"}} {entry[key]}' for label, entry in sorted(data['stages'].items())]
+    lines += [f'# HELP {prefix}_degenerate_total Degenerate results by kind.', f'# TYPE {prefix}_degenerate_total counter']
+    lines += [f'{prefix}_degenerate_total{{kind="{kind}"}} {value}' for kind, value in sorted(data['counters'].items())]
+    return '\n'.join(lines) + '\n'
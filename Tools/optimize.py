@@ -0,0 +1,121 @@
+import numpy as np
+from Tools.catalog import CATALOG
+from Tools.general import heat_flow, flow_rate, mass_velocity, reynolds_batch, prandtl_batch, convective_coeff_batch, lmtd_engine
+from Tools.tools import (
+    clean_total_coeff, total_coefficient, calculate_area, calculate_length, numb_forks, corrected_length,
+    corrected_surface, corrected_desing_coeff, friction_factor, Fanning_factor, pressure_drop_4_velocity,
+    inn_and_out_drops, pressure_drop
+)
+
+
+def _pressure_drops(c:dict, length:np.ndarray)->tuple[np.ndarray, np.ndarray]:
+    """Tube and shell side pressure drops (psi) of candidates `c` for a corrected length in ft."""
+    tube, shell = c['tube_fluid'], c['shell_fluid']
+    dp_tube = pressure_drop(Fanning_factor(c['f_tube'], c['G_tube'], length, tube[0], c['tube_diameter']), 0, tube[0])
+    dp_shell = pressure_drop(
+        Fanning_factor(c['f_shell'], c['G_shell'], length, shell[0], c['shell_friction_diameter']), c['in_out'], shell[0]
+    )
+    return dp_tube, dp_shell
+
+
+def optimal_design(hot:tuple, cold:tuple, hot_flow:float, T_hot_in:float, T_hot_out:float, T_cold_in:float, T_cold_out:float,
+                   objective:str='area', max_dp_tube:float=10, max_dp_shell:float=10, max_velocity:float=np.inf,
+                   min_fouling_margin:float=0, fouling_factor:float=0, fork_length_arms:tuple[float, ...]=(20,),
+                   cost_per_area:float=1, cost_per_fork:float=0, config:str='counter-current', hot_in_tubes:bool=True,
+                   exchanger_types:tuple[str, ...]=('double pipe', 'pipe and shell'), batch:int=8)->dict:
+    """Minimum-area or minimum-cost catalog design under pressure-drop, velocity and fouling limits.
+
+    Candidates are every catalog geometry combined with every hairpin arm in
+    `fork_length_arms`. Whole groups are pruned by bounds before the design chain runs:
+    velocity depends only on the flow area, and the pressure drop of a single
+    hairpin is a lower bound for every longer exchanger (ΔP rises with length
+    and mass velocity). Survivors are ranked by their objective, which only
+    needs U and the area, and the pressure drops and fouling margin are then
+    evaluated `batch` candidates at a time in that order until the first
+    feasible one, which is optimal.
+
+    Args:
+        hot, cold (tuple): (density lb/ft^3, Cp Btu/lb*°F, viscosity lb/ft*h, conductivity Btu/h*ft*°F).
+        objective (str): 'area' (corrected surface, ft^2) or 'cost'
+        (cost_per_area * surface + cost_per_fork * forks).
+        max_dp_tube, max_dp_shell (float): Pressure-drop limits in psi.
+        max_velocity (float): Velocity limit in ft/s on both sides.
+        min_fouling_margin (float): Dirt factor the corrected surface must absorb, 1/U_design - 1/U_c.
+
+    Returns:
+        dict: `design` (column values of the optimum, or None), `objective`,
+        and counts that add up to `candidates`: `pruned` (rejected by the
+        velocity and one-hairpin pressure-drop bounds), `invalid` (no valid
+        Reynolds number, film coefficient or area), `evaluated` (pressure
+        drops and fouling margin checked) and `skipped` (ranked behind the
+        optimum, never evaluated).
+    """
+    if objective not in ('area', 'cost'):
+        raise ValueError(f'Unsupported objective: {objective}')
+    geometry = CATALOG.select(exchanger_types)
+    n_geometry, arms = len(geometry['size']), np.asarray(fork_length_arms, dtype=float)
+    c = {key: np.repeat(value, len(arms)) for key, value in geometry.items()}
+    c['fork_length_arm'] = np.tile(arms, n_geometry)
+    candidates = len(c['size'])
+
+    Q = heat_flow(hot_flow, hot[1], T_hot_in, T_hot_out)
+    cold_flow = flow_rate(Q, cold[1], T_cold_in, T_cold_out)
+    c['tube_fluid'], c['shell_fluid'] = (hot, cold) if hot_in_tubes else (cold, hot)
+    tube_flow, shell_flow = (hot_flow, cold_flow) if hot_in_tubes else (cold_flow, hot_flow)
+    tube, shell = c['tube_fluid'], c['shell_fluid']
+
+    # Bounds that need no design: velocity, and the pressure drop of one hairpin.
+    c['G_tube'] = mass_velocity(tube_flow, c['tube_area'])
+    c['G_shell'] = mass_velocity(shell_flow, c['shell_area'])
+    c['velocity_tube'] = pressure_drop_4_velocity(c['G_tube'], tube[0])
+    c['velocity_shell'] = pressure_drop_4_velocity(c['G_shell'], shell[0])
+    Re_tube, valid = reynolds_batch(c['tube_diameter'], c['G_tube'], tube[2])
+    Re_friction, valid_friction = reynolds_batch(c['shell_friction_diameter'], c['G_shell'], shell[2])
+    c['f_tube'], c['f_shell'] = friction_factor(Re_tube), friction_factor(Re_friction)
+    c['in_out'] = inn_and_out_drops(c['velocity_shell'])
+    dp_tube_min, dp_shell_min = _pressure_drops(c, corrected_length(1, 2 * c['fork_length_arm']))
+    invalid = ~(valid & valid_friction)
+    keep = (~invalid & (c['velocity_tube'] <= max_velocity) & (c['velocity_shell'] <= max_velocity)
+            & (dp_tube_min <= max_dp_tube) & (dp_shell_min <= max_dp_shell))
+    counts = dict(candidates=candidates, pruned=int((~invalid & ~keep).sum()), invalid=int(invalid.sum()))
+    c = {key: value[keep] if isinstance(value, np.ndarray) else value for key, value in c.items()}
+    Re_tube = Re_tube[keep]
+
+    # Objective of the survivors: only U and the area are needed.
+    Re_shell, _ = reynolds_batch(c['shell_diameter'], c['G_shell'], shell[2])
+    h_i, valid_hi = convective_coeff_batch(Re_tube, prandtl_batch(*tube[1:])[0], tube[3], c['tube_diameter'])
+    h_o, valid_ho = convective_coeff_batch(Re_shell, prandtl_batch(*shell[1:])[0], shell[3], c['shell_diameter'])
+    is_shell = c['exchanger_type'] == 'pipe and shell'
+    temperatures = (T_hot_in, T_hot_out, T_cold_in, T_cold_out)
+    delta_T_log = np.where(is_shell, lmtd_engine('pipe and shell', config)(*temperatures)[0],
+                           lmtd_engine('double pipe', config)(*temperatures)[0])
+    c['lmtd'] = delta_T_log
+    c['U_c'] = clean_total_coeff(h_i * (c['tube_diameter'] / c['tube_ext_diameter']), h_o)
+    c['U_d'] = total_coefficient(c['U_c'], fouling_factor)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        c['area'] = calculate_area(Q, c['U_d'], delta_T_log)
+        c['forks'] = numb_forks(calculate_length(c['area'], c['linear_surface']), c['fork_length_arm'])
+    c['corrected_length'] = corrected_length(c['forks'], 2 * c['fork_length_arm'])
+    c['corrected_surface'] = corrected_surface(c['corrected_length'], c['linear_surface'])
+    c['objective'] = c['corrected_surface'] if objective == 'area' else cost_per_area * c['corrected_surface'] + cost_per_fork * c['forks']
+    ranked = np.flatnonzero(valid_hi & valid_ho & np.isfinite(c['objective']) & (c['area'] > 0))
+    counts['invalid'] += len(c['size']) - len(ranked)
+    ranked = ranked[np.argsort(c['objective'][ranked], kind='stable')]
+
+    evaluated = 0
+    for start in range(0, len(ranked), batch):
+        rows = ranked[start:start + batch]
+        evaluated += len(rows)
+        part = {key: value[rows] if isinstance(value, np.ndarray) else value for key, value in c.items()}
+        dp_tube, dp_shell = _pressure_drops(part, part['corrected_length'])
+        with np.errstate(divide='ignore'):
+            margin = 1 / corrected_desing_coeff(Q, part['corrected_surface'], part['lmtd']) - 1 / part['U_c']
+        feasible = np.flatnonzero((dp_tube <= max_dp_tube) & (dp_shell <= max_dp_shell) & (margin >= min_fouling_margin))
+        if len(feasible):
+            i = feasible[0]
+            design = {key: value[i].item() for key, value in part.items() if isinstance(value, np.ndarray)}
+            design.update(dp_tube=float(dp_tube[i]), dp_shell=float(dp_shell[i]), fouling_margin=float(margin[i]),
+                          heat_flow=float(Q), cold_flow=float(cold_flow))
+            return dict(design=design, objective=design['objective'], **counts, evaluated=evaluated,
+                        skipped=len(ranked) - evaluated)
+    return dict(design=None, objective=np.nan, **counts, evaluated=evaluated, skipped=0)
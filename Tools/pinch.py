@@ -0,0 +1,240 @@
+import numpy as np
+from Tools.catalog import CATALOG
+from Tools.general import heat_flow, convective_coeff_batch, lmtd_engine
+from Tools.instrumentation import stage
+from Tools.tools import calculate_length, numb_forks, corrected_length, corrected_surface
+
+# Pinch analysis of a set of process streams. A stream is hot when its supply
+# temperature is above its target. Streams are given like `heat_flow`: mass
+# flow (lb/h), heat capacity (Btu/lb*°F), supply and target temperature (°F),
+# so heat capacity flows are Btu/h*°F, duties Btu/h and areas ft^2. Every
+# stream endpoint becomes an event +CP (supply) or -CP (target) on the
+# temperature axis; sorting the events and a cumulative sum give the
+# composite curves and the heat cascade in O(n log n).
+
+
+def _streams(mass_flow, heat_capacity, supply, target)->tuple[np.ndarray, ...]:
+    """Heat capacity flow, supply and target temperatures as 1-D float arrays."""
+    mass_flow, heat_capacity, supply, target = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(value, dtype=float)) for value in (mass_flow, heat_capacity, supply, target))
+    )
+    return mass_flow * heat_capacity, supply, target
+
+
+def _cumulative(low:np.ndarray, high:np.ndarray, rate:np.ndarray)->tuple[np.ndarray, np.ndarray]:
+    """Temperatures and running integral of the summed `rate` of the segments [low, high], ascending."""
+    points = np.concatenate([low, high])
+    order = np.argsort(points, kind='stable')
+    temperatures = points[order]
+    summed = np.cumsum(np.concatenate([rate, -rate])[order])[:-1]
+    return temperatures, np.concatenate([[0.0], np.cumsum(summed * np.diff(temperatures))])
+
+
+def composite_curve(mass_flow, heat_capacity, supply, target)->tuple[np.ndarray, np.ndarray]:
+    """Composite curve of a set of streams of one kind.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Temperatures (°F, ascending) and the
+        cumulative duty below each of them (Btu/h). Temperature ranges covered
+        by no stream appear as flat steps of the duty.
+    """
+    CP, supply, target = _streams(mass_flow, heat_capacity, supply, target)
+    return _cumulative(np.minimum(supply, target), np.maximum(supply, target), CP)
+
+
+def composite_curves(mass_flow, heat_capacity, supply, target, dT_min:float)->dict[str, np.ndarray]:
+    """Hot and cold composite curves, the cold one shifted by the minimum cold utility at `dT_min`.
+
+    Returns:
+        dict[str, np.ndarray]: hot_temperature, hot_duty, cold_temperature, cold_duty.
+    """
+    CP, supply, target = _streams(mass_flow, heat_capacity, supply, target)
+    hot = supply > target
+    hot_temperature, hot_duty = composite_curve(CP[hot], 1, supply[hot], target[hot])
+    cold_temperature, cold_duty = composite_curve(CP[~hot], 1, supply[~hot], target[~hot])
+    cold_utility = problem_table(CP, 1, supply, target, dT_min)['cold_utility'][0]
+    return dict(hot_temperature=hot_temperature, hot_duty=hot_duty,
+                cold_temperature=cold_temperature, cold_duty=cold_duty + cold_utility)
+
+
+@stage()
+def problem_table(mass_flow, heat_capacity, supply, target, dT_min)->dict[str, np.ndarray]:
+    """Problem-table algorithm for every ΔTmin of `dT_min` at once.
+
+    Hot streams are shifted down and cold streams up by ΔTmin/2, the shifted
+    endpoints of every ΔTmin are sorted in one call, and the heat cascade is
+    the cumulative sum of the interval surpluses.
+
+    Returns:
+        dict[str, np.ndarray]: Per ΔTmin: hot_utility and cold_utility (Btu/h),
+        pinch (shifted temperature, NaN for threshold problems), hot_pinch and
+        cold_pinch (°F), threshold, and units, the minimum number of exchangers
+        (streams and utilities minus one on each side of the pinch). The grand
+        composite curve is `shifted_temperature` against `grand_composite`,
+        both (len(dT_min), 2 * streams) with temperatures descending.
+    """
+    CP, supply, target = _streams(mass_flow, heat_capacity, supply, target)
+    dT_min = np.atleast_1d(np.asarray(dT_min, dtype=float))
+    hot = supply > target
+    shift = np.where(hot, -0.5, 0.5) * dT_min[:, None]
+    shifted = np.concatenate([supply + shift, target + shift], axis=1)
+    order = np.argsort(-shifted, axis=1, kind='stable')
+    temperatures = np.take_along_axis(shifted, order, axis=1)
+    net_CP = np.cumsum(np.concatenate([CP, -CP])[order], axis=1)[:, :-1]
+    surplus = net_CP * -np.diff(temperatures, axis=1)
+    cascade = np.concatenate([np.zeros((len(dT_min), 1)), np.cumsum(surplus, axis=1)], axis=1)
+    hot_utility = np.maximum(-cascade.min(axis=1), 0)
+    grand_composite = cascade + hot_utility[:, None]
+    cold_utility = grand_composite[:, -1]
+    scale = np.maximum(np.abs(surplus).sum(axis=1), 1)
+    threshold = (hot_utility <= 1e-12 * scale) | (cold_utility <= 1e-12 * scale)
+    pinch = np.where(threshold, np.nan, temperatures[np.arange(len(dT_min)), np.argmin(grand_composite, axis=1)])
+
+    # Minimum units: every stream crossing a side counts there, plus that side's utility.
+    upper = np.maximum(supply, target) + shift
+    lower = np.minimum(supply, target) + shift
+    present = (CP > 0) & (supply != target)
+    above = (present & (upper > pinch[:, None])).sum(axis=1) + (hot_utility > 0)
+    below = (present & (lower < pinch[:, None])).sum(axis=1) + (cold_utility > 0)
+    total = present.sum() + (hot_utility > 0) + (cold_utility > 0)
+    units = np.where(threshold, np.maximum(total - 1, 0), np.maximum(above - 1, 0) + np.maximum(below - 1, 0))
+    return dict(dT_min=dT_min, hot_utility=hot_utility, cold_utility=cold_utility, pinch=pinch,
+                hot_pinch=pinch + dT_min / 2, cold_pinch=pinch - dT_min / 2, threshold=threshold, units=units,
+                shifted_temperature=temperatures, grand_composite=grand_composite)
+
+
+def film_coefficient(Reynold:np.ndarray, Prandtl:np.ndarray, thermal_conductivity:np.ndarray, diameter:np.ndarray,
+                     fouling_factor:np.ndarray=0)->tuple[np.ndarray, np.ndarray]:
+    """Stream film coefficients for area targeting: `convective_coeff_batch` with an optional fouling resistance.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Coefficients in Btu/h*ft^2*°F and validity mask.
+    """
+    h, valid = convective_coeff_batch(Reynold, Prandtl, thermal_conductivity, diameter)
+    return 1 / (1 / h + np.asarray(fouling_factor, dtype=float)), valid
+
+
+def _temperature_at(duty:np.ndarray, temperatures:np.ndarray, q:np.ndarray, upper:bool)->np.ndarray:
+    """Temperature of a composite curve at duty `q`; flat steps resolve to their top (upper) or bottom end."""
+    i = np.searchsorted(duty, q, side='right' if upper else 'left') - 1
+    i = np.clip(i, 0, len(duty) - 2)
+    step = duty[i + 1] - duty[i]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fraction = np.clip(np.where(step > 0, (q - duty[i]) / step, float(not upper)), 0, 1)
+    return temperatures[i] + fraction * (temperatures[i + 1] - temperatures[i])
+
+
+def _utility(utility, duty:float)->tuple[np.ndarray, ...]:
+    """(CP, supply, target, h) arrays of a utility (T_in, T_out, h) carrying `duty`, empty when unused."""
+    if utility is None or duty <= 0:
+        return (np.empty(0),) * 4
+    T_in, T_out, h = (float(value) for value in utility)
+    return np.array([duty / abs(T_in - T_out)]), np.array([T_in]), np.array([T_out]), np.array([h])
+
+
+def area_target(mass_flow, heat_capacity, supply, target, h, dT_min:float, hot_utility=None, cold_utility=None,
+                targets:dict|None = None)->float:
+    """Minimum total area (ft^2) of the network at `dT_min` for vertical heat transfer between the balanced composite curves.
+
+    Within every enthalpy interval the area is Σ q_i/h_i over the streams
+    involved divided by the interval's counter-current LMTD (`lmtd_engine`).
+
+    Args:
+        h (np.ndarray): Film coefficient of every stream, Btu/h*ft^2*°F (see `film_coefficient`).
+        hot_utility, cold_utility (tuple): (T_in, T_out, h) of the utilities. A
+        missing utility leaves its part out, so without both the result is the
+        heat recovery area only.
+        targets (dict): `problem_table` result for this single ΔTmin, to avoid recomputing it.
+    """
+    CP, supply, target = _streams(mass_flow, heat_capacity, supply, target)
+    h = np.broadcast_to(np.asarray(h, dtype=float), CP.shape)
+    targets = targets or problem_table(CP, 1, supply, target, dT_min)
+    Q_hot, Q_cold = float(np.ravel(targets['hot_utility'])[0]), float(np.ravel(targets['cold_utility'])[0])
+    hot = supply > target
+    sides = []
+    for mask, utility, Q in ((hot, hot_utility, Q_hot), (~hot, cold_utility, Q_cold)):
+        extra = _utility(utility, Q)
+        CP_side, supply_side, target_side, h_side = (np.concatenate([value[mask], more]) for value, more in
+                                                     zip((CP, supply, target, h), extra))
+        low, high = np.minimum(supply_side, target_side), np.maximum(supply_side, target_side)
+        temperatures, duty = _cumulative(low, high, CP_side)
+        sides.append((temperatures, duty, _cumulative(low, high, CP_side / h_side)[1]))
+    (T_hot, duty_hot, resistance_hot), (T_cold, duty_cold, resistance_cold) = sides
+    offset = 0.0 if cold_utility is not None and Q_cold > 0 else Q_cold
+    start, end = offset, min(duty_hot[-1], offset + duty_cold[-1])
+    if end <= start:
+        return 0.0
+    q = np.unique(np.concatenate([duty_hot, duty_cold + offset]))
+    q = np.unique(np.concatenate([[start, end], q[(q > start) & (q < end)]]))
+    bottom, top = q[:-1], q[1:]
+    hot_out, hot_in = _temperature_at(duty_hot, T_hot, bottom, True), _temperature_at(duty_hot, T_hot, top, False)
+    cold_in = _temperature_at(duty_cold, T_cold, bottom - offset, True)
+    cold_out = _temperature_at(duty_cold, T_cold, top - offset, False)
+    delta_T_log, _, valid = lmtd_engine('double pipe', 'counter-current')(hot_in, hot_out, cold_in, cold_out)
+    resistance = (np.interp(hot_in, T_hot, resistance_hot) - np.interp(hot_out, T_hot, resistance_hot)
+                  + np.interp(cold_out, T_cold, resistance_cold) - np.interp(cold_in, T_cold, resistance_cold))
+    if not valid.all():
+        return np.nan
+    return float(np.sum(resistance / delta_T_log))
+
+
+def catalog_sizes(area, units, fork_length_arms:tuple[float, ...]=(20,),
+                  exchanger_types:tuple[str, ...]=('double pipe', 'pipe and shell'), **filters)->dict[str, np.ndarray]:
+    """Catalog exchangers that realise area targets, `units` equal exchangers per target.
+
+    Every catalog geometry (with `filters` as in `CATALOG.select`) and hairpin
+    arm is sized for area / units with the same fork rounding as the design chain.
+
+    Returns:
+        dict[str, np.ndarray]: Per target, the geometry with the least installed
+        surface: size, bwg, arrangement, exchanger_type, fork_length_arm,
+        forks per unit, surface (installed ft^2, all units) and oversize
+        (surface / area - 1). `candidate_surface` holds the installed surface
+        of every candidate, shape (targets, candidates).
+    """
+    geometry = CATALOG.select(exchanger_types, **filters)
+    arms = np.asarray(fork_length_arms, dtype=float)
+    linear_surface = np.repeat(geometry['linear_surface'], len(arms))
+    arm = np.tile(arms, len(geometry['size']))
+    area, units = np.broadcast_arrays(np.atleast_1d(np.asarray(area, dtype=float)), np.atleast_1d(np.asarray(units, dtype=float)))
+    units = np.maximum(units, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        forks = numb_forks(calculate_length(area[:, None] / units[:, None], linear_surface), arm)
+    forks = np.maximum(forks, 1)
+    surface = corrected_surface(corrected_length(forks, 2 * arm), linear_surface) * units[:, None]
+    best = np.argmin(np.where(np.isfinite(surface), surface, np.inf), axis=1)
+    rows = best // len(arms)
+    picked = np.take_along_axis(surface, best[:, None], axis=1)[:, 0]
+    valid = np.isfinite(area) & (area > 0)
+    result = {key: geometry[key][rows] for key in ('size', 'bwg', 'arrangement', 'exchanger_type')}
+    result.update(fork_length_arm=arm[best], forks=np.take_along_axis(forks, best[:, None], axis=1)[:, 0],
+                  surface=np.where(valid, picked, np.nan), oversize=np.where(valid, picked / area - 1, np.nan),
+                  candidate_surface=surface, valid=valid)
+    return result
+
+
+@stage()
+def pinch_targets(mass_flow, heat_capacity, supply, target, dT_min, h=None, hot_utility=None, cold_utility=None,
+                  fork_length_arms:tuple[float, ...]=(20,), exchanger_types:tuple[str, ...]=('double pipe', 'pipe and shell'))->dict:
+    """Energy, unit, area and catalog targets over a ΔTmin sweep.
+
+    The problem table runs once for every ΔTmin. When film coefficients `h`
+    are given, the area target of every ΔTmin is mapped to `units` catalog
+    exchangers of equal size (`catalog_sizes`).
+
+    Returns:
+        dict: The `problem_table` arrays, plus `area` and `catalog` when `h` is given.
+    """
+    CP, supply, target = _streams(mass_flow, heat_capacity, supply, target)
+    targets = problem_table(CP, 1, supply, target, dT_min)
+    targets['hot_duty'] = float(heat_flow(CP, 1, supply, target)[supply > target].sum())
+    targets['cold_duty'] = float(heat_flow(CP, 1, supply, target)[supply < target].sum())
+    if h is None:
+        return targets
+    targets['area'] = np.array([
+        area_target(CP, 1, supply, target, h, dT, hot_utility, cold_utility,
+                    targets={key: value[i:i + 1] for key, value in targets.items() if isinstance(value, np.ndarray)})
+        for i, dT in enumerate(targets['dT_min'])
+    ])
+    targets['catalog'] = catalog_sizes(targets['area'], targets['units'], fork_length_arms, exchanger_types)
+    return targets
@@ -0,0 +1,99 @@
+from functools import lru_cache
+import numpy as np
+from Tools.tables import fluid_property_data
+
+# Property order of every result, the same as `print_properties`.
+PROPERTIES = ('density', 'Cp', 'viscosity', 'conductivity')
+# Properties interpolated in log space, where the table is close to linear.
+_LOG_PROPERTIES = ('viscosity',)
+
+
+def _pchip_slopes(x:np.ndarray, y:np.ndarray)->np.ndarray:
+    """Fritsch-Carlson derivatives of a monotone piecewise cubic Hermite interpolant."""
+    h = np.diff(x)
+    delta = np.diff(y) / h
+    d = np.zeros_like(y)
+    same_sign = delta[:-1] * delta[1:] > 0
+    w1, w2 = 2 * h[1:] + h[:-1], h[1:] + 2 * h[:-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d[1:-1] = np.where(same_sign, (w1 + w2) / (w1 / delta[:-1] + w2 / delta[1:]), 0.0)
+    for end, h0, h1, d0, d1 in ((0, h[0], h[1], delta[0], delta[1]), (-1, h[-1], h[-2], delta[-1], delta[-2])):
+        slope = ((2 * h0 + h1) * d0 - h0 * d1) / (h0 + h1)
+        if np.sign(slope) != np.sign(d0):
+            slope = 0.0
+        elif np.sign(d0) != np.sign(d1) and abs(slope) > abs(3 * d0):
+            slope = 3 * d0
+        d[end] = slope
+    return d
+
+
+class FluidTable:
+    """Monotone cubic interpolation of one fluid's property table.
+
+    The polynomial coefficients of every interval are computed once, so an
+    evaluation is one `searchsorted` plus a Horner step for all properties.
+    """
+
+    def __init__(self, data:dict):
+        self.T = np.asarray(data['T'], dtype=float)
+        h = np.diff(self.T)
+        coefficients = []
+        for name in PROPERTIES:
+            y = np.asarray(data[name], dtype=float)
+            y = np.log(y) if name in _LOG_PROPERTIES else y
+            d = _pchip_slopes(self.T, y)
+            delta = np.diff(y) / h
+            coefficients.append(np.stack([y[:-1], d[:-1], (3 * delta - 2 * d[:-1] - d[1:]) / h,
+                                          (d[:-1] + d[1:] - 2 * delta) / h**2]))
+        # Shape (4 powers, intervals, properties).
+        self.coefficients = np.stack(coefficients, axis=-1)
+        self.log_columns = [i for i, name in enumerate(PROPERTIES) if name in _LOG_PROPERTIES]
+
+    def __call__(self, temperature:np.ndarray)->tuple[np.ndarray, np.ndarray]:
+        """Properties at temperatures in °F, shape (..., 4), and the mask of temperatures inside the table."""
+        temperature = np.asarray(temperature, dtype=float)
+        valid = (temperature >= self.T[0]) & (temperature <= self.T[-1])
+        interval = np.clip(np.searchsorted(self.T, temperature, side='right') - 1, 0, len(self.T) - 2)
+        s = (temperature - self.T[interval])[..., None]
+        c = self.coefficients.take(interval, axis=1)
+        values = c[0] + s * (c[1] + s * (c[2] + s * c[3]))
+        values[..., self.log_columns] = np.exp(values[..., self.log_columns])
+        values[~valid] = np.nan
+        return values, valid
+
+
+FLUIDS = {name: FluidTable(data) for name, data in fluid_property_data.items()}
+
+
+def fluid_properties(substance:str, temperature:np.ndarray)->tuple[np.ndarray, np.ndarray]:
+    """Density, Cp, viscosity and conductivity for arrays of temperatures.
+
+    Args:
+        substance (str): A key of `fluid_property_data`: 'water', 'air' or 'engine oil'.
+        temperature (np.ndarray): Temperatures in °F.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Properties with a last axis of size 4 in
+        lbm/ft^3, Btu/lbm*°F, lbm/ft*s and Btu/h*ft*°F, and the mask of
+        temperatures inside the table (NaN outside).
+    """
+    try:
+        table = FLUIDS[substance.lower()]
+    except KeyError:
+        raise ValueError(f'Unsupported substance: {substance}') from None
+    return table(temperature)
+
+
+@lru_cache(maxsize=4096)
+def properties_at(substance:str, temperature:float)->tuple[float, float, float, float]:
+    """Cached scalar version of `fluid_properties`, ready for `print_properties`."""
+    values, valid = fluid_properties(substance, temperature)
+    if not valid:
+        raise ValueError(f'{temperature}°F is outside the {substance} table.')
+    return tuple(float(value) for value in values)
+
+
+def correlation_properties(substance:str, temperature:np.ndarray)->tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(density, Cp, viscosity in lb/ft*h, conductivity) as used by the sweep and design functions."""
+    values, _ = fluid_properties(substance, temperature)
+    return values[..., 0], values[..., 1], values[..., 2] * 3600, values[..., 3]
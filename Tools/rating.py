@@ -0,0 +1,136 @@
+import numpy as np
+from Tools.general import UnsupportedConfiguration
+from Tools.tools import total_coefficient
+from Tools.pipe_and_shell_functions import exchanger_area
+
+RATING_CONFIGS = ('parallel', 'counter-current', 'pipe and shell')
+
+
+def _one_minus_exp_ratio(x:np.ndarray)->np.ndarray:
+    """(1 - exp(-x)) / x with its limit 1 at x = 0."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(np.abs(x) < 1e-12, 1 - x / 2, -np.expm1(-x) / np.where(x == 0, 1, x))
+
+
+def effectiveness_batch(config:str, C_NTU:np.ndarray, NTU_value:np.ndarray)->np.ndarray:
+    """Closed-form ε-NTU effectiveness for arrays of capacity ratio and NTU.
+
+    Args:
+        config (str): 'parallel', 'counter-current' or 'pipe and shell'
+        (one shell pass, even number of tube passes).
+        C_NTU (np.ndarray): Capacity ratio Cmin/Cmax.
+        NTU_value (np.ndarray): Number of transfer units.
+
+    Returns:
+        np.ndarray: Effectiveness. Counter-current C_NTU == 1 uses its limit NTU / (1 + NTU).
+
+    Raises:
+        UnsupportedConfiguration (a ValueError): If the configuration is not in RATING_CONFIGS.
+    """
+    config = config.lower()
+    C_NTU, NTU_value = np.broadcast_arrays(np.asarray(C_NTU, dtype=float), np.asarray(NTU_value, dtype=float))
+    if config == 'parallel':
+        return -np.expm1(-NTU_value * (1 + C_NTU)) / (1 + C_NTU)
+    elif config == 'counter-current':
+        # Same as exchanger_efectivity, rearranged so that C_NTU == 1 is not 0/0.
+        x = NTU_value * (1 - C_NTU)
+        a = NTU_value * _one_minus_exp_ratio(x)
+        return a / (a + np.exp(-x))
+    elif config == 'pipe and shell':
+        root = np.sqrt(1 + C_NTU**2)
+        with np.errstate(divide='ignore', over='ignore'):
+            ratio = 1 / np.tanh(NTU_value * root / 2)
+        return 2 / (1 + C_NTU + root * ratio)
+    raise UnsupportedConfiguration(f'Unsupported configuration: {config}')
+
+
+def overall_ua(U_c:np.ndarray, numb_pipes:np.ndarray, length_pipe:np.ndarray, ext_diameter:np.ndarray, fouling_factor:np.ndarray=0)->np.ndarray:
+    """UA in Btu/h*°F from the clean coefficient, fouling and pipe count, length (ft) and diameter (ft)."""
+    return total_coefficient(U_c, fouling_factor) * exchanger_area(numb_pipes, length_pipe, ext_diameter)
+
+
+def rate(config:str, hot_flow:np.ndarray, hot_cp:np.ndarray, T_hot_in:np.ndarray,
+         cold_flow:np.ndarray, cold_cp:np.ndarray, T_cold_in:np.ndarray, UA:np.ndarray)->dict[str, np.ndarray]:
+    """Outlet temperatures and duty of existing exchangers with constant properties.
+
+    All arguments broadcast, so one call rates thousands of units.
+
+    Returns:
+        dict[str, np.ndarray]: T_hot_out, T_cold_out, duty (Btu/h), effectiveness, NTU and a `valid` mask.
+    """
+    hot_flow, hot_cp, T_hot_in, cold_flow, cold_cp, T_cold_in, UA = np.broadcast_arrays(
+        *(np.asarray(value, dtype=float) for value in (hot_flow, hot_cp, T_hot_in, cold_flow, cold_cp, T_cold_in, UA))
+    )
+    C_hot = hot_flow * hot_cp
+    C_cold = cold_flow * cold_cp
+    valid = (C_hot > 0) & (C_cold > 0) & (UA >= 0) & np.isfinite(T_hot_in) & np.isfinite(T_cold_in)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        C_min = np.minimum(C_hot, C_cold)
+        NTU_value = UA / C_min
+        effectiveness = effectiveness_batch(config, C_min / np.maximum(C_hot, C_cold), NTU_value)
+        duty = effectiveness * C_min * (T_hot_in - T_cold_in)
+        T_hot_out = T_hot_in - duty / C_hot
+        T_cold_out = T_cold_in + duty / C_cold
+    results = dict(T_hot_out=T_hot_out, T_cold_out=T_cold_out, duty=duty, effectiveness=effectiveness, NTU=NTU_value)
+    results = {key: np.where(valid, value, np.nan) for key, value in results.items()}
+    results['valid'] = valid
+    return results
+
+
+def rate_variable(config:str, hot_flow:np.ndarray, hot_cp, T_hot_in:np.ndarray, cold_flow:np.ndarray, cold_cp,
+                  T_cold_in:np.ndarray, UA, tolerance:float=1e-8, max_iter:int=50)->dict[str, np.ndarray]:
+    """Rate exchangers whose properties depend on temperature.
+
+    `hot_cp` and `cold_cp` are callables of the stream mean temperature
+    (or constants); `UA` may be a callable of (hot mean, cold mean)
+    temperatures. The duty of every unit is found with a vectorized Newton
+    iteration on Q - ε(Q)*Cmin(Q)*(T_hot_in - T_cold_in) = 0, starting from
+    the constant-property solution at the inlet temperatures.
+
+    Returns:
+        dict[str, np.ndarray]: As `rate`, plus `iterations`; `valid` also requires
+        convergence, with the final residual within `tolerance` relative to the duty.
+    """
+    def properties(Q):
+        C_hot_guess = hot_flow * _evaluate(hot_cp, T_hot_in)
+        C_cold_guess = cold_flow * _evaluate(cold_cp, T_cold_in)
+        T_hot_mean = T_hot_in - Q / (2 * C_hot_guess)
+        T_cold_mean = T_cold_in + Q / (2 * C_cold_guess)
+        return (_evaluate(hot_cp, T_hot_mean), _evaluate(cold_cp, T_cold_mean),
+                _evaluate(UA, T_hot_mean, T_cold_mean))
+
+    def residual(Q):
+        cp_hot, cp_cold, ua = properties(Q)
+        results = rate(config, hot_flow, cp_hot, T_hot_in, cold_flow, cp_cold, T_cold_in, ua)
+        return Q - results['duty'], results
+
+    hot_flow, T_hot_in, cold_flow, T_cold_in = np.broadcast_arrays(
+        *(np.asarray(value, dtype=float) for value in (hot_flow, T_hot_in, cold_flow, T_cold_in))
+    )
+    Q = rate(config, hot_flow, _evaluate(hot_cp, T_hot_in), T_hot_in, cold_flow, _evaluate(cold_cp, T_cold_in),
+             T_cold_in, _evaluate(UA, T_hot_in, T_cold_in))['duty']
+    active = np.isfinite(Q)
+    iterations = np.zeros(Q.shape, dtype=int)
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        F, _ = residual(Q)
+        step = 1e-6 * np.maximum(np.abs(Q), 1.0)
+        F_step, _ = residual(Q + step)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            delta = F * step / (F_step - F)
+        # A unit without a finite step keeps its duty and stays active, so it ends invalid.
+        finite = np.isfinite(delta)
+        delta = np.where(active & finite, delta, 0.0)
+        Q = Q - delta
+        iterations += active
+        active &= ~finite | (np.abs(delta) > tolerance * np.maximum(np.abs(Q), 1.0))
+    F, results = residual(Q)
+    results['valid'] &= ~active & (np.abs(F) <= tolerance * np.maximum(np.abs(Q), 1.0))
+    results['iterations'] = iterations
+    return results
+
+
+def _evaluate(value, *temperatures):
+    """Call `value` with the temperatures if it is a property function, else return it as an array."""
+    return np.asarray(value(*temperatures) if callable(value) else value, dtype=float)
@@ -0,0 +1,318 @@
+import time
+import numpy as np
+from Tools.general import UnsupportedConfiguration, mass_velocity, reynolds_batch, prandtl_batch, convective_coeff_batch, lmtd_engine
+from Tools.properties import correlation_properties
+from Tools.rating import rate
+from Tools.sweep import OPERATING_COLUMNS, evaluate_cases
+from Tools.tools import clean_total_coeff, total_coefficient
+
+# Segmented exchanger model: every unit is split into axial cells with their
+# own fluid properties, film coefficients and U, for many units at once.
+# Fluids are either a substance of Tools.properties ('water', 'air',
+# 'engine oil') or a constant (density, Cp, viscosity lb/ft*h, conductivity)
+# tuple, with which the segmented design reproduces the lumped LMTD design.
+# Temperatures are in °F.
+
+
+def fluid_state(fluid, temperature:np.ndarray)->tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(density, Cp, viscosity lb/ft*h, conductivity) of a substance name or constant tuple at `temperature`."""
+    if isinstance(fluid, str):
+        return correlation_properties(fluid, temperature)
+    shape = np.shape(temperature)
+    return tuple(np.broadcast_to(np.asarray(value, dtype=float), shape) if np.ndim(value) == 0 else
+                 np.broadcast_to(np.asarray(value, dtype=float).reshape(-1, *([1] * (len(shape) - 1))), shape)
+                 for value in fluid)
+
+
+def local_coefficient(geometry:dict, G_tube:np.ndarray, G_shell:np.ndarray, tube:tuple, shell:tuple,
+                      fouling_factor=0)->tuple[np.ndarray, np.ndarray]:
+    """Dirty U of every cell from the local tube and shell fluid states; geometry columns broadcast against the cells."""
+    Re_tube, valid = reynolds_batch(geometry['tube_diameter'], G_tube, tube[2])
+    Re_shell, valid_shell = reynolds_batch(geometry['shell_diameter'], G_shell, shell[2])
+    h_i, valid_hi = convective_coeff_batch(Re_tube, prandtl_batch(*tube[1:])[0], tube[3], geometry['tube_diameter'])
+    h_o, valid_ho = convective_coeff_batch(Re_shell, prandtl_batch(*shell[1:])[0], shell[3], geometry['shell_diameter'])
+    h_io = h_i * (geometry['tube_diameter'] / geometry['tube_ext_diameter'])
+    return total_coefficient(clean_total_coeff(h_io, h_o), fouling_factor), valid & valid_shell & valid_hi & valid_ho
+
+
+def _interp_rows(x:np.ndarray, xp:np.ndarray, fp:np.ndarray)->np.ndarray:
+    """Row-wise linear interpolation: x (M, K) in increasing rows xp (M, N+1) with values fp (M, N+1)."""
+    # Rows are normalized to [0, 1] and shifted apart by 2, so one searchsorted serves them all.
+    M, width = xp.shape
+    span = xp[:, -1:] - xp[:, :1]
+    scale = np.where(span > 0, span, 1.0)
+    offset = 2 * np.arange(M)[:, None]
+    grid = ((xp - xp[:, :1]) / scale + offset).ravel()
+    target = np.nan_to_num(np.clip((x - xp[:, :1]) / scale, 0, 1)) + offset
+    index = np.searchsorted(grid, target.ravel(), side='right').reshape(x.shape) - 1
+    index = np.clip(index - np.arange(M)[:, None] * width, 0, width - 2)
+    x0 = np.take_along_axis(xp, index, 1)
+    x1 = np.take_along_axis(xp, index + 1, 1)
+    f0 = np.take_along_axis(fp, index, 1)
+    f1 = np.take_along_axis(fp, index + 1, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weight = np.where(x1 > x0, (x - x0) / (x1 - x0), 0.0)
+    return f0 + weight * (f1 - f0)
+
+
+def _design_pass(geometry:dict, op:dict, hot, cold, config:str, fouling_factor, hot_in_tubes:bool,
+                 F:np.ndarray, segments:int)->tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Area, duty and cold flow of every unit with `segments` cells of equal hot-side temperature step."""
+    column = lambda value: np.asarray(value, dtype=float)[:, None]
+    fraction = np.arange(segments + 1) / segments
+    T_hot = column(op['T_hot_in']) - fraction * column(op['T_hot_in'] - op['T_hot_out'])
+    T_hot_mid = (T_hot[:, :-1] + T_hot[:, 1:]) / 2
+    hot_state = fluid_state(hot, T_hot_mid)
+    dQ = column(op['hot_flow']) * hot_state[1] * (T_hot[:, :-1] - T_hot[:, 1:])
+    q = np.concatenate([np.zeros((len(dQ), 1)), np.cumsum(dQ, axis=1)], axis=1)
+    Q = q[:, -1]
+
+    # Cold stream enthalpy (per unit flow) tabulated over its own temperature range.
+    T_cold_grid = column(op['T_cold_in']) + fraction * column(op['T_cold_out'] - op['T_cold_in'])
+    cold_cp_grid = fluid_state(cold, (T_cold_grid[:, :-1] + T_cold_grid[:, 1:]) / 2)[1]
+    H_cold = np.concatenate([np.zeros((len(dQ), 1)), np.cumsum(cold_cp_grid * np.diff(T_cold_grid, axis=1), axis=1)], axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cold_flow = Q / H_cold[:, -1]
+        H_needed = H_cold[:, -1:] - q / cold_flow[:, None] if config == 'counter-current' else q / cold_flow[:, None]
+    T_cold = _interp_rows(H_needed, H_cold, T_cold_grid)
+    T_cold_mid = (T_cold[:, :-1] + T_cold[:, 1:]) / 2
+    cold_state = fluid_state(cold, T_cold_mid)
+
+    tube, shell = (hot_state, cold_state) if hot_in_tubes else (cold_state, hot_state)
+    tube_flow, shell_flow = (column(op['hot_flow']), cold_flow[:, None]) if hot_in_tubes else (cold_flow[:, None], column(op['hot_flow']))
+    g = {key: np.asarray(value)[:, None] for key, value in geometry.items()}
+    U, valid = local_coefficient(g, mass_velocity(tube_flow, g['tube_area']), mass_velocity(shell_flow, g['shell_area']),
+                                 tube, shell, np.asarray(fouling_factor, dtype=float).reshape(-1, 1) if np.ndim(fouling_factor) else fouling_factor)
+    # Log-mean of the boundary differences of every cell (exact for constant U and Cp within the cell).
+    cell_lmtd, _, valid_lmtd = lmtd_engine('double pipe', 'parallel')(T_hot[:, :-1], T_hot[:, 1:], T_cold[:, :-1], T_cold[:, 1:])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        area = (dQ / (U * cell_lmtd * F[:, None])).sum(axis=1)
+    valid = valid.all(axis=1) & valid_lmtd.all(axis=1) & np.isfinite(area) & (area > 0)
+    return area, Q, cold_flow, valid
+
+
+def segmented_design(geometry:dict[str, np.ndarray], operating:dict[str, np.ndarray], hot, cold,
+                     config:str='counter-current', fouling_factor:np.ndarray=0, hot_in_tubes:bool=True,
+                     tolerance:float=1e-4, segments:int=4, max_segments:int=512)->dict[str, np.ndarray]:
+    """Required area of N units with local properties, film coefficients and U in every cell.
+
+    Row i pairs geometry row i with operating point i, as in
+    `Tools.sweep.evaluate_cases`. The duty is split into cells of equal
+    hot-side temperature step; the cold temperatures at the cell
+    boundaries follow from the cold stream enthalpy, so counter-current
+    flow needs no iteration. The cell count doubles, only for the units
+    that have not converged, until two successive areas agree to
+    `tolerance` (relative); the result is then Richardson-extrapolated
+    (the scheme is second order). Shell-and-tube units use the lumped F
+    factor of their end temperatures in every cell. With `max_segments` not
+    above `segments` every unit is evaluated once, without extrapolation,
+    and none is reported converged.
+
+    Returns:
+        dict[str, np.ndarray]: heat_flow, cold_flow, area, length, U_mean,
+        segments, converged and valid, plus the lumped design (`lumped_area`,
+        properties at the mean stream temperatures) and `area_deviation`,
+        the relative difference of the lumped area from the segmented one.
+    """
+    if config not in ('parallel', 'counter-current'):
+        raise UnsupportedConfiguration(f'Unsupported configuration: {config}')
+    op = {key: np.asarray(operating[key], dtype=float) for key in OPERATING_COLUMNS}
+    n = len(op['hot_flow'])
+    fouling = np.broadcast_to(np.asarray(fouling_factor, dtype=float), (n,))
+    temperatures = (op['T_hot_in'], op['T_hot_out'], op['T_cold_in'], op['T_cold_out'])
+    lumped_lmtd, F, _ = lmtd_engine('pipe and shell', config)(*temperatures)
+    F = np.where(geometry['exchanger_type'] == 'pipe and shell', F, 1.0)
+    lmtd_value = np.where(geometry['exchanger_type'] == 'pipe and shell', lumped_lmtd,
+                          lmtd_engine('double pipe', config)(*temperatures)[0])
+
+    area = np.full(n, np.nan)
+    Q, cold_flow = np.full(n, np.nan), np.full(n, np.nan)
+    valid = np.zeros(n, dtype=bool)
+    used = np.full(n, segments)
+    converged = np.zeros(n, dtype=bool)
+    rows = np.arange(n)
+    subset = lambda columns, rows: {key: value[rows] for key, value in columns.items()}
+    previous, Q_first, cold_first, valid_first = _design_pass(geometry, op, hot, cold, config, fouling, hot_in_tubes, F, segments)
+    if max_segments <= segments:
+        area, Q, cold_flow, valid = previous, Q_first, cold_first, valid_first
+        rows = rows[:0]
+    N = segments
+    while len(rows) and N < max_segments:
+        N *= 2
+        current, Q_rows, cold_rows, valid_rows = _design_pass(
+            subset(geometry, rows), subset(op, rows), _rows(hot, rows), _rows(cold, rows), config, fouling[rows],
+            hot_in_tubes, F[rows], N
+        )
+        done = np.abs(current - previous) <= tolerance * np.abs(current)
+        finished = done | ~valid_rows | (N >= max_segments)
+        target = rows[finished]
+        area[target] = (current + (current - previous) / 3)[finished]
+        Q[target], cold_flow[target] = Q_rows[finished], cold_rows[finished]
+        valid[target], converged[target], used[target] = valid_rows[finished], done[finished] & valid_rows[finished], N
+        rows, previous = rows[~finished], current[~finished]
+
+    hot_mean = fluid_state(hot, (op['T_hot_in'] + op['T_hot_out']) / 2)
+    cold_mean = fluid_state(cold, (op['T_cold_in'] + op['T_cold_out']) / 2)
+    lumped = evaluate_cases(geometry, op, hot_mean, cold_mean, config=config, fouling_factor=fouling, hot_in_tubes=hot_in_tubes)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return dict(heat_flow=Q, cold_flow=cold_flow, area=area, length=area / geometry['linear_surface'],
+                    U_mean=Q / (area * lmtd_value), segments=used, converged=converged, valid=valid,
+                    lumped_area=lumped['area'], area_deviation=lumped['area'] / area - 1)
+
+
+def _rows(fluid, rows:np.ndarray):
+    """Fluid restricted to some units (constant tuples may hold one value per unit)."""
+    if isinstance(fluid, str):
+        return fluid
+    return tuple(value if np.ndim(value) == 0 else np.asarray(value)[rows] for value in fluid)
+
+
+def _cell_duty(U_dA:np.ndarray, delta_T:np.ndarray, s:np.ndarray)->np.ndarray:
+    """Heat of one cell, U*dA*ΔT*(1 - exp(-s))/s, with its limit U*dA*ΔT at s = 0."""
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        factor = np.where(np.abs(s) < 1e-9, 1 - s / 2, -np.expm1(-s) / np.where(s == 0, 1, s))
+    return U_dA * delta_T * factor
+
+
+def _march(geometry:dict, hot, cold, hot_flow, cold_flow, T_hot_in, T_cold_start, UA_scale, counter:bool, segments:int,
+           fouling_factor, hot_in_tubes:bool)->tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """March from the hot inlet: hot outlet, cold temperature at the far end and validity."""
+    G_hot = mass_velocity(hot_flow, geometry['tube_area'] if hot_in_tubes else geometry['shell_area'])
+    G_cold = mass_velocity(cold_flow, geometry['shell_area'] if hot_in_tubes else geometry['tube_area'])
+    G_tube, G_shell = (G_hot, G_cold) if hot_in_tubes else (G_cold, G_hot)
+    dA = UA_scale / segments
+    sign = -1.0 if counter else 1.0
+    T_hot, T_cold = T_hot_in, T_cold_start
+    valid = np.ones(len(T_hot), dtype=bool)
+
+    def step(T_hot_state, T_cold_state):
+        hot_state, cold_state = fluid_state(hot, T_hot_state), fluid_state(cold, T_cold_state)
+        tube, shell = (hot_state, cold_state) if hot_in_tubes else (cold_state, hot_state)
+        U, ok = local_coefficient(geometry, G_tube, G_shell, tube, shell, fouling_factor)
+        C_hot, C_cold = hot_flow * hot_state[1], cold_flow * cold_state[1]
+        dq = _cell_duty(U * dA, T_hot - T_cold, U * dA * (1 / C_hot + sign / C_cold))
+        return dq, C_hot, C_cold, ok
+
+    for _ in range(segments):
+        # Heun step: properties at the cell inlet, then at the predicted cell mean.
+        dq, C_hot, C_cold, _ = step(T_hot, T_cold)
+        dq, C_hot, C_cold, ok = step(T_hot - dq / (2 * C_hot), T_cold + sign * dq / (2 * C_cold))
+        T_hot = T_hot - dq / C_hot
+        T_cold = T_cold + sign * dq / C_cold
+        valid &= ok
+    return T_hot, T_cold, valid
+
+
+def segmented_rating(geometry:dict[str, np.ndarray], hot, cold, hot_flow:np.ndarray, T_hot_in:np.ndarray,
+                     cold_flow:np.ndarray, T_cold_in:np.ndarray, length:np.ndarray, config:str='counter-current',
+                     fouling_factor:np.ndarray=0, hot_in_tubes:bool=True, tolerance:float=1e-3, segments:int=8,
+                     max_segments:int=256, max_iter:int=20)->dict[str, np.ndarray]:
+    """Outlet temperatures of N existing units of a given length (ft), marching cell by cell along the tubes.
+
+    Parallel flow is a single march from the inlets. Counter-current flow
+    does not know the cold temperature at the hot inlet end: it is found
+    by a vectorized secant iteration on the cold inlet mismatch, started
+    from the constant-property ε-NTU rating and, after the first pass,
+    from the previous cell count. The cell count doubles, per unit, until
+    the hot outlet moves by less than `tolerance` °F. Shell-and-tube units
+    scale every cell by the F factor of their latest outlet temperatures.
+
+    Returns:
+        dict[str, np.ndarray]: T_hot_out, T_cold_out, duty (Btu/h), segments, converged and valid.
+    """
+    if config not in ('parallel', 'counter-current'):
+        raise UnsupportedConfiguration(f'Unsupported configuration: {config}')
+    hot_flow, T_hot_in, cold_flow, T_cold_in, length, fouling_factor = np.broadcast_arrays(
+        *(np.asarray(value, dtype=float) for value in (hot_flow, T_hot_in, cold_flow, T_cold_in, length, fouling_factor))
+    )
+    n = len(hot_flow)
+    counter = config == 'counter-current'
+    is_shell = geometry['exchanger_type'] == 'pipe and shell'
+
+    # Constant-property estimate at the inlets: secant start and F factor of the shell-and-tube units.
+    hot_in, cold_in = fluid_state(hot, T_hot_in), fluid_state(cold, T_cold_in)
+    G_hot = mass_velocity(hot_flow, geometry['tube_area'] if hot_in_tubes else geometry['shell_area'])
+    G_cold = mass_velocity(cold_flow, geometry['shell_area'] if hot_in_tubes else geometry['tube_area'])
+    U_in, _ = local_coefficient(geometry, *((G_hot, G_cold) if hot_in_tubes else (G_cold, G_hot)),
+                                *((hot_in, cold_in) if hot_in_tubes else (cold_in, hot_in)), fouling_factor)
+    area = length * geometry['linear_surface']
+    estimate = rate(config, hot_flow, hot_in[1], T_hot_in, cold_flow, cold_in[1], T_cold_in, U_in * area)
+    shell_estimate = rate('pipe and shell', hot_flow, hot_in[1], T_hot_in, cold_flow, cold_in[1], T_cold_in, U_in * area)
+    lmtd_shell = lmtd_engine('pipe and shell', config)
+    F = np.where(is_shell, np.nan_to_num(lmtd_shell(T_hot_in, shell_estimate['T_hot_out'], T_cold_in, shell_estimate['T_cold_out'])[1], nan=1.0), 1.0)
+
+    def solve(rows, N, start):
+        units = {key: value[rows] for key, value in geometry.items()}
+        march = lambda T_cold_start: _march(units, hot, cold, hot_flow[rows], cold_flow[rows], T_hot_in[rows], T_cold_start,
+                                            area[rows] * F[rows], counter, N, fouling_factor[rows], hot_in_tubes)
+        if not counter:
+            return march(T_cold_in[rows])
+        # Secant on the cold outlet x: the cold temperature reached at the far end must be T_cold_in.
+        x0, x1 = start, start + 0.5
+        r0 = march(x0)[1] - T_cold_in[rows]
+        for _ in range(max_iter):
+            T_hot_out, far, valid = march(x1)
+            r1 = far - T_cold_in[rows]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                step = np.where(np.abs(r1 - r0) > 0, r1 * (x1 - x0) / (r1 - r0), 0.0)
+            if np.nanmax(np.abs(r1), initial=0.0) < tolerance * 1e-2:
+                break
+            x0, r0, x1 = x1, r1, x1 - step
+        return T_hot_out, x1, valid & (np.abs(r1) < tolerance)
+
+    shell_F = lambda rows: np.where(is_shell[rows], np.nan_to_num(
+        lmtd_shell(T_hot_in[rows], T_hot_out[rows], T_cold_in[rows], T_cold_out[rows])[1], nan=1.0), 1.0)
+    T_hot_out, T_cold_out, valid = solve(np.arange(n), segments, estimate['T_cold_out'])
+    # Settle F on the coarse cells first (fixed point on the outlet temperatures), then refine.
+    shell_rows = np.flatnonzero(is_shell)
+    for _ in range(max_iter):
+        F_new = shell_F(shell_rows)
+        moving = np.abs(F_new - F[shell_rows]) > 1e-6
+        F[shell_rows] = F_new
+        shell_rows = shell_rows[moving]
+        if not len(shell_rows):
+            break
+        T_hot_out[shell_rows], T_cold_out[shell_rows], valid[shell_rows] = solve(shell_rows, segments, T_cold_out[shell_rows])
+    used = np.full(n, segments)
+    converged = np.zeros(n, dtype=bool)
+    rows, N = np.arange(n), segments
+    while len(rows) and N < max_segments:
+        N *= 2
+        F[rows] = shell_F(rows)
+        T_hot_new, T_cold_new, valid_new = solve(rows, N, T_cold_out[rows])
+        done = (np.abs(T_hot_new - T_hot_out[rows]) < tolerance) | ~valid_new
+        T_hot_out[rows], T_cold_out[rows], valid[rows], used[rows] = T_hot_new, T_cold_new, valid_new, N
+        converged[rows[done]] = valid_new[done]
+        rows = rows[~done]
+    hot_cp = fluid_state(hot, (T_hot_in + T_hot_out) / 2)[1]
+    return dict(T_hot_out=T_hot_out, T_cold_out=T_cold_out, duty=hot_flow * hot_cp * (T_hot_in - T_hot_out),
+                segments=used, converged=converged, valid=valid)
+
+
+def compare_with_lumped(geometry:dict[str, np.ndarray], operating:dict[str, np.ndarray], hot, cold, repeat:int=3,
+                        **kwargs)->dict:
+    """Speed and accuracy of the segmented design against the lumped LMTD design for the same units.
+
+    Returns:
+        dict: units, seconds of both paths, and the mean / max absolute
+        relative area deviation of the lumped design over the valid units.
+    """
+    hot_mean = fluid_state(hot, (np.asarray(operating['T_hot_in']) + np.asarray(operating['T_hot_out'])) / 2)
+    cold_mean = fluid_state(cold, (np.asarray(operating['T_cold_in']) + np.asarray(operating['T_cold_out'])) / 2)
+    timings = {}
+    for name, function in (('segmented', lambda: segmented_design(geometry, operating, hot, cold, **kwargs)),
+                           ('lumped', lambda: evaluate_cases(geometry, operating, hot_mean, cold_mean,
+                                                             **{key: kwargs[key] for key in ('config', 'fouling_factor', 'hot_in_tubes') if key in kwargs}))):
+        best = np.inf
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = function()
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+        if name == 'segmented':
+            segmented = result
+    deviation = np.abs(segmented['area_deviation'][segmented['valid']])
+    return dict(units=len(segmented['area']), segmented_seconds=timings['segmented'], lumped_seconds=timings['lumped'],
+                mean_segments=float(segmented['segments'].mean()), converged=int(segmented['converged'].sum()),
+                mean_area_deviation=float(deviation.mean()) if len(deviation) else np.nan,
+                max_area_deviation=float(deviation.max()) if len(deviation) else np.nan)
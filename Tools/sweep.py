@@ -0,0 +1,150 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import numpy as np
+from Tools.catalog import CATALOG
+from Tools.instrumentation import stage
+from Tools.general import (
+    heat_flow, flow_rate, mass_velocity, reynolds_batch, prandtl_batch, convective_coeff_batch, lmtd_engine
+)
+from Tools.tools import (
+    clean_total_coeff, total_coefficient, calculate_area, calculate_length, numb_forks,
+    corrected_length, friction_factor, Fanning_factor, pressure_drop_4_velocity,
+    inn_and_out_drops, pressure_drop
+)
+
+# Operating-point columns, in the order of the cross product.
+OPERATING_COLUMNS = ('hot_flow', 'T_hot_in', 'T_hot_out', 'T_cold_in', 'T_cold_out')
+
+
+def geometry_columns(exchanger_types:tuple[str, ...]=('double pipe', 'pipe and shell'), **filters)->dict[str, np.ndarray]:
+    """Candidate geometries from the catalog, one column per parameter (diameters in ft, areas in ft^2)."""
+    return CATALOG.select(exchanger_types, **filters)
+
+
+def operating_grid(**ranges:np.ndarray)->dict[str, np.ndarray]:
+    """Full cross product of the operating ranges, one flat column per name in OPERATING_COLUMNS."""
+    grids = np.meshgrid(*(np.atleast_1d(np.asarray(ranges[key], dtype=float)) for key in OPERATING_COLUMNS), indexing='ij')
+    return {key: grid.ravel() for key, grid in zip(OPERATING_COLUMNS, grids)}
+
+
+@stage(degenerate={'invalid_design': lambda result: ~result['valid']})
+def evaluate_designs(geometry:dict[str, np.ndarray], operating:dict[str, np.ndarray], hot:tuple, cold:tuple,
+                     config:str='counter-current', fouling_factor:float=0, fork_length_arm:float=20,
+                     hot_in_tubes:bool=True)->dict[str, np.ndarray]:
+    """Run the design chain for every (geometry, operating point) pair of one batch.
+
+    Args:
+        geometry (dict): Columns from `geometry_columns`, G rows.
+        operating (dict): Columns named as OPERATING_COLUMNS, N rows.
+        hot, cold (tuple): (density lb/ft^3, Cp Btu/lb*°F, viscosity lb/ft*h, conductivity Btu/h*ft*°F).
+        config (str): 'parallel' or 'counter-current'.
+        fouling_factor (float): Fouling factor passed to `total_coefficient`.
+        fork_length_arm (float): Hairpin arm length in ft passed to `numb_forks`.
+        hot_in_tubes (bool): Whether the hot fluid flows inside the tubes.
+
+    Returns:
+        dict[str, np.ndarray]: G*N rows, geometry-major, with a `valid` mask column.
+    """
+    g = {key: value[:, None] for key, value in geometry.items()}
+    op = {key: np.asarray(value, dtype=float)[None, :] for key, value in operating.items()}
+    shape = (len(geometry['size']), len(operating['hot_flow']))
+    return _design_chain(g, op, shape, hot, cold, config, fouling_factor, fork_length_arm, hot_in_tubes)
+
+
+@stage(degenerate={'invalid_design': lambda result: ~result['valid']})
+def evaluate_cases(geometry:dict[str, np.ndarray], operating:dict[str, np.ndarray], hot:tuple, cold:tuple,
+                   config:str='counter-current', fouling_factor:np.ndarray=0, fork_length_arm:np.ndarray=20,
+                   hot_in_tubes:bool=True)->dict[str, np.ndarray]:
+    """Run the design chain for N cases, row i pairing geometry row i with operating point i.
+
+    Same as `evaluate_designs` without the cross product: `hot` and `cold`
+    fluid properties, `fouling_factor` and `fork_length_arm` may also be
+    arrays of N values.
+
+    Returns:
+        dict[str, np.ndarray]: N rows with a `valid` mask column.
+    """
+    op = {key: np.asarray(value, dtype=float) for key, value in operating.items()}
+    shape = (len(geometry['size']),)
+    return _design_chain(geometry, op, shape, hot, cold, config, fouling_factor, fork_length_arm, hot_in_tubes)
+
+
+def _design_chain(g:dict, op:dict, shape:tuple, hot:tuple, cold:tuple, config:str, fouling_factor, fork_length_arm,
+                  hot_in_tubes:bool)->dict[str, np.ndarray]:
+    """Design chain on broadcasting geometry and operating columns, flattened to `shape`."""
+    Q = heat_flow(op['hot_flow'], hot[1], op['T_hot_in'], op['T_hot_out'])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cold_flow = flow_rate(Q, cold[1], op['T_cold_in'], op['T_cold_out'])
+    temperatures = (op['T_hot_in'], op['T_hot_out'], op['T_cold_in'], op['T_cold_out'])
+    is_shell = g['exchanger_type'] == 'pipe and shell'
+    delta_T_log = np.where(is_shell, lmtd_engine('pipe and shell', config)(*temperatures)[0],
+                           lmtd_engine('double pipe', config)(*temperatures)[0])
+
+    tube_fluid, shell_fluid = (hot, cold) if hot_in_tubes else (cold, hot)
+    tube_flow, shell_flow = (op['hot_flow'], cold_flow) if hot_in_tubes else (cold_flow, op['hot_flow'])
+    G_tube = mass_velocity(tube_flow, g['tube_area'])
+    G_shell = mass_velocity(shell_flow, g['shell_area'])
+    Re_tube, valid = reynolds_batch(g['tube_diameter'], G_tube, tube_fluid[2])
+    Re_shell, valid_shell = reynolds_batch(g['shell_diameter'], G_shell, shell_fluid[2])
+    h_i, valid_hi = convective_coeff_batch(Re_tube, prandtl_batch(*tube_fluid[1:])[0], tube_fluid[3], g['tube_diameter'])
+    h_o, valid_ho = convective_coeff_batch(Re_shell, prandtl_batch(*shell_fluid[1:])[0], shell_fluid[3], g['shell_diameter'])
+    h_io = h_i * (g['tube_diameter'] / g['tube_ext_diameter'])
+
+    U_c = clean_total_coeff(h_io, h_o)
+    U_d = total_coefficient(U_c, fouling_factor)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        area = calculate_area(Q, U_d, delta_T_log)
+        length = calculate_length(area, g['linear_surface'])
+        forks = numb_forks(length, fork_length_arm)
+        length_c = corrected_length(forks, 2 * fork_length_arm)
+
+        f_tube = friction_factor(Re_tube)
+        dp_tube = pressure_drop(Fanning_factor(f_tube, G_tube, length_c, tube_fluid[0], g['tube_diameter']), 0, tube_fluid[0])
+        f_shell = friction_factor(reynolds_batch(g['shell_friction_diameter'], G_shell, shell_fluid[2])[0])
+        in_out = inn_and_out_drops(pressure_drop_4_velocity(G_shell, shell_fluid[0]))
+        dp_shell = pressure_drop(
+            Fanning_factor(f_shell, G_shell, length_c, shell_fluid[0], g['shell_friction_diameter']), in_out, shell_fluid[0]
+        )
+    valid = valid & valid_shell & valid_hi & valid_ho & np.isfinite(delta_T_log) & np.isfinite(area) & (area > 0)
+
+    result = {key: _flat(g[key], shape) for key in ('exchanger_type', 'size', 'bwg', 'arrangement')}
+    columns = dict(op, cold_flow=cold_flow, heat_flow=Q, lmtd=delta_T_log, Re_tube=Re_tube, Re_shell=Re_shell,
+                   h_io=h_io, h_o=h_o, U_c=U_c, U_d=U_d, area=area, length=length, forks=forks,
+                   corrected_length=length_c, dp_tube=dp_tube, dp_shell=dp_shell, valid=valid)
+    result.update({key: _flat(value, shape) for key, value in columns.items()})
+    return result
+
+
+def _flat(value, shape:tuple)->np.ndarray:
+    """`value` broadcast to `shape` and flattened (no copy when it already has that shape)."""
+    return (value if np.shape(value) == shape else np.broadcast_to(value, shape)).ravel()
+
+
+def design_sweep(hot:tuple, cold:tuple, hot_flow, T_hot_in, T_hot_out, T_cold_in, T_cold_out,
+                 exchanger_types:tuple[str, ...]=('double pipe', 'pipe and shell'), chunk_size:int=4096,
+                 workers:int|None=None, **kwargs)->dict[str, np.ndarray]:
+    """Evaluate every catalog geometry against the cross product of the operating ranges.
+
+    Operating points are split into chunks of `chunk_size`; each chunk runs the
+    vectorized chain for all geometries at once on a process pool of
+    `workers` processes (all cores by default, 1 to stay in-process).
+    Remaining keyword arguments go to `evaluate_designs`.
+
+    Returns:
+        dict[str, np.ndarray]: One columnar table of designs with a `valid` mask.
+    """
+    geometry = geometry_columns(exchanger_types)
+    operating = operating_grid(hot_flow=hot_flow, T_hot_in=T_hot_in, T_hot_out=T_hot_out,
+                               T_cold_in=T_cold_in, T_cold_out=T_cold_out)
+    n = len(operating['hot_flow'])
+    # An empty grid still runs one (empty) chunk, so the result has every column.
+    chunks = [{key: value[start:start + chunk_size] for key, value in operating.items()} for start in range(0, max(n, 1), chunk_size)]
+    task = partial(evaluate_designs, geometry, hot=hot, cold=cold, **kwargs)
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+    if workers <= 1:
+        parts = list(map(task, chunks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(task, chunks))
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
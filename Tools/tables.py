@@ -56,4 +56,38 @@ pipe_and_shell_pitch_data = {
             "mm": [25, 32, 40, 48]
         }
     }
-}
\ No newline at end of file
+}
+
+# Properties at 1 atm by temperature (°F): density lbm/ft^3, Cp Btu/lbm*°F,
+# viscosity lbm/ft*s and thermal conductivity Btu/h*ft*°F.
+fluid_property_data = {
+    "water": {
+        "T": [32, 40, 50, 60, 70, 80, 90, 100, 120, 140, 160, 180, 200, 212],
+        "density": [62.41, 62.42, 62.41, 62.36, 62.30, 62.22, 62.11, 62.00, 61.71, 61.38, 61.00, 60.58, 60.12, 59.83],
+        "Cp": [1.010, 1.004, 1.001, 0.999, 0.999, 0.998, 0.998, 0.998, 0.998, 0.999, 1.000, 1.002, 1.004, 1.007],
+        "viscosity": [1.204e-3, 1.038e-3, 8.781e-4, 7.536e-4, 6.556e-4, 5.764e-4, 5.117e-4, 4.578e-4, 3.734e-4,
+                      3.123e-4, 2.654e-4, 2.288e-4, 1.997e-4, 1.842e-4],
+        "conductivity": [0.323, 0.326, 0.332, 0.337, 0.342, 0.346, 0.350, 0.354, 0.359, 0.364, 0.368, 0.372, 0.374, 0.375]
+    },
+    "air": {
+        "T": [-100, -50, 0, 32, 50, 100, 150, 200, 250, 300, 400, 500, 600, 800, 1000],
+        "density": [0.11028, 0.096823, 0.086291, 0.080675, 0.077825, 0.070873, 0.06506, 0.060129, 0.055893, 0.052214,
+                    0.04614, 0.041332, 0.037432, 0.031489, 0.027174],
+        "Cp": [0.240, 0.240, 0.240, 0.240, 0.240, 0.240, 0.241, 0.241, 0.241, 0.241, 0.243, 0.245, 0.248, 0.253, 0.259],
+        "viscosity": [8.921e-06, 9.953e-06, 1.093e-05, 1.153e-05, 1.186e-05, 1.275e-05, 1.36e-05, 1.441e-05, 1.52e-05,
+                      1.595e-05, 1.739e-05, 1.874e-05, 2.002e-05, 2.239e-05, 2.456e-05],
+        "conductivity": [0.01035, 0.01175, 0.01311, 0.01395, 0.01441, 0.01567, 0.01689, 0.01807, 0.01921, 0.02031,
+                         0.02243, 0.02443, 0.02634, 0.02989, 0.03317]
+    },
+    "engine oil": {
+        "T": [32.0, 44.3, 62.3, 80.3, 98.3, 116.3, 134.3, 152.3, 170.3, 188.3, 206.3, 224.3, 242.3, 260.3, 278.3, 296.3, 314.3],
+        "density": [56.13, 55.89, 55.56, 55.19, 54.81, 54.42, 54.05, 53.68, 53.31, 52.93, 52.55, 52.19, 51.85, 51.51,
+                    51.12, 50.70, 50.35],
+        "Cp": [0.4290, 0.4364, 0.4462, 0.4560, 0.4660, 0.4760, 0.4861, 0.4958, 0.5059, 0.5161, 0.5269, 0.5374, 0.5479,
+               0.5582, 0.5687, 0.5797, 0.5902],
+        "viscosity": [2.587, 1.458, 0.6713, 0.3266, 0.17, 0.09475, 0.05618, 0.03568, 0.02392, 0.01693, 0.0125, 0.009475,
+                      0.007392, 0.005873, 0.00469, 0.00379, 0.003158],
+        "conductivity": [0.0849, 0.0832, 0.0838, 0.0838, 0.0838, 0.0826, 0.0815, 0.0803, 0.0797, 0.0797, 0.0792, 0.0786,
+                         0.0780, 0.0774, 0.0768, 0.0768, 0.0763]
+    }
+}
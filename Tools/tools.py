@@ -1,10 +1,12 @@
 import numpy as np
-from fractions import Fraction
-from Tools.tables import double_pipe_data, pipe_shell_data, pipe_and_shell_pitch_data
-from Tools.auxiliar import c_prime_shell_and_pipe
+from Tools.tables import pipe_and_shell_pitch_data
+from Tools.catalog import CATALOG
+from Tools.general import UnsupportedConfiguration, _unknown_config
+from Tools.instrumentation import stage, count
 
 
 
+@stage()
 def flow_area(config:str, exchanger_type:str, bwg:int|None = None, pipe_arrangement:str = None)->list[float]:
     """Choice diameters config for heat exchanger as double pipe and pipe and shell.
 
@@ -17,33 +19,20 @@ def flow_area(config:str, exchanger_type:str, bwg:int|None = None, pipe_arrangem
 
     Returns:
         list[float]: Parameteres for the selected exchanger and selected config.
+
+    Raises:
+        ValueError: If the pipe-and-shell BWG or arrangement is not in the catalog.
     """
     if exchanger_type == 'double pipe':
         if config in ['2*1-1/4', '3*2', '4*3']:
-            options = double_pipe_data
-            diameter, int_diameter, ext_diameter, flow_area, lin_surface =  [value if key == 'linear_suf' else value / 12 for key, value in options[config].items()]
-
-            equivalent_diam = (ext_diameter**2 - int_diameter**2) / int_diameter
-            annulus_area = np.pi * (ext_diameter**2 - int_diameter**2) / 4
-            pipe_area = np.pi * diameter**2 / 4
-            return (equivalent_diam, annulus_area, pipe_area)
-        
+            return CATALOG.flow_area(config)
+
     elif exchanger_type == 'pipe and shell':
         if config in ['1/2', '3/4', '1']:
-            options = pipe_shell_data
-            specific_dict =  filter(lambda aux: aux['BWG'] == bwg, options[config])
-            thickness, int_diameter, flow_area, lin_surf = [list(d.values())[1:] for d in specific_dict][0]
-            ext_diameter = float(Fraction(config))
-            pitch = find_pitch(pipe_arrangement, ext_diameter)
-            B:int = 5 # in
-            c_prime = c_prime_shell_and_pipe(pitch, int_diameter, thickness)
-
-            eq_diameter = 4 * (pitch**2 - np.pi * (Fraction(config)**2 / 4)) / np.pi * Fraction(config) if pipe_arrangement == 'square' else \
-            4 * (1/2*pitch*0.86*pitch - 1/2 * np.pi * (Fraction(config)**2 / 4)) / 1/2 * np.pi * Fraction(config) if pipe_arrangement == 'triangle' else None
-            shell_area = 21.25 * c_prime * B / (pitch * 144)
-            pipe_area = (flow_area * 158) / (144 * 4)
-
-            return (thickness, int_diameter, eq_diameter, shell_area, pipe_area, pitch, lin_surf)
+            parameters = CATALOG.flow_area(config, bwg, pipe_arrangement)
+            if parameters is None:
+                raise ValueError(f'No pipe and shell geometry for {config} in, BWG {bwg}, {pipe_arrangement} arrangement.')
+            return parameters
     else:
         return []
 
@@ -62,6 +51,7 @@ def total_coefficient(U_c:float, fouling_factor:float=0)->float:
 
 
     
+@stage()
 def find_pitch(array_type:str, diameter:float, unit:str="in", data:dict=pipe_and_shell_pitch_data)->float:
     """Search the pitch value for a specific array ttpe and pipe diameter.
 
@@ -72,11 +62,19 @@ def find_pitch(array_type:str, diameter:float, unit:str="in", data:dict=pipe_and
         data (dict, optional): Storage data. Defaults to pipe_and_shell_pitch_data.
 
     Returns:
-        float: Pitch value.
+        float: Pitch value, None if the diameter is not tabulated. The default
+        table is served from the precompiled catalog, so float rounding in
+        `diameter` does not miss the entry.
     """
+    if data is pipe_and_shell_pitch_data:
+        pitch = CATALOG.pitch(array_type, diameter, unit)
+        if pitch is None:
+            count('missing_pitch')
+        return pitch
     try:
         diameter_index = data[array_type]["Tube Diameter"][unit].index(diameter)
     except ValueError:
+        count('missing_pitch')
         return None
 
     pitch = data[array_type]["Pitch"][unit][diameter_index]
@@ -84,26 +82,32 @@ def find_pitch(array_type:str, diameter:float, unit:str="in", data:dict=pipe_and
     return pitch
 
 
+@stage()
 def calculate_area(heat_flow:float, U:float, delta_T_log:float)->float:
     """Calculate the required heat exchanger area."""
     return heat_flow / (U * delta_T_log)
 
+@stage()
 def calculate_length(area:float, linear_surface:float)->float:
     """Calculate the required length given area and linear density."""
     return area / linear_surface
 
+@stage()
 def numb_forks(length:float, fork_legth_arm:float=20):
     """Calculate the number of passes based on length and pass length."""
     return np.ceil(length / (fork_legth_arm * 2))
 
+@stage()
 def corrected_length(numbs_fork, total_pass_length=40):
     """Calculate the corrected length based on the number of passes."""
     return numbs_fork * total_pass_length
 
+@stage()
 def corrected_surface(length:float, linear_surface:float)->float:
     """Calculate the corrected surface area."""
     return length * linear_surface
 
+@stage()
 def corrected_desing_coeff(heat_flow:float, area:float, mean_log_T:float)->float:
     """Calculate the corrected desing coefficent.
 
@@ -142,12 +146,16 @@ def pressure_drop(fanning_factor:float, in_out_drop:float, density:float)->float
     """Calculate the pressure drop."""
     return (fanning_factor + in_out_drop) * density / 144
 
+@stage(errors={'unknown_config': _unknown_config})
 def exchanger_efectivity(config:str, C_NTU:float, NTU_value:float)->float:
-    """Calculathe the efectivy by heat exchanger."""
+    """Calculathe the efectivy by heat exchanger.
+
+    Raises:
+        UnsupportedConfiguration (a ValueError): If config is not 'parallel' or 'counter-current'.
+    """
     config = config.lower()
     if config == 'parallel':
         return (1-np.exp(-NTU_value * (1 + C_NTU))) / (1 + C_NTU)
     elif config == 'counter-current':
         return (1-np.exp(-NTU_value * (1 - C_NTU))) / (1 - C_NTU * np.exp(-NTU_value * (1 - C_NTU)))
-    else:
-        print(f'Config not found.')
\ No newline at end of file
+    raise UnsupportedConfiguration(f'Unsupported configuration: {config}')
@@ -0,0 +1,380 @@
+"""Streaming batch runner for exchanger design, rating and cooling tower cases.
+
+    python batch_runner.py design cases.jsonl designs.csv --rejects rejects.jsonl
+    python batch_runner.py rating cases.csv ratings.parquet --chunk-size 100000
+    python batch_runner.py tower weather.csv tower_results/ --set volume_circulation=300
+
+Cases are read from JSONL (one object per line) or CSV (header row) and
+evaluated `--chunk-size` rows at a time with the vectorized paths, so
+memory depends on the chunk size and not on the length of the input.
+Results are appended chunk by chunk to a CSV file, to a Parquet file when
+pyarrow is installed, or else to a directory of `.npz` files, one per
+chunk. Every result row carries the input `line`. Rows that fail
+validation (malformed or missing values, unknown geometry or
+configuration, non-positive Reynolds number, temperature cross, ...) are
+written with their reason to the reject file and the run goes on.
+Throughput is reported on stderr after every chunk.
+
+Columns of every mode (`--set name=value` fills columns missing from the file):
+
+    design: exchanger_type, size, bwg and arrangement (pipe and shell),
+            hot_flow, T_hot_in, T_hot_out, T_cold_in, T_cold_out,
+            hot_/cold_ density, cp, viscosity (lb/ft*h), conductivity,
+            optional config, fouling_factor, fork_length_arm.
+    rating: config, hot_flow, hot_cp, T_hot_in, cold_flow, cold_cp, T_cold_in, UA.
+    tower:  any input of cooling_tower_model.DEFAULT_INPUTS, plus the weather
+            columns of cooling_tower_model.weather_inputs.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+import numpy as np
+from Tools.catalog import CATALOG
+from Tools.rating import RATING_CONFIGS, rate
+from Tools.sweep import OPERATING_COLUMNS, evaluate_cases
+from cooling_tower_model import DEFAULT_INPUTS, OUTPUTS, WEATHER_COLUMNS, cooling_tower_model, weather_inputs
+
+MODES = ('design', 'rating', 'tower')
+FLUID_COLUMNS = tuple(f'{side}_{name}' for side in ('hot', 'cold') for name in ('density', 'cp', 'viscosity', 'conductivity'))
+DESIGN_COLUMNS = OPERATING_COLUMNS + FLUID_COLUMNS
+DESIGN_DEFAULTS = {'config': 'counter-current', 'fouling_factor': 0, 'fork_length_arm': 20}
+RATING_COLUMNS = ('hot_flow', 'hot_cp', 'T_hot_in', 'cold_flow', 'cold_cp', 'T_cold_in', 'UA')
+
+
+def read_cases(path:str, chunk_size:int):
+    """Yield lists of (line, row, raw) with at most `chunk_size` entries; row is None when the line is malformed."""
+    jsonl = path.lower().endswith(('.jsonl', '.ndjson', '.json'))
+    with open(path, newline='') as file:
+        if jsonl:
+            lines = ((number, text) for number, text in enumerate(file, 1) if text.strip())
+        else:
+            reader = csv.reader(file)
+            header = [name.strip() for name in next(reader)]
+            lines = ((reader.line_num, values) for values in reader if values)
+        while True:
+            chunk = list(islice(lines, chunk_size))
+            if not chunk:
+                return
+            if jsonl:
+                yield [(number, _json_row(text), text.strip()) for number, text in chunk]
+            else:
+                yield [(number, dict(zip(header, values)) if len(values) == len(header) else None, ','.join(values))
+                       for number, values in chunk]
+
+
+def _json_row(text:str)->dict|None:
+    try:
+        row = json.loads(text)
+    except ValueError:
+        return None
+    return row if isinstance(row, dict) else None
+
+
+def _numbers(rows:list, name:str, defaults:dict)->tuple[np.ndarray, np.ndarray]:
+    """Float column `name` of the rows and the mask of rows where it is missing or not a number."""
+    values = [row.get(name, defaults.get(name)) if row is not None else None for row in rows]
+    column = _floats([None if value == '' else value for value in values])
+    return column, ~np.isfinite(column)
+
+
+def _floats(values:list)->np.ndarray:
+    """Float array of the values; None and non-numbers become NaN."""
+    try:
+        return np.array(values, dtype=float)
+    except (TypeError, ValueError):
+        return np.array([_number(value) for value in values], dtype=float)
+
+
+def _number(value)->float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _strings(rows:list, name:str, defaults:dict)->np.ndarray:
+    default = defaults.get(name, '')
+    return np.array([str(row.get(name, default) if row is not None else '').strip().lower() for row in rows], dtype=object)
+
+
+class _Rejects:
+    """Reject reasons of one chunk; the first reason recorded for a row wins."""
+
+    def __init__(self, n:int):
+        self.reason = np.full(n, None, dtype=object)
+
+    def add(self, mask:np.ndarray, reason:str):
+        self.reason[np.asarray(mask) & (self.reason == None)] = reason # noqa: E711
+
+    @property
+    def accepted(self)->np.ndarray:
+        return self.reason == None # noqa: E711
+
+
+def _design_chunk(rows:list, defaults:dict, hot_in_tubes:bool=True)->tuple[dict, _Rejects]:
+    n = len(rows)
+    rejects = _Rejects(n)
+    rejects.add(np.array([row is None for row in rows]), 'malformed row')
+    numbers = {}
+    for name in DESIGN_COLUMNS + ('fouling_factor', 'fork_length_arm'):
+        numbers[name], missing = _numbers(rows, name, {**DESIGN_DEFAULTS, **defaults})
+        rejects.add(missing, f'missing or non-numeric {name}')
+    exchanger_type = _strings(rows, 'exchanger_type', defaults)
+    config = _strings(rows, 'config', {**DESIGN_DEFAULTS, **defaults})
+    rejects.add(~np.isin(exchanger_type, ('double pipe', 'pipe and shell')), 'unknown exchanger type')
+    rejects.add(~np.isin(config, ('parallel', 'counter-current')), 'unknown config')
+
+    index = np.zeros(n, dtype=np.intp)
+    known = np.zeros(n, dtype=bool)
+    for i, row in enumerate(rows):
+        if row is None:
+            continue
+        size = str(row.get('size', defaults.get('size', ''))).strip()
+        if exchanger_type[i] == 'pipe and shell':
+            bwg = _number(row.get('bwg', defaults.get('bwg')))
+            arrangement = str(row.get('arrangement', defaults.get('arrangement', ''))).strip().lower()
+            position = CATALOG.index(size, int(bwg), arrangement) if np.isfinite(bwg) and bwg == int(bwg) else None
+        else:
+            position = CATALOG.index(size)
+        if position is not None:
+            index[i], known[i] = position, True
+    rejects.add(~known, 'unknown geometry (size, BWG or arrangement)')
+
+    geometry = {key: column[index] for key, column in CATALOG.columns.items()}
+    results = None
+    for name in ('parallel', 'counter-current'):
+        rows_config = config == name
+        if not rows_config.any():
+            continue
+        part = evaluate_cases(
+            {key: column[rows_config] for key, column in geometry.items()},
+            {key: numbers[key][rows_config] for key in OPERATING_COLUMNS},
+            tuple(numbers[f'hot_{key}'][rows_config] for key in ('density', 'cp', 'viscosity', 'conductivity')),
+            tuple(numbers[f'cold_{key}'][rows_config] for key in ('density', 'cp', 'viscosity', 'conductivity')),
+            config=name, fouling_factor=numbers['fouling_factor'][rows_config],
+            fork_length_arm=numbers['fork_length_arm'][rows_config], hot_in_tubes=hot_in_tubes,
+        )
+        if results is None:
+            results = {key: np.empty(n, dtype=value.dtype) for key, value in part.items()}
+            results['valid'][:] = False
+        for key, value in part.items():
+            results[key][rows_config] = value
+    if results is None:
+        return {}, rejects
+    results['config'] = config
+    rejects.add(~np.isfinite(results['lmtd']), 'temperature cross')
+    rejects.add(~(np.isfinite(results['Re_tube']) & np.isfinite(results['Re_shell'])), 'non-positive Reynolds number')
+    rejects.add(~(np.isfinite(results['h_io']) & np.isfinite(results['h_o'])), 'Reynolds number outside the Nusselt bands')
+    rejects.add(~results.pop('valid'), 'invalid design')
+    return results, rejects
+
+
+def _rating_chunk(rows:list, defaults:dict)->tuple[dict, _Rejects]:
+    rejects = _Rejects(len(rows))
+    rejects.add(np.array([row is None for row in rows]), 'malformed row')
+    numbers = {}
+    for name in RATING_COLUMNS:
+        numbers[name], missing = _numbers(rows, name, defaults)
+        rejects.add(missing, f'missing or non-numeric {name}')
+    config = _strings(rows, 'config', defaults)
+    rejects.add(~np.isin(config, RATING_CONFIGS), 'unknown config')
+    rejects.add(numbers['T_hot_in'] <= numbers['T_cold_in'], 'temperature cross')
+    results = {key: np.full(len(rows), np.nan) for key in ('T_hot_out', 'T_cold_out', 'duty', 'effectiveness', 'NTU')}
+    valid = np.zeros(len(rows), dtype=bool)
+    for name in RATING_CONFIGS:
+        rows_config = config == name
+        if rows_config.any():
+            part = rate(name, *(numbers[key][rows_config] for key in RATING_COLUMNS))
+            valid[rows_config] = part.pop('valid')
+            for key, value in part.items():
+                results[key][rows_config] = value
+    rejects.add(~valid, 'invalid rating (non-positive flow, cp or UA)')
+    return dict(config=config, **{key: numbers[key] for key in RATING_COLUMNS}, **results), rejects
+
+
+TOWER_COLUMNS = (*DEFAULT_INPUTS, *WEATHER_COLUMNS)
+
+
+def _cell(row:dict|None, name:str, defaults:dict):
+    """Cell `name` of the row, else the caller default; None when neither is given."""
+    value = row.get(name) if row is not None else None
+    if value is None or value == '':
+        value = defaults.get(name)
+    return None if value is None or value == '' else value
+
+
+def _tower_chunk(rows:list, defaults:dict)->tuple[dict, _Rejects]:
+    """Tower results of the rows, each evaluated with the columns it gives.
+
+    Rows giving the same columns are evaluated together; columns a row does
+    not give keep their `cooling_tower_model` defaults, as for a single case.
+    """
+    rejects = _Rejects(len(rows))
+    rejects.add(np.array([row is None for row in rows]), 'malformed row')
+    cells = {name: [_cell(row, name, defaults) for row in rows] for name in TOWER_COLUMNS}
+    columns, given = {}, {}
+    for name, values in cells.items():
+        given[name] = np.array([value is not None for value in values], dtype=bool)
+        columns[name] = _floats(values)
+        rejects.add(given[name] & ~np.isfinite(columns[name]), f'non-numeric {name}')
+    humid = given['wet_bulb_temperature'] | given['relative_humidity']
+    rejects.add(given['dry_bulb_temperature'] & ~humid, 'missing wet_bulb_temperature or relative_humidity')
+    results = {name: np.full(len(rows), np.nan) for name in OUTPUTS}
+    signatures = np.stack([given[name] for name in TOWER_COLUMNS], axis=1)
+    for signature in np.unique(signatures[rejects.reason == None], axis=0): # noqa: E711
+        group = np.flatnonzero((signatures == signature).all(axis=1) & (rejects.reason == None)) # noqa: E711
+        inputs = {name: columns[name][group] for name, present in zip(TOWER_COLUMNS, signature) if present}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            part = cooling_tower_model(**weather_inputs(inputs))
+        for name in OUTPUTS:
+            results[name][group] = np.broadcast_to(part[name], group.shape)
+    rejects.add((results['cta'] <= 0) | (results['ctr'] <= 0), 'temperature cross')
+    rejects.add(~np.all([np.isfinite(value) for value in results.values()], axis=0), 'non-finite result')
+    return results, rejects
+
+
+CHUNK_EVALUATORS = {'design': _design_chunk, 'rating': _rating_chunk, 'tower': _tower_chunk}
+
+
+class CsvOutput:
+    def __init__(self, path:str):
+        self._file = open(path, 'w', newline='')
+        self._writer = csv.writer(self._file)
+        self._header = None
+
+    def write(self, columns:dict[str, np.ndarray]):
+        if self._header is None:
+            self._header = list(columns)
+            self._writer.writerow(self._header)
+        self._writer.writerows(zip(*(columns[name].tolist() for name in self._header)))
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetOutput:
+    def __init__(self, path:str):
+        self._path = path
+        self._writer = None
+
+    def write(self, columns:dict[str, np.ndarray]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.table({name: column.tolist() if column.dtype == object else column for name, column in columns.items()})
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self._path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+class NpzOutput:
+    """Directory of `chunk-NNNNNN.npz` files, one per chunk (string columns stored as unicode arrays)."""
+
+    def __init__(self, path:str):
+        os.makedirs(path, exist_ok=True)
+        self._path = path
+        self._count = 0
+
+    def write(self, columns:dict[str, np.ndarray]):
+        arrays = {name: column.astype(str) if column.dtype == object else column for name, column in columns.items()}
+        np.savez(os.path.join(self._path, f'chunk-{self._count:06d}.npz'), **arrays)
+        self._count += 1
+
+    def close(self):
+        pass
+
+
+def open_output(path:str):
+    """Writer for `path`: CSV for .csv, Parquet for .parquet when pyarrow is installed, else a directory of .npz chunks."""
+    if path.lower().endswith('.csv'):
+        return CsvOutput(path)
+    if path.lower().endswith('.parquet'):
+        try:
+            import pyarrow.parquet # noqa: F401
+            return ParquetOutput(path)
+        except ImportError:
+            path = path[:-len('.parquet')]
+            print(f'pyarrow is not installed; writing .npz chunks to {path}/', file=sys.stderr)
+    return NpzOutput(path)
+
+
+def run_batch(mode:str, input_path:str, output_path:str, rejects_path:str|None = None, chunk_size:int=65536,
+              defaults:dict|None = None, report=sys.stderr, **options)->dict:
+    """Stream the cases of `input_path` through one mode and write results and rejects incrementally.
+
+    Args:
+        mode (str): 'design', 'rating' or 'tower'.
+        rejects_path (str): JSONL file of rejected rows (line, reason, raw row);
+        defaults to `<output>.rejects.jsonl`.
+        defaults (dict): Values of columns missing from the input.
+        report: Stream for the progress lines, None to stay silent.
+        options: Passed to the chunk evaluator (`hot_in_tubes` for designs).
+
+    Returns:
+        dict: rows, accepted, rejected, seconds and rows_per_second.
+    """
+    if mode not in CHUNK_EVALUATORS:
+        raise ValueError(f'Unsupported mode: {mode}')
+    evaluate = CHUNK_EVALUATORS[mode]
+    rejects_path = rejects_path or f'{output_path.rstrip(os.sep)}.rejects.jsonl'
+    totals = {'rows': 0, 'accepted': 0, 'rejected': 0}
+    start = time.perf_counter()
+    output = open_output(output_path)
+    try:
+        with open(rejects_path, 'w') as rejects_file:
+            for chunk in read_cases(input_path, chunk_size):
+                lines, rows, raw = zip(*chunk)
+                results, rejects = evaluate(list(rows), defaults or {}, **options)
+                accepted = rejects.accepted
+                if accepted.any():
+                    output.write({'line': np.array(lines)[accepted], **{key: value[accepted] for key, value in results.items()}})
+                for i in np.flatnonzero(~accepted):
+                    rejects_file.write(json.dumps({'line': lines[i], 'reason': rejects.reason[i], 'row': raw[i]}) + '\n')
+                totals['rows'] += len(chunk)
+                totals['accepted'] += int(accepted.sum())
+                totals['rejected'] += int((~accepted).sum())
+                if report is not None:
+                    elapsed = time.perf_counter() - start
+                    print(f"{totals['rows']} rows, {totals['rejected']} rejected, "
+                          f"{totals['rows'] / elapsed:,.0f} rows/s", file=report, flush=True)
+    finally:
+        output.close()
+    totals['seconds'] = time.perf_counter() - start
+    totals['rows_per_second'] = totals['rows'] / totals['seconds'] if totals['seconds'] else np.nan
+    return totals
+
+
+def _assignment(text:str)->tuple[str, object]:
+    name, _, value = text.partition('=')
+    if not name or not _:
+        raise argparse.ArgumentTypeError(f'expected name=value, got {text!r}')
+    return name.strip(), value.strip()
+
+
+def main(argv:list[str]|None = None)->int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('mode', choices=MODES)
+    parser.add_argument('input', help='JSONL (.jsonl/.ndjson) or CSV cases')
+    parser.add_argument('output', help='.csv, .parquet or a directory of .npz chunks')
+    parser.add_argument('--rejects', help='reject file (default: <output>.rejects.jsonl)')
+    parser.add_argument('--chunk-size', type=int, default=65536)
+    parser.add_argument('--set', dest='defaults', type=_assignment, action='append', default=[],
+                        metavar='NAME=VALUE', help='value of a column missing from the input')
+    parser.add_argument('--shell-side-hot', action='store_true', help='designs: hot fluid on the shell side')
+    args = parser.parse_args(argv)
+    options = {'hot_in_tubes': not args.shell_side_hot} if args.mode == 'design' else {}
+    totals = run_batch(args.mode, args.input, args.output, args.rejects, args.chunk_size, dict(args.defaults), **options)
+    print(f"done: {totals['rows']} rows, {totals['accepted']} written, {totals['rejected']} rejected "
+          f"in {totals['seconds']:.2f} s ({totals['rows_per_second']:,.0f} rows/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,318 @@
+"""Benchmarks of the hot paths, with numerical agreement checks.
+
+    python benchmarks.py run --output baseline.json [--quick]
+    python benchmarks.py compare baseline.json current.json [--threshold 0.10]
+
+`run` times every path on a scalar case and on 10k and 1M point batches,
+checks the batch results against the scalar functions and writes the
+timings as JSON. It exits with status 1 when a batch path disagrees with
+the scalar path. It also reports how far the lumped LMTD design is from
+the segmented (variable-property) design. `compare` exits with status 1 when a benchmark present in
+both files got slower per item by more than the threshold.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import warnings
+from fractions import Fraction
+import numpy as np
+from Tools.general import (
+    reynolds, Prandtl, calculate_nusselt, convective_coeff, lmtd, mass_velocity, heat_flow, flow_rate,
+    calculate_nusselt_batch, convective_coeff_batch, lmtd_engine
+)
+from Tools.tools import (
+    flow_area, find_pitch, clean_total_coeff, total_coefficient, calculate_area, calculate_length, numb_forks,
+    corrected_length, friction_factor, Fanning_factor, pressure_drop_4_velocity, inn_and_out_drops, pressure_drop
+)
+from Tools.catalog import CATALOG
+from Tools.tables import double_pipe_data
+from Tools.pinch import area_target, pinch_targets
+from Tools.segmented import compare_with_lumped, segmented_design
+from Tools.sweep import OPERATING_COLUMNS, evaluate_designs
+from cooling_tower_model import cooling_tower, cooling_tower_model
+from merkel import demand_table, merkel_number
+from plant_network import PlantNetwork
+
+SIZES = {'scalar': 1, '10k': 10_000, '1M': 1_000_000}
+# Relative tolerance of the agreement checks: the batch correlations are bit-identical
+# to the scalar ones, the scalar LMTD formula loses digits near ΔT1 == ΔT2 and R == 1.
+RTOL = 1e-12
+TOLERANCES = {'calculate_nusselt': 0.0, 'convective_coeff': 0.0, 'lmtd_pipe_and_shell': 1e-9, 'design_chain_pipe_and_shell': 1e-9, 'design_chain_double_pipe': 1e-9,
+              'segmented_constant_properties': 1e-9, 'merkel_table': 2e-2, 'plant_network_energy_balance': 1e-9}
+OIL = (53.0, 0.5, 7.0, 0.08)
+WATER = (62.3, 1.0, 1.9, 0.36)
+# Printed by cooling-tower.py before it became a model; the model must keep them.
+COOLING_TOWER_REFERENCE = {
+    'mass_water_in_cooling': 320000.0, 'heat_loss_water': 6697600.0, 'volume_required_air': 595008.7807,
+    'mass_air_required': 691468.6585, 'make_up_water': 34.2941, 'drift_losses': 640.0, 'windage_losses': 1600.0,
+    'evaporating_losses': 2880.0, 'blow_down_loss': 2240.0, 'cooling_tower_charact': 0.2384, 'Z': 2,
+    'B': 25.0394, 'fill_volume': 50.0789,
+}
+
+
+def _time(function, repeat:int)->float:
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _relative_error(values, reference)->float:
+    values, reference = np.asarray(values, dtype=float), np.asarray(reference, dtype=float)
+    return float(np.max(np.abs(values - reference) / np.maximum(np.abs(reference), 1e-300), initial=0.0))
+
+
+def _inputs(n:int, seed:int=0)->dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    T_hot_in = rng.uniform(200, 300, n)
+    T_cold_in = rng.uniform(60, 100, n)
+    return dict(
+        Re=10**rng.uniform(0, 5.5, n), Pr=rng.uniform(0.7, 100, n), k=rng.uniform(0.05, 0.4, n), D=rng.uniform(0.05, 0.3, n),
+        hot_flow=rng.uniform(5_000, 50_000, n), T_hot_in=T_hot_in, T_hot_out=T_hot_in - rng.uniform(40, 90, n),
+        T_cold_in=T_cold_in, T_cold_out=T_cold_in + rng.uniform(10, 30, n),
+        wet_bulb=rng.uniform(15, 24, n), volume=rng.uniform(250, 350, n),
+        range=rng.uniform(3, 12, n), approach=rng.uniform(3, 10, n), L_G=rng.uniform(0.5, 1.5, n),
+    )
+
+
+def _units(n:int)->dict[str, np.ndarray]:
+    """n catalog geometries, cycling through the catalog."""
+    rows = np.arange(n) % len(CATALOG.columns['size'])
+    return {key: column[rows] for key, column in CATALOG.columns.items()}
+
+
+# (T_in, T_out, h) of the pinch benchmark utilities: steam at 800 °F and brine from -200 °F.
+PINCH_UTILITIES = ((800.0, 799.0, 1000.0), (-200.0, -180.0, 500.0))
+
+
+def _process_streams(n:int)->tuple[np.ndarray, ...]:
+    """(mass flow, Cp, supply, target, h) of `n` random process streams, half of them hot."""
+    rng = np.random.default_rng(0)
+    hot = rng.random(n) < 0.5
+    supply = rng.uniform(100, 500, n)
+    target = np.where(hot, supply - rng.uniform(20, 200, n), supply + rng.uniform(20, 200, n))
+    return rng.uniform(1e3, 1e5, n), rng.uniform(0.4, 1.0, n), supply, target, rng.uniform(50, 300, n)
+
+
+def _cooling_loop(exchangers:int, wet_bulb:np.ndarray)->PlantNetwork:
+    """Cooling water loop: a tower feeding `exchangers` parallel process coolers, one scenario per wet bulb."""
+    rng = np.random.default_rng(0)
+    network = PlantNetwork()
+    water = 5_000.0 * exchangers
+    network.stream('supply', water)
+    network.stream('return', water)
+    network.splitter('split', 'supply', [network.stream(f'cold_{i}', 5_000.0) for i in range(exchangers)])
+    for i in range(exchangers):
+        process = rng.uniform(2_000, 6_000)
+        network.stream(f'hot_{i}', process, cp=2.1, temperature=rng.uniform(50, 80))
+        network.stream(f'cooled_{i}', process, cp=2.1)
+        network.stream(f'warm_{i}', 5_000.0)
+        network.exchanger(f'E{i}', f'hot_{i}', f'cooled_{i}', f'cold_{i}', f'warm_{i}', UA=rng.uniform(5_000, 15_000))
+    network.mixer('mix', [f'warm_{i}' for i in range(exchangers)], 'return')
+    network.tower('CT', 'return', 'supply', characteristic=1.3, air_flow=water, wet_bulb=wet_bulb)
+    return network
+
+
+def _scalar_chain(geometry_row:int, hot_flow, T_hot_in, T_hot_out, T_cold_in, T_cold_out)->tuple[float, float, float]:
+    """Hand-chained scalar design, as written before the batch API: (area, dp_tube, dp_shell)."""
+    # Only the key comes from the catalog; every geometric value comes from flow_area and the tables.
+    size, exchanger_type, bwg, arrangement = (CATALOG.columns[key][geometry_row].item()
+                                              for key in ('size', 'exchanger_type', 'bwg', 'arrangement'))
+    g = {}
+    if exchanger_type == 'double pipe':
+        equivalent_diam, annulus_area, pipe_area = flow_area(size, exchanger_type)
+        data = double_pipe_data[size]
+        g['tube_diameter'], g['tube_ext_diameter'] = data['D'] / 12, data['DE'] / 12  # in -> ft
+        g['shell_friction_diameter'], g['linear_surface'] = (data['DI'] - data['DE']) / 12, data['linear_suf']
+    else:
+        thickness, int_diameter, eq_diameter, annulus_area, pipe_area, pitch, lin_surf = flow_area(size, exchanger_type, bwg, arrangement)
+        assert pitch == find_pitch(arrangement, float(Fraction(size)))
+        equivalent_diam = float(eq_diameter) / 12  # in -> ft
+        g['tube_diameter'], g['tube_ext_diameter'] = int_diameter / 12, float(Fraction(size)) / 12  # in -> ft
+        g['shell_friction_diameter'], g['linear_surface'] = equivalent_diam, lin_surf
+    Q = heat_flow(hot_flow, OIL[1], T_hot_in, T_hot_out)
+    cold_flow = flow_rate(Q, WATER[1], T_cold_in, T_cold_out)
+    G_tube, G_shell = mass_velocity(hot_flow, pipe_area), mass_velocity(cold_flow, annulus_area)
+    Re_tube = reynolds(g['tube_diameter'], G_tube, OIL[2])
+    Re_shell = reynolds(equivalent_diam, G_shell, WATER[2])
+    h_i = convective_coeff(Re_tube, Prandtl(*OIL[1:]), OIL[3], g['tube_diameter'])
+    h_o = convective_coeff(Re_shell, Prandtl(*WATER[1:]), WATER[3], equivalent_diam)
+    U_d = total_coefficient(clean_total_coeff(h_i * (g['tube_diameter'] / g['tube_ext_diameter']), h_o))
+    area = calculate_area(Q, U_d, lmtd(exchanger_type, 'counter-current', T_hot_in, T_hot_out, T_cold_in, T_cold_out))
+    length = corrected_length(numb_forks(calculate_length(area, g['linear_surface'])))
+    dp_tube = pressure_drop(Fanning_factor(friction_factor(Re_tube), G_tube, length, OIL[0], g['tube_diameter']), 0, OIL[0])
+    Re_friction = reynolds(g['shell_friction_diameter'], G_shell, WATER[2])
+    in_out = inn_and_out_drops(pressure_drop_4_velocity(G_shell, WATER[0]))
+    dp_shell = pressure_drop(
+        Fanning_factor(friction_factor(Re_friction), G_shell, length, WATER[0], g['shell_friction_diameter']), in_out, WATER[0]
+    )
+    return area, dp_tube, dp_shell
+
+
+def benchmarks(sizes:dict[str, int], repeat:int)->tuple[dict, dict]:
+    """Time every hot path at every size. Returns (timings, agreement errors)."""
+    timings, agreement = {}, {}
+    x = _inputs(max(sizes.values()))
+    sample = slice(0, 500)
+    lmtd_shell = lmtd_engine('pipe and shell', 'counter-current')
+    temperatures = lambda n: (x['T_hot_in'][:n], x['T_hot_out'][:n], x['T_cold_in'][:n], x['T_cold_out'][:n])
+    geometry_rows = {'double_pipe': int(CATALOG.index('3*2')), 'pipe_and_shell': int(CATALOG.index('1', 14, 'square'))}
+    keys = [(size, bwg or None, arrangement or None) for size, bwg, arrangement in
+            zip(CATALOG.columns['size'], CATALOG.columns['bwg'], CATALOG.columns['arrangement'])]
+
+    # Loaded (or built) once here, so the merkel_table timings only measure lookups.
+    table = demand_table()
+
+    def record(name, label, n, function):
+        seconds = _time(function, repeat if n < 1_000_000 else 1)
+        timings[f'{name}[{label}]'] = {'n': n, 'seconds': seconds, 'per_item': seconds / n}
+
+    for label, n in sizes.items():
+        if n == 1:
+            record('calculate_nusselt', label, n, lambda: calculate_nusselt(x['Re'][0], x['Pr'][0]))
+            record('convective_coeff', label, n, lambda: convective_coeff(x['Re'][0], x['Pr'][0], x['k'][0], x['D'][0]))
+            record('lmtd_pipe_and_shell', label, n, lambda: lmtd('pipe and shell', 'counter-current', *(T[0] for T in temperatures(1))))
+            record('flow_area', label, n, lambda: flow_area('1', 'pipe and shell', 14, 'square'))
+            record('find_pitch', label, n, lambda: find_pitch('square', 1))
+            for chain, row in geometry_rows.items():
+                record(f'design_chain_{chain}', label, n, lambda row=row: _scalar_chain(row, *(x[key][0] for key in
+                       ('hot_flow', 'T_hot_in', 'T_hot_out', 'T_cold_in', 'T_cold_out'))))
+            record('cooling_tower', label, n, cooling_tower)
+            continue
+        record('calculate_nusselt', label, n, lambda: calculate_nusselt_batch(x['Re'][:n], x['Pr'][:n]))
+        record('convective_coeff', label, n, lambda: convective_coeff_batch(x['Re'][:n], x['Pr'][:n], x['k'][:n], x['D'][:n]))
+        record('lmtd_pipe_and_shell', label, n, lambda: lmtd_shell(*temperatures(n)))
+        record('flow_area', label, n, lambda: [flow_area(size, 'pipe and shell' if bwg else 'double pipe', bwg, arrangement)
+                                              for size, bwg, arrangement in (keys[i % len(keys)] for i in range(n))])
+        record('find_pitch', label, n, lambda: [find_pitch('square', 0.75 + 0.25 * (i % 4)) for i in range(n)])
+        operating = {key: x[key][:n] for key in ('hot_flow', 'T_hot_in', 'T_hot_out', 'T_cold_in', 'T_cold_out')}
+        for chain, row in geometry_rows.items():
+            geometry = {key: column[row:row + 1] for key, column in CATALOG.columns.items()}
+            record(f'design_chain_{chain}', label, n, lambda geometry=geometry: evaluate_designs(geometry, operating, OIL, WATER))
+        record('cooling_tower', label, n, lambda: cooling_tower_model(wet_bulb_temperature=x['wet_bulb'][:n],
+                                                                      volume_circulation=x['volume'][:n]))
+        tower = (x['range'][:n], x['approach'][:n], x['wet_bulb'][:n], x['L_G'][:n])
+        record('merkel_table', label, n, lambda: table(*tower))
+        if n < 1_000_000:
+            record('merkel_integration', label, n, lambda: merkel_number(*tower))
+            units = _units(n)
+            record('segmented_design', label, n, lambda: segmented_design(units, operating, 'engine oil', 'water'))
+        if n <= 10_000:
+            network = _cooling_loop(100, x['wet_bulb'][:n])
+            record('plant_network_100_exchangers', label, n, network.solve)
+
+    # A ΔTmin sweep of 100 values over 500 streams, with area targets and catalog sizes.
+    mass_flow, Cp, supply, target, h = _process_streams(500)
+    record('pinch_targets', '500_streams', 100, lambda: pinch_targets(mass_flow, Cp, supply, target, np.linspace(2, 60, 100),
+                                                                      h, *PINCH_UTILITIES))
+
+    # Agreement of the batch paths with the scalar functions.
+    Nu, _ = calculate_nusselt_batch(x['Re'][sample], x['Pr'][sample])
+    agreement['calculate_nusselt'] = _relative_error(Nu, [calculate_nusselt(a, b) for a, b in zip(x['Re'][sample], x['Pr'][sample])])
+    h, _ = convective_coeff_batch(x['Re'][sample], x['Pr'][sample], x['k'][sample], x['D'][sample])
+    agreement['convective_coeff'] = _relative_error(h, [convective_coeff(*args) for args in
+                                                        zip(x['Re'][sample], x['Pr'][sample], x['k'][sample], x['D'][sample])])
+    T = [T[sample] for T in temperatures(None)]
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        agreement['lmtd_pipe_and_shell'] = _relative_error(
+            lmtd_shell(*T)[0], [lmtd('pipe and shell', 'counter-current', *args) for args in zip(*T)]
+        )
+    operating = {key: x[key][sample] for key in ('hot_flow', 'T_hot_in', 'T_hot_out', 'T_cold_in', 'T_cold_out')}
+    for chain, row in geometry_rows.items():
+        geometry = {key: column[row:row + 1] for key, column in CATALOG.columns.items()}
+        batch = evaluate_designs(geometry, operating, OIL, WATER)
+        scalar = np.array([_scalar_chain(row, *args) for args in zip(*operating.values())])
+        agreement[f'design_chain_{chain}'] = max(_relative_error(batch[key], scalar[:, i])
+                                                 for i, key in enumerate(('area', 'dp_tube', 'dp_shell')))
+    # The demand table interpolates: it must stay within 2% of the integral on ordinary towers.
+    tower = (x['range'][sample], x['approach'][sample], x['wet_bulb'][sample], x['L_G'][sample])
+    feasible = np.isfinite(merkel_number(*tower))
+    agreement['merkel_table'] = _relative_error(demand_table()(*tower)[feasible], merkel_number(*tower)[feasible])
+    # The tower must reject what the exchangers picked up.
+    loop = _cooling_loop(100, x['wet_bulb'][sample]).solve()
+    picked_up = sum(duty for name, duty in loop['duties'].items() if name.startswith('E'))
+    agreement['plant_network_energy_balance'] = _relative_error(picked_up, loop['duties']['CT'])
+    # One hot and one cold stream in balance: the area target is a single counter-current exchanger.
+    area = area_target([1000.0, 2000.0], 1.0, [200.0, 60.0], [100.0, 110.0], [50.0, 80.0], 10)
+    agreement['pinch_single_match_area'] = _relative_error(
+        area, 1e5 * (1 / 50 + 1 / 80) / lmtd('double pipe', 'counter-current', 200, 100, 60, 110)
+    )
+    # With constant properties every cell has the same U, so the cells must add up to the lumped area.
+    segmented = segmented_design(_units(500), operating, OIL, WATER)
+    agreement['segmented_constant_properties'] = _relative_error(segmented['area'], segmented['lumped_area'])
+    results = cooling_tower()
+    agreement['cooling_tower'] = max(
+        max(abs(results[key] - value) - 0.5e-4, 0) / abs(value) for key, value in COOLING_TOWER_REFERENCE.items()
+    )
+    batch = cooling_tower_model(wet_bulb_temperature=x['wet_bulb'][sample], volume_circulation=x['volume'][sample])
+    agreement['cooling_tower_batch'] = max(_relative_error(
+        batch[key], [cooling_tower_model(wet_bulb_temperature=wb, volume_circulation=v)[key]
+                     for wb, v in zip(x['wet_bulb'][sample], x['volume'][sample])]
+    ) for key in ('make_up_water', 'blow_down_loss', 'fill_volume'))
+    return timings, agreement
+
+
+def run(args)->int:
+    sizes = {label: n for label, n in SIZES.items() if not (args.quick and n >= 1_000_000)}
+    timings, agreement = benchmarks(sizes, args.repeat)
+    failed = sorted(name for name, error in agreement.items() if not error <= TOLERANCES.get(name, RTOL))
+    report = {
+        'meta': {'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.machine(),
+                 'platform': platform.platform(), 'timestamp': time.time()},
+        'timings': timings,
+        'agreement': agreement,
+        # Variable properties: how far the lumped LMTD design is from the segmented one.
+        'segmented_vs_lumped': compare_with_lumped(_units(2_000), {key: value for key, value in _inputs(2_000, seed=1).items() if key in OPERATING_COLUMNS},
+                                                   'engine oil', 'water', repeat=args.repeat),
+    }
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    for name, timing in timings.items():
+        print(f"{name:45s} {timing['seconds'] * 1e3:12.4f} ms {timing['per_item'] * 1e9:12.1f} ns/item")
+    accuracy = report['segmented_vs_lumped']
+    print(f"segmented vs lumped: {accuracy['units']} units, {accuracy['mean_segments']:.1f} cells on average, "
+          f"area deviation mean {accuracy['mean_area_deviation']:.2%} max {accuracy['max_area_deviation']:.2%}, "
+          f"{accuracy['segmented_seconds'] / accuracy['lumped_seconds']:.0f}x the lumped time")
+    for name in failed:
+        print(f'DISAGREEMENT {name}: relative error {agreement[name]:.3e} > {TOLERANCES.get(name, RTOL):.0e}')
+    return 1 if failed else 0
+
+
+def compare(args)->int:
+    with open(args.baseline) as file:
+        baseline = json.load(file)['timings']
+    with open(args.current) as file:
+        current = json.load(file)['timings']
+    regressions = 0
+    for name in sorted(set(baseline) & set(current)):
+        ratio = current[name]['per_item'] / baseline[name]['per_item']
+        regressed = ratio > 1 + args.threshold
+        regressions += regressed
+        print(f"{name:45s} {ratio:8.3f}x {'REGRESSION' if regressed else ''}")
+    return 1 if regressions else 0
+
+
+def main(argv:list[str]|None = None)->int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='Time the hot paths and write a JSON baseline.')
+    run_parser.add_argument('--output', default='bench_output.json')
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--quick', action='store_true', help='Skip the 1M point batches.')
+    run_parser.set_defaults(handler=run)
+    compare_parser = commands.add_parser('compare', help='Fail when a benchmark regressed.')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10, help='Allowed slowdown, 0.10 = 10%%.')
+    compare_parser.set_defaults(handler=compare)
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Client of the resident calculation server (`calc_daemon.py`).
+
+    with CalcClient('/tmp/heat-exchanger.sock') as client:
+        tower = client.tower(wet_bulb_temperature=22)
+        designs = client.design([case_1, case_2])
+"""
+import itertools
+import json
+import socket
+
+
+class CalcError(RuntimeError):
+    """Error reported by the server for one request."""
+
+
+class CalcClient:
+    """Persistent connection to a `calc_daemon.py` server. Not shared between threads; open one per thread."""
+
+    def __init__(self, path:str, timeout:float|None = 30):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(path)
+        self._file = self._socket.makefile('rb')
+        self._ids = itertools.count(1)
+        self._waiting = {}
+
+    def call(self, method:str, params=None):
+        """Send one request and wait for its result.
+
+        Raises:
+            CalcError: If the server could not answer the request.
+        """
+        return self.call_many([(method, params)])[0]
+
+    def call_many(self, requests:list[tuple[str, object]])->list:
+        """Pipeline several (method, params) requests on the connection and return their results in order."""
+        ids = [next(self._ids) for _ in requests]
+        payload = b''.join(json.dumps({'id': request_id, 'method': method, 'params': params},
+                                      separators=(',', ':')).encode() + b'\n'
+                           for request_id, (method, params) in zip(ids, requests))
+        self._socket.sendall(payload)
+        return [self._result(request_id) for request_id in ids]
+
+    def _result(self, request_id:int):
+        while request_id not in self._waiting:
+            line = self._file.readline()
+            if not line:
+                raise ConnectionError('Server closed the connection.')
+            response = json.loads(line)
+            self._waiting[response.get('id')] = response
+        response = self._waiting.pop(request_id)
+        if 'error' in response:
+            raise CalcError(response['error'])
+        return response['result']
+
+    def design(self, cases=None, **case):
+        """Design one case (keyword columns) or a list of cases."""
+        return self.call('design', case if cases is None else cases)
+
+    def rating(self, cases=None, **case):
+        """Rate one case (keyword columns) or a list of cases."""
+        return self.call('rating', case if cases is None else cases)
+
+    def tower(self, cases=None, **case):
+        """Cooling tower results of one case (keyword inputs) or a list of cases."""
+        return self.call('tower', case if cases is None else cases)
+
+    def optimal_design(self, **params)->dict:
+        return self.call('optimal_design', params)
+
+    def ping(self)->bool:
+        return self.call('ping') == 'pong'
+
+    def stats(self)->dict:
+        return self.call('stats')
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
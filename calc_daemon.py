@@ -0,0 +1,182 @@
+"""Resident calculation server over a Unix domain socket.
+
+    python calc_daemon.py /tmp/heat-exchanger.sock [--workers 8]
+
+The server imports the models, builds the geometry catalog and warms every
+path once at start-up, then answers requests until it is stopped. The
+protocol is one JSON object per line in each direction:
+
+    {"id": 1, "method": "design", "params": {...}}
+    {"id": 1, "result": ...}            or  {"id": 1, "error": "..."}
+
+Methods:
+
+    design, rating, tower   params is one case (a dict of the columns of
+                            `batch_runner.py`) or a list of cases; the
+                            result is, per case, a dict of outputs or
+                            {"rejected": reason}.
+    optimal_design          keyword arguments of Tools.optimize.optimal_design.
+    ping, stats             liveness and request/cache counters.
+    metrics                 Tools.instrumentation records as Prometheus text
+                            (start with HEAT_EXCHANGER_INSTRUMENTATION=1).
+
+Requests of one connection may be pipelined. They are answered by a shared
+pool of worker threads, possibly out of order, so clients match responses
+by `id`. Results of single cases are memoized in a `ResultCache`.
+`calc_client.py` is the client library.
+"""
+import argparse
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from batch_runner import CHUNK_EVALUATORS
+from Tools.cache import ResultCache
+from Tools.instrumentation import to_prometheus
+from Tools.optimize import optimal_design
+
+
+def _plain(value):
+    """JSON-ready copy of a result: NumPy scalars and arrays become Python numbers and lists, NaN becomes None."""
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_plain(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+class CalcServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server answering JSON calculation requests from a worker pool."""
+
+    daemon_threads = True
+
+    def __init__(self, path:str, workers:int|None = None, cache_size:int=4096):
+        if os.path.exists(path):
+            os.unlink(path)
+        self.path = path
+        self.pool = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+        # Keys keep 12 significant digits: near-identical cases must not share a result.
+        self.cache = ResultCache(maxsize=cache_size, digits=12)
+        self.started = time.time()
+        self.counts = {'requests': 0, 'errors': 0}
+        self._counts_lock = threading.Lock()
+        self.methods = {
+            'design': self._cases('design'),
+            'rating': self._cases('rating'),
+            'tower': self._cases('tower'),
+            'optimal_design': self._optimal_design,
+            'ping': lambda params: 'pong',
+            'stats': self._stats,
+            'metrics': lambda params: to_prometheus(),
+        }
+        self.warm_up()
+        super().__init__(path, _Connection)
+
+    def warm_up(self):
+        """Run every case path once so the first real request pays no lazy set-up."""
+        for mode, evaluate in CHUNK_EVALUATORS.items():
+            evaluate([{}], {})
+
+    def handle_request_line(self, line:bytes)->dict:
+        """Answer one request line; errors are returned, never raised."""
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            method = self.methods.get(request.get('method'))
+            if method is None:
+                raise ValueError(f"Unsupported method: {request.get('method')}")
+            response = {'id': request_id, 'result': method(request.get('params') or {})}
+        except Exception as error:
+            with self._counts_lock:
+                self.counts['errors'] += 1
+            response = {'id': request_id, 'error': f'{type(error).__name__}: {error}'}
+        with self._counts_lock:
+            self.counts['requests'] += 1
+        return response
+
+    # Every method returns JSON-ready values, so memoized results need no conversion.
+
+    def _cases(self, mode:str):
+        evaluate = CHUNK_EVALUATORS[mode]
+
+        def method(params):
+            if isinstance(params, dict):
+                return self.cache.get_or_compute({'case': params}, lambda case: self._evaluate(evaluate, [case])[0], mode)
+            return self._evaluate(evaluate, list(params))
+        return method
+
+    @staticmethod
+    def _evaluate(evaluate, rows:list)->list[dict]:
+        results, rejects = evaluate(rows, {})
+        answers = []
+        for i, reason in enumerate(rejects.reason):
+            if reason is None:
+                answers.append(_plain({key: value[i] for key, value in results.items()}))
+            else:
+                answers.append({'rejected': reason})
+        return answers
+
+    def _optimal_design(self, params:dict)->dict:
+        params = dict(params)
+        for key in ('hot', 'cold', 'fork_length_arms', 'exchanger_types'):
+            if key in params:
+                params[key] = tuple(params[key])
+        return self.cache.get_or_compute(params, lambda **inputs: _plain(optimal_design(**inputs)), 'optimal_design')
+
+    def _stats(self, params:dict)->dict:
+        return dict(self.counts, uptime=time.time() - self.started, cache=dict(self.cache.stats, size=len(self.cache)))
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class _Connection(socketserver.StreamRequestHandler):
+    """One client connection: requests go to the server pool, responses are written as they complete."""
+
+    def handle(self):
+        lock = threading.Lock()
+
+        def answer(line:bytes):
+            data = json.dumps(self.server.handle_request_line(line), separators=(',', ':')).encode() + b'\n'
+            with lock:
+                self.wfile.write(data)
+                self.wfile.flush()
+
+        pending = []
+        for line in self.rfile:
+            if line.strip():
+                pending = [future for future in pending if not future.done()]
+                pending.append(self.server.pool.submit(answer, line))
+        for future in pending:
+            future.exception()
+
+
+def main(argv:list[str]|None = None)->int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('socket', help='path of the Unix socket')
+    parser.add_argument('--workers', type=int, help='worker threads (default: one per core)')
+    parser.add_argument('--cache-size', type=int, default=4096, help='memoized single-case results')
+    args = parser.parse_args(argv)
+    with CalcServer(args.socket, args.workers, args.cache_size) as server:
+        print(f'listening on {args.socket}', file=sys.stderr, flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
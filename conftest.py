@@ -0,0 +1 @@
+# Makes the flat modules and the Tools/ package importable from tests/.
@@ -0,0 +1,290 @@
+import csv
+import inspect
+from itertools import islice
+import numpy as np
+from merkel import tower_characteristic
+from psychrometrics import tower_air_inputs
+from Tools.graph import ModelGraph
+from Tools.instrumentation import stage
+from specs_cooling_tower import (
+    Water, Air, Technical, CaseBatch,
+    blow_down_losses, tower_dimensions
+)
+
+# Inputs of `cooling_tower_model`, with the defaults of the spec dataclasses.
+_water, _air, _technical = Water(), Air(), Technical()
+DEFAULT_INPUTS = {
+    'volume_circulation': _water.volume_circulation, # m3/h
+    'water_inlet_temperature': _water.inlet_temperature, # °C
+    'water_outlet_temperature': _water.outlet_temperature, # °C
+    'mass_density': _water.mass_density, # kg/m3
+    'heat_capacity_isobaric': _water.heat_capacity_isobaric, # kJ/kg*°C
+    'air_inlet_temperature': _air.inlet_temperature, # °C
+    'air_inlet_enthalpy': _air.intlet_enthalpy, # kJ/kg
+    'air_outlet_enthalpy': _air.outlet_enthalpy, # kJ/kg
+    'air_inlet_specific_humidity': _air.inlet_specific_humidity,
+    'air_outlet_specific_humidity': _air.outlet_specific_humidity,
+    'air_inlet_specific_volume': _air.inlet_specific_volume, # m3/kg
+    'air_outlet_specific_volume': _air.outlet_specific_volume, # m3/kg
+    'wet_bulb_temperature': _technical.wet_bulb_temperature, # °C
+    'allowable_evaporating_losses': _technical.allowable_evaporating_losses,
+    'air_flow_rate': 100, # lb/h
+    'L': 3.55, # water loading passed to tower_dimensions
+}
+del _water, _air, _technical
+
+_CHARACT_MEAN = np.mean([0.0909, 0.08696, 0.08333, 0.08, 0.0667, 0.06897])
+
+# Every derived quantity, as a function of the inputs and quantities named by
+# its parameters, in evaluation order.
+NODES = {
+    'cta': lambda water_outlet_temperature, wet_bulb_temperature: water_outlet_temperature - wet_bulb_temperature,
+    'ctr': lambda water_inlet_temperature, water_outlet_temperature: water_inlet_temperature - water_outlet_temperature,
+    'mass_water_in_cooling': lambda volume_circulation, mass_density: volume_circulation * mass_density,
+    'heat_loss_water': lambda mass_water_in_cooling, heat_capacity_isobaric, ctr: (
+        mass_water_in_cooling * heat_capacity_isobaric * ctr
+    ),
+    'volume_required_air': lambda heat_loss_water, air_inlet_specific_volume, air_outlet_enthalpy, air_inlet_enthalpy,
+                                  air_outlet_specific_humidity, air_inlet_specific_humidity, heat_capacity_isobaric,
+                                  air_inlet_temperature: (heat_loss_water * air_inlet_specific_volume) / (
+        (air_outlet_enthalpy - air_inlet_enthalpy) -
+        (air_outlet_specific_humidity - air_inlet_specific_humidity) * heat_capacity_isobaric * air_inlet_temperature
+    ),
+    'mass_air_required': lambda volume_required_air, air_inlet_specific_volume: volume_required_air / air_inlet_specific_volume,
+    'make_up_water': lambda volume_required_air, air_outlet_specific_humidity, air_inlet_specific_humidity,
+                            air_outlet_specific_volume, allowable_evaporating_losses: (
+        ((volume_required_air * (air_outlet_specific_humidity - air_inlet_specific_humidity)) /
+         air_outlet_specific_volume) * (1 + allowable_evaporating_losses)
+    ) / 60, # h to min
+    'effectiveness_cooling_tower': lambda ctr, cta: ctr / (cta + ctr),
+    # Losses in cooling tower:
+    'drift_losses': lambda mass_water_in_cooling: 0.2 * mass_water_in_cooling / 100,
+    'windage_losses': lambda mass_water_in_cooling: 0.005 * mass_water_in_cooling,
+    'evaporating_losses': lambda mass_water_in_cooling, water_inlet_temperature, water_outlet_temperature: (
+        0.01 * mass_water_in_cooling * (((water_inlet_temperature * (9 / 5)) + 32) - ((water_outlet_temperature * (9 / 5)) + 32))
+    ) / 10,
+    'blow_down_loss': lambda windage_losses, evaporating_losses, drift_losses: (
+        blow_down_losses(windage_losses, evaporating_losses, drift_losses)
+    ),
+    # Structural design:
+    'cooling_tower_charact': lambda cta: cta * _CHARACT_MEAN,
+    'dimensions': lambda cooling_tower_charact, L, air_flow_rate: tower_dimensions(cooling_tower_charact, L, air_flow_rate),
+    'Z': lambda dimensions: dimensions[0],
+    'B': lambda dimensions: dimensions[1],
+    'fill_volume': lambda dimensions: dimensions[2],
+}
+# Same model with the fill sized from the Merkel number KaV/L of the demand-curve table
+# (range, approach, wet bulb and the water/air mass ratio) instead of the fixed mean.
+MERKEL_NODES = {
+    **NODES,
+    'cooling_tower_charact': lambda ctr, cta, wet_bulb_temperature, mass_water_in_cooling, mass_air_required: (
+        tower_characteristic(ctr, cta, wet_bulb_temperature, mass_water_in_cooling / mass_air_required)
+    ),
+}
+CHARACTERISTICS = {'legacy': NODES, 'merkel': MERKEL_NODES}
+_NODE_DEPENDENCIES = {
+    name: {node: tuple(inspect.signature(function).parameters) for node, function in nodes.items()}
+    for name, nodes in CHARACTERISTICS.items()
+}
+
+OUTPUTS = (
+    'cta', 'ctr', 'mass_water_in_cooling', 'heat_loss_water', 'volume_required_air', 'mass_air_required',
+    'make_up_water', 'effectiveness_cooling_tower', 'drift_losses', 'windage_losses', 'evaporating_losses',
+    'blow_down_loss', 'cooling_tower_charact', 'Z', 'B', 'fill_volume',
+)
+
+
+@stage(degenerate={'tower_temperature_cross': lambda results: np.asarray(results['cta']) <= 0})
+def cooling_tower_model(cases:CaseBatch|dict|None = None, characteristic:str='legacy', **inputs)->dict:
+    """Cooling tower balance, losses and fill dimensions.
+
+    Every input of DEFAULT_INPUTS may be given as a scalar or an array;
+    arrays broadcast against each other and missing inputs take their
+    default. `cases` supplies inputs as columns of a CaseBatch or a dict
+    of arrays; keyword inputs override its columns. Scalar inputs
+    reproduce `cooling-tower.py` exactly. `characteristic='merkel'` takes
+    `cooling_tower_charact` from the Merkel demand curves (merkel.py)
+    instead of the fixed mean, and sizes the fill from it.
+
+    Returns:
+        dict: One entry per name in OUTPUTS.
+    """
+    if cases is not None:
+        columns = cases.columns() if isinstance(cases, CaseBatch) else cases
+        inputs = {**columns, **inputs}
+    unknown = set(inputs) - set(DEFAULT_INPUTS)
+    if unknown:
+        raise ValueError(f'Unknown cooling tower inputs: {sorted(unknown)}')
+    if characteristic not in CHARACTERISTICS:
+        raise ValueError(f'Unsupported characteristic: {characteristic}')
+    values = {**DEFAULT_INPUTS, **inputs}
+    dependencies = _NODE_DEPENDENCIES[characteristic]
+    for name, function in CHARACTERISTICS[characteristic].items():
+        values[name] = function(*(values[dependency] for dependency in dependencies[name]))
+    return {name: values[name] for name in OUTPUTS}
+
+
+def cooling_tower_graph(characteristic:str='legacy', **inputs)->ModelGraph:
+    """Lazy graph of the tower quantities for interactive what-if studies.
+
+    `graph['wet_bulb_temperature'] = 23` drops only the quantities
+    downstream of the wet bulb; `graph.affected('wet_bulb_temperature')`
+    lists them.
+    """
+    unknown = set(inputs) - set(DEFAULT_INPUTS)
+    if unknown:
+        raise ValueError(f'Unknown cooling tower inputs: {sorted(unknown)}')
+    if characteristic not in CHARACTERISTICS:
+        raise ValueError(f'Unsupported characteristic: {characteristic}')
+    return ModelGraph({**DEFAULT_INPUTS, **inputs}, CHARACTERISTICS[characteristic])
+
+
+def spec_inputs(water:Water, air:Air, technical:Technical)->dict:
+    """Model inputs of one case from spec objects (`Water`/`WaterSpec`, `Air`/`AirSpec`, `Technical`/`TechnicalSpec`)."""
+    return {
+        'volume_circulation': water.volume_circulation,
+        'water_inlet_temperature': water.inlet_temperature,
+        'water_outlet_temperature': water.outlet_temperature,
+        'mass_density': water.mass_density,
+        'heat_capacity_isobaric': water.heat_capacity_isobaric,
+        'air_inlet_temperature': air.inlet_temperature,
+        'air_inlet_enthalpy': air.intlet_enthalpy,
+        'air_outlet_enthalpy': air.outlet_enthalpy,
+        'air_inlet_specific_humidity': air.inlet_specific_humidity,
+        'air_outlet_specific_humidity': air.outlet_specific_humidity,
+        'air_inlet_specific_volume': air.inlet_specific_volume,
+        'air_outlet_specific_volume': air.outlet_specific_volume,
+        'wet_bulb_temperature': technical.wet_bulb_temperature,
+        'allowable_evaporating_losses': technical.allowable_evaporating_losses,
+    }
+
+
+def cooling_tower(water:Water=None, air:Air=None, technical:Technical=None, air_flow_rate:float=100, L:float=3.55,
+                  characteristic:str='legacy')->dict:
+    """Run `cooling_tower_model` from spec objects (defaults when omitted)."""
+    water, air, technical = water or Water(), air or Air(), technical or Technical()
+    return cooling_tower_model(**spec_inputs(water, air, technical), air_flow_rate=air_flow_rate, L=L, characteristic=characteristic)
+
+
+def cases_from_specs(specs, **columns)->CaseBatch:
+    """CaseBatch with every model input, from (water, air, technical) triples plus extra input columns."""
+    rows = [spec_inputs(*spec) for spec in specs]
+    data = {name: [row[name] for row in rows] for name in rows[0]} if rows else {}
+    return CaseBatch({**{name: np.broadcast_to(DEFAULT_INPUTS[name], (len(rows),)) for name in DEFAULT_INPUTS},
+                      **data, **columns})
+
+
+def weather_inputs(columns:dict[str, np.ndarray], defaults:dict|None = None)->dict[str, np.ndarray]:
+    """Map weather/load columns to model inputs.
+
+    Columns named like DEFAULT_INPUTS are passed through. A `heat_load`
+    column (kJ/h) sets the water inlet temperature from the outlet
+    temperature, flow and heat capacity. A `dry_bulb_temperature` column
+    (°C), with `wet_bulb_temperature` or `relative_humidity` (0-1), replaces
+    the air state inputs through `psychrometrics.tower_air_inputs`. Other
+    columns are ignored.
+    """
+    inputs = {**(defaults or {}), **{key: value for key, value in columns.items() if key in DEFAULT_INPUTS}}
+    if 'dry_bulb_temperature' in columns:
+        inputs.update(tower_air_inputs(
+            columns['dry_bulb_temperature'], columns.get('wet_bulb_temperature'), columns.get('relative_humidity'),
+            outlet_temperature=columns.get('air_outlet_temperature', Air().outlet_temperature)
+        ))
+    if 'heat_load' in columns:
+        p = {**DEFAULT_INPUTS, **inputs}
+        mass_water = p['volume_circulation'] * p['mass_density']
+        inputs['water_inlet_temperature'] = p['water_outlet_temperature'] + columns['heat_load'] / (mass_water * p['heat_capacity_isobaric'])
+    return inputs
+
+
+# Columns `weather_inputs` reads besides DEFAULT_INPUTS; any other column of a weather file is left unparsed.
+WEATHER_COLUMNS = ('heat_load', 'dry_bulb_temperature', 'relative_humidity', 'air_outlet_temperature')
+
+
+def _float(text:str)->float|None:
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def read_csv_chunks(path:str, chunk_size:int, columns:tuple[str, ...]|None = None):
+    """Yield (lines, data, rejected) from a CSV file with a header row, `chunk_size` rows at a time.
+
+    Only the `columns` present in the header (every column when None) are
+    converted to float arrays in `data`; blank rows are skipped. Rows with a
+    missing or non-numeric cell in those columns are left out of `data` and
+    reported in `rejected` as (line, column, text). `lines` holds the file
+    line of every row of `data`.
+    """
+    with open(path, newline='') as file:
+        reader = csv.reader(file)
+        header = [name.strip() for name in next(reader)]
+        wanted = [(i, name) for i, name in enumerate(header) if columns is None or name in columns]
+        while True:
+            rows = [(reader.line_num, row) for row in islice(reader, chunk_size)]
+            if not rows:
+                return
+            lines, values, rejected = [], [], []
+            for line, row in rows:
+                if not any(cell.strip() for cell in row):
+                    continue
+                cells = [row[i].strip() if i < len(row) else '' for i, _ in wanted]
+                numbers = [_float(cell) for cell in cells]
+                bad = [(line, name, cell) for (_, name), cell, number in zip(wanted, cells, numbers) if number is None]
+                if bad:
+                    rejected.extend(bad)
+                    continue
+                lines.append(line)
+                values.append(numbers)
+            data = np.array(values, dtype=float).reshape(len(values), len(wanted))
+            yield np.array(lines, dtype=int), {name: data[:, j] for j, (_, name) in enumerate(wanted)}, rejected
+
+
+def stream_weather(path:str, output_path:str|None = None, chunk_size:int=8760, characteristic:str='legacy', **defaults)->dict:
+    """Evaluate the cooling tower for every row of a weather/load CSV.
+
+    Rows are read and evaluated `chunk_size` at a time, so memory does not
+    depend on the length of the series. Per-row results, led by the file line, are appended to
+    `output_path` when given. Keyword arguments set model inputs that are
+    not columns of the file.
+
+    Blank rows are skipped. Rows with a missing or non-numeric cell in a
+    column the model reads (DEFAULT_INPUTS and WEATHER_COLUMNS) are not
+    evaluated; the other rows still are. Columns the model does not read,
+    such as timestamps, are never parsed.
+
+    Returns:
+        dict: Per output, the row count and the sum, mean, min and max over
+        the series, and `rejected`, the (line, column, text) of every bad cell.
+    """
+    totals = {name: {'count': 0, 'sum': 0.0, 'min': np.inf, 'max': -np.inf} for name in OUTPUTS}
+    rejected = []
+    output = open(output_path, 'w', newline='') if output_path else None
+    try:
+        writer = csv.writer(output) if output else None
+        if writer:
+            writer.writerow(('line', *OUTPUTS))
+        for lines, columns, bad in read_csv_chunks(path, chunk_size, (*DEFAULT_INPUTS, *WEATHER_COLUMNS)):
+            rejected.extend(bad)
+            n = len(lines)
+            if not n:
+                continue
+            results = {name: np.broadcast_to(value, (n,)) for name, value in
+                       cooling_tower_model(**weather_inputs(columns, defaults), characteristic=characteristic).items()}
+            for name, value in results.items():
+                total = totals[name]
+                total['count'] += n
+                total['sum'] += float(value.sum())
+                total['min'] = min(total['min'], float(value.min()))
+                total['max'] = max(total['max'], float(value.max()))
+            if writer:
+                writer.writerows([line, *values] for line, values in
+                                 zip(lines.tolist(), np.column_stack([results[name] for name in OUTPUTS]).tolist()))
+    finally:
+        if output:
+            output.close()
+    for total in totals.values():
+        total['mean'] = total['sum'] / total['count'] if total['count'] else np.nan
+    totals['rejected'] = rejected
+    return totals
@@ -0,0 +1,240 @@
+import hashlib
+import os
+import tempfile
+import threading
+import numpy as np
+from psychrometrics import ATMOSPHERIC_PRESSURE, enthalpy, humidity_ratio_from_vapor_pressure, saturation_pressure
+
+# Merkel tower characteristic KaV/L = ∫ cp dT / (h_s(T) - h_a(T)) over the
+# water temperature range, with h_s the saturated-air enthalpy at the water
+# temperature and h_a the air enthalpy on the operating line
+# h_a = h_s(wet bulb) + (L/G) cp (T - T_cold). SI units as in
+# psychrometrics.py: °C, kJ/kg*°C, kJ/kg dry air; L/G in kg water/kg dry air.
+WATER_HEAT_CAPACITY = 4.186 # kJ/kg*°C
+METHODS = ('chebyshev', 'gauss', 'adaptive')
+
+# Demand-curve table axes. The table holds the mean driving force cp*range/(KaV/L)
+# (kJ/kg), which is nearly linear in L/G where KaV/L itself has a pole at the pinch.
+TABLE_AXES = {
+    'wet_bulb': np.arange(0.0, 36.0, 1.0), # °C
+    'range': np.arange(1.0, 26.0, 1.0), # °C
+    'approach': np.arange(0.5, 25.25, 0.75), # °C
+    'L_G': np.arange(0.2, 4.05, 0.1),
+}
+TABLE_NODES = 64
+PINCH_RATIO = 0.4
+_TABLE_VERSION = 1
+_TABLE_LOCK = threading.Lock()
+_TABLE = None
+
+
+def saturated_enthalpy(temperature:np.ndarray, pressure:np.ndarray=ATMOSPHERIC_PRESSURE)->np.ndarray:
+    """Enthalpy of saturated air in kJ/kg dry air at `temperature` °C."""
+    temperature = np.asarray(temperature, dtype=float)
+    return enthalpy(temperature, humidity_ratio_from_vapor_pressure(saturation_pressure(temperature), pressure))
+
+
+def _integrand(fraction:np.ndarray, range_, approach, wet_bulb, L_G, heat_capacity, pressure)->np.ndarray:
+    """1 / (h_s - h_a) at the water temperatures T_cold + fraction * range (fraction on the last axis)."""
+    rise = fraction * range_[..., None]
+    T_water = (wet_bulb + approach)[..., None] + rise
+    h_air = saturated_enthalpy(wet_bulb, pressure)[..., None] + (L_G * heat_capacity)[..., None] * rise
+    driving = saturated_enthalpy(T_water, pressure if np.ndim(pressure) == 0 else pressure[..., None]) - h_air
+    with np.errstate(divide='ignore'):
+        return np.where(driving > 0, 1 / driving, np.nan)
+
+
+def _gauss(n:int)->tuple[np.ndarray, np.ndarray]:
+    """Gauss-Legendre nodes and weights on [0, 1]."""
+    nodes, weights = np.polynomial.legendre.leggauss(n)
+    return (nodes + 1) / 2, weights / 2
+
+
+def merkel_number(range_:np.ndarray, approach:np.ndarray, wet_bulb:np.ndarray, L_G:np.ndarray, method:str='adaptive',
+                  points:int=8, tolerance:float=1e-8, heat_capacity:float=WATER_HEAT_CAPACITY,
+                  pressure:np.ndarray=ATMOSPHERIC_PRESSURE)->np.ndarray:
+    """Merkel number KaV/L by numerical integration; arguments broadcast against each other.
+
+    Args:
+        range_ (np.ndarray): Cooling range, hot minus cold water temperature (°C).
+        approach (np.ndarray): Cold water minus wet-bulb temperature (°C).
+        wet_bulb (np.ndarray): Inlet air wet-bulb temperature (°C).
+        L_G (np.ndarray): Water to dry air mass flow ratio.
+        method (str): 'chebyshev' (the CTI 4-point rule), 'gauss' (`points`
+        Gauss-Legendre nodes) or 'adaptive' (Gauss-Legendre nodes doubled
+        per point until the relative change is below `tolerance`).
+
+    Returns:
+        np.ndarray: KaV/L, NaN where the operating line reaches the
+        saturation curve (no driving force: L/G too high for the approach).
+
+    Raises:
+        ValueError: If the method is not in METHODS.
+    """
+    range_, approach, wet_bulb, L_G = np.broadcast_arrays(*(np.asarray(value, dtype=float) for value in (range_, approach, wet_bulb, L_G)))
+    arguments = (range_, approach, wet_bulb, L_G, heat_capacity, pressure)
+    if method == 'chebyshev':
+        return heat_capacity * range_ * _integrand(np.array([0.1, 0.4, 0.6, 0.9]), *arguments).mean(axis=-1)
+    if method == 'gauss':
+        nodes, weights = _gauss(points)
+        return heat_capacity * range_ * (_integrand(nodes, *arguments) @ weights)
+    if method != 'adaptive':
+        raise ValueError(f'Unsupported method: {method}')
+
+    flat = [np.ravel(value) for value in (range_, approach, wet_bulb, L_G)]
+    pressure = np.ravel(np.broadcast_to(pressure, range_.shape)) if np.ndim(pressure) else pressure
+    result = np.full(range_.size, np.nan)
+    rows = np.arange(range_.size)
+    n = 4
+    nodes, weights = _gauss(n)
+    previous = _integrand(nodes, *flat, heat_capacity, pressure) @ weights
+    while len(rows) and n < 256:
+        n *= 2
+        nodes, weights = _gauss(n)
+        subset = [value[rows] for value in flat]
+        current = _integrand(nodes, *subset, heat_capacity, pressure if np.ndim(pressure) == 0 else pressure[rows]) @ weights
+        done = ~(np.abs(current - previous) > tolerance * np.abs(current)) | (n >= 256)
+        result[rows[done]] = current[done]
+        rows, previous = rows[~done], current[~done]
+    return (heat_capacity * range_.ravel() * result).reshape(range_.shape)
+
+
+def build_demand_table(axes:dict[str, np.ndarray]=TABLE_AXES, points:int=TABLE_NODES,
+                       heat_capacity:float=WATER_HEAT_CAPACITY)->np.ndarray:
+    """Mean driving force cp*range/(KaV/L) on the grid of `axes` (wet_bulb, range, approach, L_G).
+
+    Cells that are infeasible, or whose smallest driving force is below
+    PINCH_RATIO times the mean, hold NaN so that lookups around them
+    integrate instead. Uses `points` Gauss-Legendre nodes; the saturated
+    enthalpies at the nodes do not depend on L/G, so they are computed
+    once per wet bulb.
+    """
+    nodes, weights = _gauss(points)
+    range_, approach = np.meshgrid(axes['range'], axes['approach'], indexing='ij')
+    rise = range_[..., None] * nodes # (range, approach, node)
+    line = axes['L_G'][:, None] * heat_capacity # (L_G, 1)
+    values = np.empty(tuple(len(axes[name]) for name in TABLE_AXES))
+    for i, wet_bulb in enumerate(axes['wet_bulb']):
+        h_water = saturated_enthalpy(wet_bulb + approach[..., None] + rise) - saturated_enthalpy(wet_bulb)
+        driving = h_water[:, :, None, :] - line * rise[:, :, None, :]
+        with np.errstate(divide='ignore'):
+            mean_driving = 1 / (np.where(driving > 0, 1 / driving, np.nan) @ weights)
+        # Close to the pinch the driving force is too curved in L/G to interpolate: those cells are integrated.
+        values[i] = np.where(driving.min(axis=-1) > PINCH_RATIO * mean_driving, mean_driving, np.nan)
+    return values
+
+
+def default_table_path()->str:
+    """Where the demand-curve table is persisted: $HEAT_EXCHANGER_MERKEL_TABLE, or the user cache directory."""
+    if os.environ.get('HEAT_EXCHANGER_MERKEL_TABLE'):
+        return os.environ['HEAT_EXCHANGER_MERKEL_TABLE']
+    cache = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache, 'heat-exchanger', f'merkel_demand_{_axes_fingerprint(TABLE_AXES)}.npz')
+
+
+def _axes_fingerprint(axes:dict[str, np.ndarray])->str:
+    digest = hashlib.sha256(f'{_TABLE_VERSION}:{TABLE_NODES}:{PINCH_RATIO}'.encode())
+    for name in sorted(axes):
+        digest.update(name.encode() + np.asarray(axes[name], dtype=float).tobytes())
+    return digest.hexdigest()[:16]
+
+
+class DemandTable:
+    """Precomputed Merkel demand curves: KaV/L over wet bulb, range, approach and L/G.
+
+    `DemandTable.load_or_build(path)` reads the table from a `.npz` file
+    or builds it (about a second) and writes it there, so later processes
+    only read it. Lookups interpolate the mean driving force multilinearly
+    and return cp*range divided by it.
+    """
+
+    def __init__(self, axes:dict[str, np.ndarray], values:np.ndarray, fingerprint:str|None = None):
+        self.axes = {name: np.asarray(axes[name], dtype=float) for name in TABLE_AXES}
+        self.values = np.asarray(values, dtype=float)
+        self.fingerprint = fingerprint or _axes_fingerprint(self.axes)
+        self._coordinates = tuple(self.axes.values())
+
+    @classmethod
+    def build(cls, axes:dict[str, np.ndarray]=TABLE_AXES)->'DemandTable':
+        """Table computed on `axes` (not saved)."""
+        return cls(axes, build_demand_table(axes))
+
+    @classmethod
+    def load(cls, path:str)->'DemandTable':
+        with np.load(path) as data:
+            return cls({name: data[name] for name in TABLE_AXES}, data['values'], str(data['fingerprint']))
+
+    def save(self, path:str):
+        """Write the table atomically, so concurrent readers never see a partial file."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=directory, suffix='.npz')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                np.savez(file, values=self.values, fingerprint=self.fingerprint, **self.axes)
+            os.chmod(temporary, 0o644)
+            os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.unlink(temporary)
+            raise
+
+    @classmethod
+    def load_or_build(cls, path:str|None = None, axes:dict[str, np.ndarray]=TABLE_AXES)->'DemandTable':
+        """Table from `path` when it was built the same way, otherwise built and saved there (best effort)."""
+        path = path or default_table_path()
+        if os.path.exists(path):
+            try:
+                table = cls.load(path)
+                if table.fingerprint == _axes_fingerprint(axes):
+                    return table
+            except (OSError, ValueError, KeyError):
+                pass
+        table = cls.build(axes)
+        try:
+            table.save(path)
+        except OSError:
+            pass
+        return table
+
+    def __call__(self, range_:np.ndarray, approach:np.ndarray, wet_bulb:np.ndarray, L_G:np.ndarray,
+                 fallback:bool=True)->np.ndarray:
+        """KaV/L by interpolation; points outside the table or next to a pinched cell are integrated when `fallback`."""
+        range_, approach, wet_bulb, L_G = np.broadcast_arrays(*(np.asarray(value, dtype=float) for value in (range_, approach, wet_bulb, L_G)))
+        points = (wet_bulb, range_, approach, L_G)
+        result = np.zeros(range_.shape)
+        inside = np.ones(range_.shape, dtype=bool)
+        corners = [(np.zeros(range_.shape, dtype=np.intp), np.ones(range_.shape))]
+        # Multilinear interpolation: accumulate the flat index and weight of each of the 16 corners.
+        strides = np.cumprod((1,) + self.values.shape[:0:-1])[::-1]
+        for axis, (grid, point) in enumerate(zip(self._coordinates, points)):
+            inside &= (point >= grid[0]) & (point <= grid[-1])
+            index = np.clip(np.searchsorted(grid, point, side='right') - 1, 0, len(grid) - 2)
+            t = np.nan_to_num((point - grid[index]) / (grid[index + 1] - grid[index]))
+            corners = [(flat + (index + step) * strides[axis], weight * (t if step else 1 - t))
+                       for flat, weight in corners for step in (0, 1)]
+        for flat, weight in corners:
+            result += weight * self.values.ravel()[flat]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = np.where(inside & (result > 0), WATER_HEAT_CAPACITY * range_ / result, np.nan)
+        missing = np.isnan(result)
+        if fallback and missing.any():
+            # Same quadrature as the table, in one pass (the adaptive rule is slow right at the pinch).
+            result[missing] = merkel_number(range_[missing], approach[missing], wet_bulb[missing], L_G[missing],
+                                            method='gauss', points=TABLE_NODES)
+        return result[()]
+
+
+def demand_table()->DemandTable:
+    """The process-wide demand table, loaded or built on first use."""
+    global _TABLE
+    if _TABLE is None:
+        with _TABLE_LOCK:
+            if _TABLE is None:
+                _TABLE = DemandTable.load_or_build()
+    return _TABLE
+
+
+def tower_characteristic(range_:np.ndarray, approach:np.ndarray, wet_bulb:np.ndarray, L_G:np.ndarray)->np.ndarray:
+    """KaV/L from the demand-curve table (one interpolation per point)."""
+    return demand_table()(range_, approach, wet_bulb, L_G)
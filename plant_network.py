@@ -0,0 +1,338 @@
+from collections import defaultdict
+import numpy as np
+from merkel import saturated_enthalpy
+from psychrometrics import ATMOSPHERIC_PRESSURE
+from Tools.general import UnsupportedConfiguration, heat_flow
+from Tools.rating import RATING_CONFIGS, effectiveness_batch
+
+# Units of the network: temperatures in °C, mass flows in kg/h, heat
+# capacities in kJ/kg*°C, UA in kJ/h*°C and duties in kJ/h, as in the tower
+# model. Multiply a UA in Btu/h*°F (Tools/rating.py) by this factor.
+UA_BTU_F_TO_KJ_C = 1.05505585 * 1.8
+WATER_HEAT_CAPACITY = 4.186 # kJ/kg*°C
+# Water inlet temperatures (°C) the tower model accepts. Towards the boiling
+# point the saturated humidity ratio, and with it the saturated-air
+# enthalpy, grows without bound. Inlets outside are clipped while iterating
+# and make the scenario unconverged at the solution.
+TOWER_INLET_RANGE = (0.0, 80.0)
+# Approach (°C) above the wet bulb of the default tear temperature of networks with towers.
+START_APPROACH = 5.0
+
+
+def _exchanger(T_in, flow, cp, params):
+    """ε-NTU exchanger: inlets (hot, cold), outlets (hot, cold); exact partials for fixed flows and UA."""
+    C_hot, C_cold = flow[..., 0] * cp[..., 0], flow[..., 1] * cp[..., 1]
+    C_min = np.minimum(C_hot, C_cold)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        effectiveness = effectiveness_batch(params['config'], C_min / np.maximum(C_hot, C_cold), params['UA'] / C_min)
+        P_hot, P_cold = effectiveness * C_min / C_hot, effectiveness * C_min / C_cold
+    partials = np.stack([np.stack([1 - P_hot, P_hot], -1), np.stack([P_cold, 1 - P_cold], -1)], -2)
+    T_out = (partials @ T_in[..., None])[..., 0]
+    return T_out, partials, heat_flow(flow[..., 0], cp[..., 0], T_in[..., 0], T_out[..., 0])
+
+
+def _load(T_in, flow, cp, params):
+    """Process heat load: `duty` kJ/h added to the stream (negative removes heat)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        T_out = T_in + (params['duty'] / (flow[..., 0] * cp[..., 0]))[..., None]
+    return T_out, np.ones(T_in.shape + (1,)), params['duty']
+
+
+def _mixer(T_in, flow, cp, params):
+    """Adiabatic mixing: flow- and heat-capacity-weighted inlet temperatures."""
+    capacity = flow * cp
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weights = capacity / capacity.sum(axis=-1, keepdims=True)
+    return (weights * T_in).sum(axis=-1, keepdims=True), weights[..., None, :], np.zeros(T_in.shape[:-1])
+
+
+def _splitter(T_in, flow, cp, params):
+    n_out = params['branches']
+    return np.repeat(T_in, n_out, axis=-1), np.ones(T_in.shape[:-1] + (n_out, 1)), np.zeros(T_in.shape[:-1])
+
+
+def _tower_P(slope, C_water, params, water_flow):
+    """Fraction of the approach potential T_in - wet_bulb removed from the water, at a saturation slope."""
+    C_air = params['air_flow'] * slope
+    C_min = np.minimum(C_water, C_air)
+    effectiveness = effectiveness_batch('counter-current', C_min / np.maximum(C_water, C_air),
+                                        params['characteristic'] * water_flow * slope / C_min)
+    return effectiveness * C_min / C_water
+
+
+def _tower(T_in, flow, cp, params):
+    """Counterflow wet tower, ε-NTU form (Braun): water against saturated air with Cp_s = Δh_s/ΔT.
+
+    The air heat capacity is the secant slope of the saturated-air
+    enthalpy between the wet bulb and the water inlet, so Q =
+    ε*C_min*(T_in - wet_bulb) equals ε times the enthalpy potential.
+    NTU follows from the Merkel characteristic: KaV = KaV/L * water flow.
+    The partial includes the change of that slope with the inlet
+    temperature (water flow changes with evaporation are neglected).
+    Inlets outside TOWER_INLET_RANGE reject the heat of the nearest limit.
+    """
+    T_raw, wet_bulb, pressure = T_in[..., 0], params['wet_bulb'], params['pressure']
+    T = np.clip(T_raw, *TOWER_INLET_RANGE)
+    clipped = T != T_raw
+    h_wet_bulb = saturated_enthalpy(wet_bulb, pressure)
+    difference = T - wet_bulb
+    step = 1e-3
+    # Tangent slope of the saturation curve at T (central difference), the secant's limit at the wet bulb.
+    tangent = (saturated_enthalpy(T + step, pressure) - saturated_enthalpy(T - step, pressure)) / (2 * step)
+    near = np.abs(difference) < step
+    with np.errstate(divide='ignore', invalid='ignore'):
+        safe = np.where(near, 1.0, difference)
+        slope = np.where(near, tangent, (saturated_enthalpy(T, pressure) - h_wet_bulb) / safe)
+        slope_derivative = np.where(near, 0.0, (tangent - slope) / safe)
+        C_water = flow[..., 0] * cp[..., 0]
+        P = _tower_P(slope, C_water, params, flow[..., 0])
+        # dP/dslope by a relative directional difference of the ε-NTU relation.
+        ds = 1e-6 * slope
+        dP = (_tower_P(slope + ds, C_water, params, flow[..., 0]) - P) / ds
+    T_out = T_raw - P * difference
+    partial = np.where(clipped, 1.0, 1 - P - difference * dP * slope_derivative)
+    return T_out[..., None], partial[..., None, None], heat_flow(flow[..., 0], cp[..., 0], T_raw, T_out)
+
+
+_EVALUATORS = {'exchanger': _exchanger, 'load': _load, 'mixer': _mixer, 'splitter': _splitter, 'tower': _tower}
+
+
+class PlantNetwork:
+    """Cooling loop or plant flowsheet: units connected by streams, solved for every stream temperature.
+
+    Streams have a mass flow and heat capacity; boundary streams also have
+    a temperature. Every other stream is the outlet of exactly one unit
+    (exchanger, load, mixer, splitter or tower), and a stream feeds at most
+    one unit. Recycles are allowed. Every number (flow, UA, duty,
+    temperature, wet bulb...) may be a scalar or an array of S load
+    scenarios, and all scenarios are solved at once.
+
+        net = PlantNetwork()
+        net.stream('supply', 50_000); net.stream('return', 50_000); ...
+        net.exchanger('E1', 'oil_in', 'oil_out', 'supply', 'warm', UA=...)
+        net.tower('CT', 'return', 'supply', characteristic=1.2, air_flow=60_000, wet_bulb=22)
+        result = net.solve()
+
+    `solve` tears the recycles found by a depth-first search, evaluates the
+    units level by level (units of one kind and level in one batched call)
+    and runs Newton's method on the tear temperatures. The Jacobian is
+    propagated with the sweep from the analytic ε-NTU, mixing and load
+    partials, so networks of exchangers, loads and mixers converge in one
+    step; towers add the nonlinearity of the saturation curve, which
+    Newton's method resolves in a few iterations.
+    """
+
+    def __init__(self):
+        self.streams = {}
+        self.units = {}
+
+    def stream(self, name:str, flow, cp=WATER_HEAT_CAPACITY, temperature=None)->str:
+        """Add a stream of `flow` kg/h; give `temperature` (°C) for a boundary stream."""
+        if name in self.streams:
+            raise ValueError(f'Duplicate stream: {name}')
+        self.streams[name] = {'flow': flow, 'cp': cp, 'temperature': temperature}
+        return name
+
+    def exchanger(self, name:str, hot_in:str, hot_out:str, cold_in:str, cold_out:str, UA, config:str='counter-current'):
+        """Exchanger of conductance `UA` kJ/h*°C (e.g. `Tools.rating.overall_ua` times UA_BTU_F_TO_KJ_C)."""
+        if config not in RATING_CONFIGS:
+            raise UnsupportedConfiguration(f'Unsupported configuration: {config}')
+        self._unit(name, 'exchanger', (hot_in, cold_in), (hot_out, cold_out), UA=UA, config=config)
+
+    def load(self, name:str, inlet:str, outlet:str, duty):
+        """Process heat load of `duty` kJ/h picked up by the stream."""
+        self._unit(name, 'load', (inlet,), (outlet,), duty=duty)
+
+    def mixer(self, name:str, inlets:list[str], outlet:str):
+        self._unit(name, 'mixer', tuple(inlets), (outlet,))
+
+    def splitter(self, name:str, inlet:str, outlets:list[str]):
+        self._unit(name, 'splitter', (inlet,), tuple(outlets), branches=len(outlets))
+
+    def tower(self, name:str, inlet:str, outlet:str, characteristic, air_flow, wet_bulb, pressure=ATMOSPHERIC_PRESSURE):
+        """Cooling tower of Merkel characteristic KaV/L (e.g. `merkel.tower_characteristic` at its design point).
+
+        Args:
+            characteristic: KaV/L at the rated water flow.
+            air_flow: Dry air mass flow in kg/h.
+            wet_bulb: Inlet air wet-bulb temperature in °C.
+        """
+        self._unit(name, 'tower', (inlet,), (outlet,), characteristic=characteristic, air_flow=air_flow,
+                   wet_bulb=wet_bulb, pressure=pressure)
+
+    def _unit(self, name:str, kind:str, inlets:tuple, outlets:tuple, **params):
+        if name in self.units:
+            raise ValueError(f'Duplicate unit: {name}')
+        self.units[name] = {'kind': kind, 'inlets': inlets, 'outlets': outlets, 'params': params}
+
+    def _topology(self)->tuple[list[str], dict[str, int]]:
+        """Tear streams (back edges of a depth-first search) and the level of every unit once they are cut."""
+        producer, consumer = {}, {}
+        for name, unit in self.units.items():
+            for role, streams, owners in (('outlet', unit['outlets'], producer), ('inlet', unit['inlets'], consumer)):
+                for stream in streams:
+                    if stream not in self.streams:
+                        raise ValueError(f'Unknown stream {stream} at unit {name}')
+                    if stream in owners:
+                        raise ValueError(f'Stream {stream} is the {role} of both {owners[stream]} and {name}')
+                    owners[stream] = name
+        for stream, spec in self.streams.items():
+            if (spec['temperature'] is None) == (stream not in producer):
+                raise ValueError(f'Stream {stream} needs exactly one of a temperature and a producing unit')
+        # Flows are given, so they must balance: per side through exchangers, in total through mixers and splitters.
+        for name, unit in self.units.items():
+            sides = [((i,), (o,)) for i, o in zip(unit['inlets'], unit['outlets'])] \
+                if unit['kind'] in ('exchanger', 'load', 'tower') else [(unit['inlets'], unit['outlets'])]
+            for inlets, outlets in sides:
+                total = lambda streams: sum(np.asarray(self.streams[s]['flow'], dtype=float) for s in streams)
+                if not np.allclose(total(inlets), total(outlets), rtol=1e-6, atol=0):
+                    raise ValueError(f'Mass flows of unit {name} do not balance: {list(inlets)} -> {list(outlets)}')
+
+        # Iterative depth-first search over units; an edge to a unit on the stack closes a recycle.
+        tears, state = [], {}
+        for root in self.units:
+            if root in state:
+                continue
+            state[root] = 'open'
+            stack = [(root, iter(self.units[root]['outlets']))]
+            while stack:
+                unit, outlets = stack[-1]
+                stream = next(outlets, None)
+                if stream is None:
+                    state[unit] = 'done'
+                    stack.pop()
+                    continue
+                child = consumer.get(stream)
+                if child is None:
+                    continue
+                if state.get(child) == 'open':
+                    tears.append(stream)
+                elif child not in state:
+                    state[child] = 'open'
+                    stack.append((child, iter(self.units[child]['outlets'])))
+
+        # Levels by Kahn's algorithm on the units with the tears cut.
+        torn = set(tears)
+        upstream = {name: {producer[s] for s in unit['inlets'] if s in producer and s not in torn} for name, unit in self.units.items()}
+        downstream = defaultdict(list)
+        for name, sources in upstream.items():
+            for source in sources:
+                downstream[source].append(name)
+        waiting = {name: len(sources) for name, sources in upstream.items()}
+        level = {name: 0 for name, count in waiting.items() if not count}
+        ready = list(level)
+        while ready:
+            name = ready.pop()
+            for child in downstream[name]:
+                level[child] = max(level.get(child, 0), level[name] + 1)
+                waiting[child] -= 1
+                if not waiting[child]:
+                    ready.append(child)
+        return tears, level
+
+    def solve(self, tolerance:float=1e-6, max_iter:int=50, initial=None)->dict:
+        """Solve every scenario.
+
+        Args:
+            tolerance (float): Largest tear temperature residual and update (°C) at convergence.
+            initial: Starting tear temperature (°C). By default START_APPROACH
+            above the highest tower wet bulb, or the mean boundary temperature
+            of networks without towers.
+
+        Returns:
+            dict: `temperatures` and `duties` (name -> array of S), the
+            `tear_streams`, per-scenario `iterations` and `converged`. A
+            scenario is converged when every temperature is finite, the tear
+            residual is within `tolerance` and every tower inlet lies in
+            TOWER_INLET_RANGE.
+        """
+        tears, level = self._topology()
+        names = list(self.streams)
+        column = {stream: i for i, stream in enumerate(names)}
+        n, k = len(names), len(tears)
+        write = dict(column, **{stream: n + j for j, stream in enumerate(tears)})
+        values = [spec[key] for spec in self.streams.values() for key in ('flow', 'cp', 'temperature') if spec[key] is not None]
+        values += [value for unit in self.units.values() for value in unit['params'].values() if not isinstance(value, str)]
+        S = max((np.size(value) for value in values), default=1)
+        scenario = lambda value: np.broadcast_to(np.asarray(value, dtype=float), (S,))
+
+        flow = np.stack([scenario(spec['flow']) for spec in self.streams.values()], axis=1)
+        cp = np.stack([scenario(spec['cp']) for spec in self.streams.values()], axis=1)
+        boundary = [column[stream] for stream, spec in self.streams.items() if spec['temperature'] is not None]
+        boundary_T = np.stack([scenario(self.streams[names[i]]['temperature']) for i in boundary], axis=1) if boundary else np.zeros((S, 0))
+
+        # Units of one kind and shape at one level are evaluated together.
+        groups = defaultdict(list)
+        for name, unit in self.units.items():
+            key = (level[name], unit['kind'], len(unit['inlets']), len(unit['outlets']), unit['params'].get('config'))
+            groups[key].append(name)
+        plan = []
+        for key in sorted(groups, key=lambda key: key[0]):
+            members = [self.units[name] for name in groups[key]]
+            inlets = np.array([[column[s] for s in unit['inlets']] for unit in members])
+            outlets = np.array([[write[s] for s in unit['outlets']] for unit in members])
+            params = {}
+            for param, value in members[0]['params'].items():
+                params[param] = value if isinstance(value, str) or param == 'branches' else \
+                    np.stack([scenario(unit['params'][param]) for unit in members], axis=1)
+            plan.append((_EVALUATORS[key[1]], groups[key], inlets, outlets, flow[:, inlets], cp[:, inlets], params))
+
+        T = np.zeros((S, n + k))
+        D = np.zeros((S, n + k, k))
+        T[:, boundary] = boundary_T
+        tear_columns = np.array([column[stream] for stream in tears], dtype=int)
+        identity = np.eye(k)
+        D[:, tear_columns, np.arange(k)] = 1.0
+        towers = [unit for unit in self.units.values() if unit['kind'] == 'tower']
+        if towers:
+            start = np.max([scenario(unit['params']['wet_bulb']) for unit in towers], axis=0) + START_APPROACH
+        else:
+            start = np.mean(boundary_T, axis=1) if boundary else np.full(S, 30.0)
+        x = np.broadcast_to(np.asarray(initial, dtype=float), (S,)).copy() if initial is not None else start
+        x = np.repeat(x[:, None], k, axis=1)
+        duties = {}
+
+        def sweep(x, final=False):
+            T[:, tear_columns] = x
+            for evaluate, unit_names, inlets, outlets, unit_flow, unit_cp, params in plan:
+                T_out, partials, duty = evaluate(T[:, inlets], unit_flow, unit_cp, params)
+                T[:, outlets] = T_out
+                if k and not final:
+                    D[:, outlets] = partials @ D[:, inlets]
+                if final:
+                    duties.update((name, duty[:, i]) for i, name in enumerate(unit_names))
+
+        iterations = np.zeros(S, dtype=int)
+        active = np.full(S, k > 0)
+        for _ in range(max_iter if k else 0):
+            sweep(x)
+            residual = T[:, n:] - x
+            jacobian = D[:, n:] - identity
+            delta = np.zeros_like(x)
+            finite = np.isfinite(residual).all(axis=1) & np.isfinite(jacobian).all(axis=(1, 2))
+            rows = np.flatnonzero(active & finite)
+            try:
+                delta[rows] = np.linalg.solve(jacobian[rows], -residual[rows][..., None])[..., 0]
+            except np.linalg.LinAlgError:
+                # A singular loop (no heat leaves it) has no steady state: fall back to least squares per scenario.
+                delta[rows] = [np.linalg.lstsq(jacobian[i], -residual[i], rcond=None)[0] for i in rows]
+            x = x + delta
+            iterations += active
+            # Non-finite scenarios get no step and stay active, so they end unconverged.
+            small = (np.abs(delta).max(axis=1, initial=0.0) <= tolerance) & (np.abs(residual).max(axis=1, initial=0.0) <= tolerance)
+            active &= ~(finite & small)
+            if not active.any():
+                break
+        sweep(x, final=True)
+        converged = np.isfinite(T[:, :n]).all(axis=1) & (np.abs(T[:, n:] - x).max(axis=1, initial=0.0) <= tolerance)
+        for evaluate, unit_names, inlets, outlets, unit_flow, unit_cp, params in plan:
+            if evaluate is _tower:
+                T_tower = T[:, inlets[:, 0]]
+                converged &= ((T_tower >= TOWER_INLET_RANGE[0]) & (T_tower <= TOWER_INLET_RANGE[1])).all(axis=1)
+        return {
+            'temperatures': {stream: T[:, column[stream]].copy() for stream in names},
+            'duties': duties,
+            'tear_streams': tears,
+            'iterations': iterations,
+            'converged': converged,
+        }
@@ -0,0 +1,105 @@
+import numpy as np
+
+# SI psychrometrics (ASHRAE Fundamentals): temperatures in °C, pressures in
+# kPa, enthalpy in kJ/kg dry air, specific volume in m3/kg dry air.
+ATMOSPHERIC_PRESSURE = 101.325 # kPa
+_TABLE_MIN, _TABLE_MAX, _TABLE_STEP = -60.0, 120.0, 0.05 # °C
+
+
+def hyland_wexler_saturation_pressure(temperature:np.ndarray)->np.ndarray:
+    """Saturation pressure of water vapor in kPa (Hyland-Wexler, over ice below 0 °C)."""
+    T = np.asarray(temperature, dtype=float) + 273.15
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ln_water = (-5.8002206e3 / T + 1.3914993 - 4.8640239e-2 * T + 4.1764768e-5 * T**2
+                    - 1.4452093e-8 * T**3 + 6.5459673 * np.log(T))
+        ln_ice = (-5.6745359e3 / T + 6.3925247 - 9.677843e-3 * T + 6.2215701e-7 * T**2
+                  + 2.0747825e-9 * T**3 - 9.484024e-13 * T**4 + 4.1635019 * np.log(T))
+    return np.exp(np.where(T >= 273.15, ln_water, ln_ice)) / 1000
+
+
+# ln(p_ws) tabulated once; lookups are a linear interpolation on a uniform grid.
+_TABLE_T = np.round(np.arange(_TABLE_MIN, _TABLE_MAX + _TABLE_STEP / 2, _TABLE_STEP), 10)
+_TABLE_LN_P = np.log(hyland_wexler_saturation_pressure(_TABLE_T))
+_TABLE_SLOPE = np.diff(_TABLE_LN_P) / _TABLE_STEP
+
+
+def saturation_pressure(temperature:np.ndarray)->np.ndarray:
+    """Saturation pressure in kPa from the precomputed table, NaN outside -60..120 °C."""
+    temperature = np.asarray(temperature, dtype=float)
+    position = np.nan_to_num((temperature - _TABLE_MIN) / _TABLE_STEP, nan=0.0)
+    index = np.clip(position, 0, len(_TABLE_SLOPE) - 1).astype(np.intp)
+    ln_p = _TABLE_LN_P[index] + _TABLE_SLOPE[index] * (temperature - _TABLE_T[index])
+    inside = (temperature >= _TABLE_MIN) & (temperature <= _TABLE_MAX)
+    return np.where(inside, np.exp(ln_p), np.nan)
+
+
+def humidity_ratio_from_vapor_pressure(vapor_pressure:np.ndarray, pressure:np.ndarray=ATMOSPHERIC_PRESSURE)->np.ndarray:
+    """Specific humidity in kg water/kg dry air."""
+    return 0.621945 * vapor_pressure / (pressure - vapor_pressure)
+
+
+def humidity_ratio_from_wet_bulb(dry_bulb:np.ndarray, wet_bulb:np.ndarray, pressure:np.ndarray=ATMOSPHERIC_PRESSURE)->np.ndarray:
+    """Specific humidity from dry- and wet-bulb temperatures (above freezing)."""
+    saturated = humidity_ratio_from_vapor_pressure(saturation_pressure(wet_bulb), pressure)
+    return (((2501 - 2.326 * wet_bulb) * saturated - 1.006 * (dry_bulb - wet_bulb))
+            / (2501 + 1.86 * dry_bulb - 4.186 * wet_bulb))
+
+
+def enthalpy(dry_bulb:np.ndarray, humidity_ratio:np.ndarray)->np.ndarray:
+    """Moist air enthalpy in kJ/kg dry air."""
+    return 1.006 * dry_bulb + humidity_ratio * (2501 + 1.86 * dry_bulb)
+
+
+def specific_volume(dry_bulb:np.ndarray, humidity_ratio:np.ndarray, pressure:np.ndarray=ATMOSPHERIC_PRESSURE)->np.ndarray:
+    """Moist air specific volume in m3/kg dry air."""
+    return 0.287042 * (dry_bulb + 273.15) * (1 + 1.607858 * humidity_ratio) / pressure
+
+
+def air_state(dry_bulb:np.ndarray, wet_bulb:np.ndarray|None = None, relative_humidity:np.ndarray|None = None,
+              pressure:np.ndarray=ATMOSPHERIC_PRESSURE)->dict[str, np.ndarray]:
+    """State of moist air from dry bulb plus either wet bulb or relative humidity (0-1).
+
+    Returns:
+        dict[str, np.ndarray]: humidity_ratio, enthalpy, specific_volume and relative_humidity.
+    """
+    dry_bulb = np.asarray(dry_bulb, dtype=float)
+    saturation = saturation_pressure(dry_bulb)
+    if wet_bulb is not None:
+        W = humidity_ratio_from_wet_bulb(dry_bulb, np.asarray(wet_bulb, dtype=float), pressure)
+        relative_humidity = (pressure * W / (0.621945 + W)) / saturation
+    elif relative_humidity is not None:
+        relative_humidity = np.asarray(relative_humidity, dtype=float)
+        W = humidity_ratio_from_vapor_pressure(relative_humidity * saturation, pressure)
+    else:
+        raise ValueError('Either wet_bulb or relative_humidity is required.')
+    return {
+        'humidity_ratio': W,
+        'enthalpy': enthalpy(dry_bulb, W),
+        'specific_volume': specific_volume(dry_bulb, W, pressure),
+        'relative_humidity': relative_humidity,
+    }
+
+
+def tower_air_inputs(dry_bulb:np.ndarray, wet_bulb:np.ndarray|None = None, relative_humidity:np.ndarray|None = None,
+                     outlet_temperature:np.ndarray=28, outlet_relative_humidity:np.ndarray=1.0,
+                     pressure:np.ndarray=ATMOSPHERIC_PRESSURE)->dict[str, np.ndarray]:
+    """Air inputs of `cooling_tower_model` from inlet weather and the exhaust condition.
+
+    The exhaust is saturated by default. The returned keys replace the
+    hard-coded `Air` defaults; `wet_bulb_temperature` is included when
+    the wet bulb is given.
+    """
+    inlet = air_state(dry_bulb, wet_bulb, relative_humidity, pressure)
+    outlet = air_state(outlet_temperature, relative_humidity=outlet_relative_humidity, pressure=pressure)
+    inputs = {
+        'air_inlet_temperature': np.asarray(dry_bulb, dtype=float),
+        'air_inlet_enthalpy': inlet['enthalpy'],
+        'air_outlet_enthalpy': outlet['enthalpy'],
+        'air_inlet_specific_humidity': inlet['humidity_ratio'],
+        'air_outlet_specific_humidity': outlet['humidity_ratio'],
+        'air_inlet_specific_volume': inlet['specific_volume'],
+        'air_outlet_specific_volume': outlet['specific_volume'],
+    }
+    if wet_bulb is not None:
+        inputs['wet_bulb_temperature'] = np.asarray(wet_bulb, dtype=float)
+    return inputs
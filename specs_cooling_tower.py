@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from math import ceil
+import numpy as np
 
 @dataclass
 class Water():
@@ -106,6 +107,88 @@ class Technical():
     def wet_bulb_temperature(self):
         return self.__wet_bulb_temperature
 
+@dataclass(frozen=True, slots=True)
+class WaterSpec():
+    """Immutable, slotted counterpart of `Water` with the same attribute names."""
+    volume_circulation: float = 320 # m3/h
+    inlet_temperature: float = 30 # °C
+    outlet_temperature: float = 25 # °C
+    inlet_enthalpy: float = 104.9 # kJ/kg
+    outlet_enthalpy: float = 125.8 # kJ/kg
+    mass_density: float = 1000
+    heat_capacity_isobaric: float = 4.186
+
+    def intlet_temperature_fahrenheit(self):
+        return (self.inlet_temperature * (9 / 5)) + 32
+
+    def outlet_temperature_fahrenheit(self):
+        return (self.outlet_temperature * (9 / 5)) + 32
+
+@dataclass(frozen=True, slots=True)
+class AirSpec():
+    """Immutable, slotted counterpart of `Air` with the same attribute names."""
+    inlet_temperature: float = 25 # °C
+    outlet_temperature: float = 28 # °C
+    intlet_enthalpy: float = 65 # kJ/kg
+    outlet_enthalpy: float = 75 # kJ/kg
+    inlet_specific_humidity: float = 0.016
+    outlet_specific_humidity: float = 0.019
+    inlet_specific_volume: float = 0.8605
+    outlet_specific_volume: float = 0.88
+
+@dataclass(frozen=True, slots=True)
+class TechnicalSpec():
+    """Immutable, slotted counterpart of `Technical` with the same attribute names."""
+    relative_humidity: float = 0.8
+    allowable_evaporating_losses: float = 0.0144
+    wet_bulb_temperature: float = 22
+
+class CaseBatch():
+    """Many cases stored column-wise in one NumPy structured array.
+
+    Columns are zero-copy views (`batch['wet_bulb_temperature']`), and
+    integer, slice or mask indexing returns another CaseBatch over the
+    selected rows (a view for slices). `len()` is the number of cases.
+    Model functions take `columns()` or the batch itself.
+    """
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        if isinstance(data, np.ndarray) and data.dtype.names:
+            self.data = data
+        else:
+            columns = {name: np.asarray(value, dtype=float) for name, value in dict(data).items()}
+            length = np.broadcast_shapes(*(column.shape for column in columns.values()))
+            self.data = np.empty(length, dtype=[(name, float) for name in columns])
+            for name, column in columns.items():
+                self.data[name] = column
+
+    @classmethod
+    def load(cls, path:str, mmap:bool=True)->'CaseBatch':
+        """Load a batch saved with `save`; memory-mapped by default, so no row is read until used."""
+        return cls(np.load(path, mmap_mode='r' if mmap else None))
+
+    def save(self, path:str):
+        np.save(path, self.data)
+
+    @property
+    def names(self)->tuple[str, ...]:
+        return self.data.dtype.names
+
+    def columns(self)->dict[str, np.ndarray]:
+        return {name: self.data[name] for name in self.names}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.data[key]
+        return CaseBatch(np.atleast_1d(self.data[key]))
+
+    def __len__(self)->int:
+        return len(self.data)
+
+    def __repr__(self)->str:
+        return f'CaseBatch({len(self)} cases, columns={list(self.names)})'
+
 def blow_down_losses(WL:float, EL:float, DL:float)->float:
     M = sum([WL, EL, DL])
     COC = M / (M - EL)
@@ -113,7 +196,8 @@ def blow_down_losses(WL:float, EL:float, DL:float)->float:
 
 def tower_dimensions(cooling_tower_chart:float, L:float, Ka:float)->float:
     Ka = Ka * 0.47 / 100
-    Z = ceil((cooling_tower_chart * L) / Ka)
+    Z = (cooling_tower_chart * L) / Ka
+    Z = ceil(Z) if np.ndim(Z) == 0 else np.ceil(Z)
     B = 88.89 / L
     fill_volume = B * Z
 
@@ -0,0 +1,31 @@
+import csv
+import json
+import numpy as np
+from batch_runner import run_batch
+from cooling_tower_model import cooling_tower_model, weather_inputs
+
+CASES = [
+    {'wet_bulb_temperature': 22.0},
+    {'water_inlet_temperature': 40.0},
+    {'dry_bulb_temperature': 30.0, 'relative_humidity': 0.5},
+    {'wet_bulb_temperature': 21.0, 'volume_circulation': 'lots'},
+    {},
+    {'dry_bulb_temperature': 30.0},
+]
+
+
+def test_tower_rows_with_mixed_columns_are_evaluated_like_single_cases(tmp_path):
+    cases = tmp_path / 'cases.jsonl'
+    cases.write_text(''.join(json.dumps(case) + '\n' for case in CASES))
+    output = tmp_path / 'out.csv'
+    totals = run_batch('tower', str(cases), str(output), report=None)
+    assert (totals['accepted'], totals['rejected']) == (4, 2)
+    with open(output, newline='') as file:
+        rows = {int(row['line']): row for row in csv.DictReader(file)}
+    for line in (1, 2, 3, 5):
+        case = {key: np.array([value]) for key, value in CASES[line - 1].items()}
+        expected = cooling_tower_model(**weather_inputs(case))['fill_volume']
+        np.testing.assert_allclose(float(rows[line]['fill_volume']), expected, rtol=1e-12)
+    rejects = [json.loads(line) for line in open(f'{output}.rejects.jsonl')]
+    assert [(reject['line'], reject['reason']) for reject in rejects] == [
+        (4, 'non-numeric volume_circulation'), (6, 'missing wet_bulb_temperature or relative_humidity')]
@@ -0,0 +1,49 @@
+import numpy as np
+from Tools import cache as cache_module, tables
+from Tools.cache import ResultCache, cached, canonical_key, tables_fingerprint
+
+
+def test_equivalent_inputs_share_a_key():
+    a = canonical_key({'T_hot_in': 250.0, 'config': 'Counter-Current', 'flows': np.array([1.0, 2.0])})
+    b = canonical_key({'flows': [1, 2], 'config': ' counter-current', 'T_hot_in': np.float64(250.0000001)})
+    assert a == b
+
+
+def test_changed_inputs_and_namespaces_get_new_keys():
+    base = canonical_key({'T_hot_in': 250.0})
+    assert canonical_key({'T_hot_in': 250.01}) != base
+    assert canonical_key({'T_hot_in': 250.0000001}, digits=12) != canonical_key({'T_hot_in': 250.0}, digits=12)
+    assert canonical_key({'T_hot_in': 250.0}, namespace='rating') != base
+
+
+def test_table_change_changes_the_fingerprint(monkeypatch):
+    before = tables_fingerprint()
+    entry = next(iter(tables.double_pipe_data))
+    monkeypatch.setitem(tables.double_pipe_data, entry, {**tables.double_pipe_data[entry], 'D': 99.0})
+    assert tables_fingerprint() != before
+
+
+def test_disk_entries_of_other_tables_are_dropped(tmp_path, monkeypatch):
+    path = str(tmp_path / 'results.sqlite')
+    first = ResultCache(path=path)
+    key = first.key({'area': 1.0})
+    first.put(key, 'old tables')
+    first.close()
+    assert ResultCache(path=path).get(key) == 'old tables'
+    monkeypatch.setattr(cache_module, 'TABLES_FINGERPRINT', 'other-tables')
+    reopened = ResultCache(path=path)
+    assert reopened.key({'area': 1.0}) != key
+    assert reopened.get(key) is None and reopened.stats['misses'] == 1
+
+
+def test_cached_binds_positional_and_keyword_calls_to_one_entry():
+    calls = []
+
+    @cached(ResultCache())
+    def design(hot_flow, T_hot_in=250.0):
+        calls.append(hot_flow)
+        return hot_flow * T_hot_in
+
+    assert design(10.0) == design(hot_flow=10.0, T_hot_in=250.0) == 2500.0
+    assert design(10.0, 251.0) == 2510.0
+    assert calls == [10.0, 10.0] and design.cache.stats['hits'] == 1
@@ -0,0 +1,69 @@
+import json
+import socket
+import threading
+import numpy as np
+import pytest
+from calc_client import CalcClient, CalcError
+from calc_daemon import CalcServer
+from cooling_tower_model import cooling_tower_model
+
+
+@pytest.fixture(scope='module')
+def server(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('daemon') / 'calc.sock')
+    server = CalcServer(path, workers=4)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield path
+    server.shutdown()
+    server.server_close()
+
+
+def _raw(path:str, lines:list[bytes], answers:int)->list[dict]:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(30)
+        connection.connect(path)
+        connection.sendall(b''.join(lines))
+        stream = connection.makefile('rb')
+        return [json.loads(stream.readline()) for _ in range(answers)]
+
+
+def test_pipelined_requests_are_answered_by_id(server):
+    lines = [json.dumps({'id': i, 'method': 'tower', 'params': {'wet_bulb_temperature': 18 + i / 2}}).encode() + b'\n'
+             for i in range(8)]
+    responses = {response['id']: response for response in _raw(server, lines[:4] + [b'\n'] + lines[4:], 8)}
+    assert sorted(responses) == list(range(8))
+    for i, response in responses.items():
+        expected = cooling_tower_model(wet_bulb_temperature=18 + i / 2)['fill_volume']
+        assert response['result']['fill_volume'] == pytest.approx(float(expected), rel=1e-12)
+
+
+def test_errors_are_answered_not_raised(server):
+    responses = _raw(server, [b'{"id": 1, "method": "nope"}\n', b'not json\n', b'{"id": 3, "method": "ping"}\n'], 3)
+    by_id = {response['id']: response for response in responses}
+    assert by_id[1]['error'] == 'ValueError: Unsupported method: nope'
+    assert by_id[None]['error'].startswith('JSONDecodeError')
+    assert by_id[3] == {'id': 3, 'result': 'pong'}
+
+
+def test_client_results_rejects_and_cache(server):
+    with CalcClient(server) as client:
+        assert client.ping()
+        before = client.stats()['cache']['hits']
+        first = client.tower(wet_bulb_temperature=22.5)
+        assert client.tower(wet_bulb_temperature=22.5) == first
+        assert client.stats()['cache']['hits'] == before + 1
+        batch = client.tower([{'wet_bulb_temperature': 22.5}, {'wet_bulb_temperature': 'warm'}])
+        assert batch[0] == first and 'rejected' in batch[1]
+        with pytest.raises(CalcError, match='Unsupported method'):
+            client.call('nope')
+        assert client.call_many([('ping', None), ('tower', {'wet_bulb_temperature': 22.5})]) == ['pong', first]
+
+
+def test_tower_list_with_heterogeneous_cases_matches_single_requests(server):
+    cases = [{'wet_bulb_temperature': 22.5}, {'water_inlet_temperature': 40.0},
+             {'dry_bulb_temperature': 30.0, 'relative_humidity': 0.5}, {}]
+    with CalcClient(server) as client:
+        batch = client.tower(cases)
+        assert batch == [client.tower(**case) for case in cases]
+    assert all('rejected' not in answer for answer in batch)
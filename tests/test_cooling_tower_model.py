@@ -0,0 +1,38 @@
+import csv
+import numpy as np
+from cooling_tower_model import cooling_tower_model, read_csv_chunks, stream_weather
+
+
+def _write(path, rows):
+    with open(path, 'w', newline='') as file:
+        csv.writer(file).writerows(rows)
+
+
+def test_stream_weather_ignores_timestamps_and_blank_rows(tmp_path):
+    weather = tmp_path / 'weather.csv'
+    _write(weather, [['timestamp', 'wet_bulb_temperature'], ['2024-01-01T00:00', '20'], [],
+                     ['2024-01-01T01:00', '22'], ['2024-01-01T02:00', '24']])
+    totals = stream_weather(str(weather), str(tmp_path / 'out.csv'), chunk_size=2)
+    expected = cooling_tower_model(wet_bulb_temperature=np.array([20.0, 22.0, 24.0]))['fill_volume']
+    assert totals['rejected'] == []
+    assert totals['fill_volume']['count'] == 3
+    assert np.isclose(totals['fill_volume']['sum'], expected.sum())
+    with open(tmp_path / 'out.csv', newline='') as file:
+        assert [row[0] for row in csv.reader(file)] == ['line', '2', '4', '5']
+
+
+def test_stream_weather_reports_bad_cells_and_keeps_going(tmp_path):
+    weather = tmp_path / 'weather.csv'
+    _write(weather, [['timestamp', 'wet_bulb_temperature', 'volume_circulation'], ['t0', '20', '300'],
+                     ['t1', 'n/a', '300'], ['t2', '21'], ['t3', '22', '300']])
+    totals = stream_weather(str(weather))
+    assert totals['rejected'] == [(3, 'wet_bulb_temperature', 'n/a'), (4, 'volume_circulation', '')]
+    assert totals['make_up_water']['count'] == 2
+
+
+def test_read_csv_chunks_converts_only_requested_columns(tmp_path):
+    weather = tmp_path / 'weather.csv'
+    _write(weather, [['timestamp', 'heat_load'], ['2024-01-01T00:00', '1e6'], ['2024-01-01T01:00', '2e6']])
+    (lines, data, rejected), = read_csv_chunks(str(weather), 10, ('heat_load',))
+    assert lines.tolist() == [2, 3] and list(data) == ['heat_load'] and rejected == []
+    np.testing.assert_array_equal(data['heat_load'], [1e6, 2e6])
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from Tools.general import (
+    reynolds, Prandtl, calculate_nusselt, convective_coeff, reynolds_batch, prandtl_batch, calculate_nusselt_batch,
+    convective_coeff_batch
+)
+
+
+def _scalar(function, *args):
+    """Scalar results with NaN where the scalar path raises or returns its zero fallback."""
+    values, valid = [], []
+    for point in zip(*args):
+        try:
+            value = function(*point)
+        except ValueError:
+            value = np.nan
+        valid.append(bool(np.isfinite(value) and value != 0))
+        values.append(value if valid[-1] else np.nan)
+    return np.array(values), np.array(valid)
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(0)
+    n = 20_000
+    Re = 10**rng.uniform(-1, 6, n)
+    Re[:50] = np.array([0.0, -1.0, 0.4, 4, 40, 4000, 40000, 0.39999999999999997, 3999.9999999999995, 1e9] * 5)
+    return dict(Re=Re, Pr=rng.uniform(0.7, 500, n), k=rng.uniform(0.05, 0.4, n), D=rng.uniform(0.01, 0.3, n),
+                G=rng.uniform(1e3, 1e6, n), mu=rng.uniform(0.5, 20, n))
+
+
+def test_nusselt_batch_is_bit_identical_to_scalar(points):
+    Nu, valid = calculate_nusselt_batch(points['Re'], points['Pr'])
+    expected, expected_valid = _scalar(calculate_nusselt, points['Re'].tolist(), points['Pr'].tolist())
+    np.testing.assert_array_equal(valid, expected_valid)
+    np.testing.assert_array_equal(Nu, expected)
+
+
+def test_convective_coeff_batch_is_bit_identical_to_scalar(points):
+    h, valid = convective_coeff_batch(points['Re'], points['Pr'], points['k'], points['D'])
+    expected, expected_valid = _scalar(convective_coeff, *(points[key].tolist() for key in ('Re', 'Pr', 'k', 'D')))
+    np.testing.assert_array_equal(valid, expected_valid)
+    np.testing.assert_array_equal(h, expected)
+
+
+def test_reynolds_and_prandtl_batch_match_scalar(points):
+    diameter = points['D'].copy()
+    diameter[:3] = (0.0, -0.1, np.nan)
+    Re, valid = reynolds_batch(diameter, points['G'], points['mu'])
+    expected, _ = _scalar(reynolds, diameter.tolist(), points['G'].tolist(), points['mu'].tolist())
+    np.testing.assert_array_equal(valid, diameter > 0)
+    np.testing.assert_array_equal(Re[valid], expected[valid])
+    assert np.isnan(Re[~valid]).all()
+    Pr, valid = prandtl_batch(1.0, points['mu'], points['k'])
+    assert valid.all()
+    np.testing.assert_array_equal(Pr, [Prandtl(1.0, mu, k) for mu, k in zip(points['mu'].tolist(), points['k'].tolist())])
@@ -0,0 +1,46 @@
+import pytest
+from benchmarks import OIL, WATER
+from Tools.graph import ModelGraph, double_pipe_graph
+
+
+def _graph()->ModelGraph:
+    fluids = {f'{side}_{name}': value for side, fluid in (('hot', OIL), ('cold', WATER))
+              for name, value in zip(('density', 'cp', 'viscosity', 'conductivity'), fluid)}
+    return double_pipe_graph(size='3*2', hot_flow=9000.0, T_hot_in=250.0, T_hot_out=200.0,
+                             T_cold_in=80.0, T_cold_out=120.0, **fluids)
+
+
+def test_input_change_recomputes_only_downstream_nodes():
+    graph = _graph()
+    before = graph.evaluate(graph.nodes)
+    affected = graph.affected('fouling_factor')
+    assert affected == {'U_d', 'area', 'length', 'forks', 'corrected_length', 'dp_tube'}
+    graph['fouling_factor'] = 0.003
+    assert {name for name in graph.nodes if not graph.is_cached(name)} == affected
+    computations = graph.computations
+    after = graph.evaluate(graph.nodes)
+    assert graph.computations - computations == len(affected)
+    assert after['area'] > before['area']
+    assert all(after[name] is before[name] for name in set(graph.nodes) - affected)
+
+
+def test_unchanged_input_keeps_the_cache_and_matches_a_fresh_graph():
+    graph = _graph()
+    graph.evaluate(graph.nodes)
+    computations = graph.computations
+    graph.update(T_hot_in=250.0, size='3*2')
+    assert all(graph.is_cached(name) for name in graph.nodes)
+    graph['T_cold_out'] = 125.0
+    fresh = _graph()
+    fresh['T_cold_out'] = 125.0
+    assert graph['dp_tube'] == pytest.approx(fresh['dp_tube'], rel=1e-15)
+    assert graph.computations - computations == len(graph.affected('T_cold_out'))
+
+
+def test_nodes_are_not_inputs():
+    graph = ModelGraph({'x': 2}, {'y': lambda x: x + 1, 'z': lambda y, x: y * x})
+    assert graph['z'] == 6 and graph.affected('y') == {'z'}
+    with pytest.raises(KeyError, match='computed node'):
+        graph['y'] = 5
+    with pytest.raises(KeyError, match='neither'):
+        graph['w']
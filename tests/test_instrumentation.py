@@ -0,0 +1,29 @@
+import pytest
+from Tools.general import UnsupportedConfiguration, lmtd, lmtd_engine
+from Tools.instrumentation import instrumented, snapshot
+from Tools.tools import calculate_area, calculate_length, corrected_length, exchanger_efectivity, numb_forks
+
+
+@pytest.mark.parametrize('call', [
+    lambda: lmtd('double pipe', 'cross-flow', 200, 150, 80, 120),
+    lambda: lmtd('plate', 'counter-current', 200, 150, 80, 120),
+    lambda: lmtd_engine('double pipe', 'cross-flow'),
+    lambda: lmtd_engine('plate', 'counter-current'),
+    lambda: exchanger_efectivity('cross-flow', 0.5, 1.0),
+])
+def test_unknown_configuration_and_exchanger_type_are_counted(call):
+    with instrumented():
+        with pytest.raises(UnsupportedConfiguration):
+            call()
+    assert snapshot()['counters'] == {'unknown_config': 1}
+
+
+def test_unsupported_configuration_is_a_value_error():
+    with pytest.raises(ValueError, match='Unsupported exchanger type: plate'):
+        lmtd_engine('plate', 'parallel')
+
+
+def test_design_stages_are_recorded():
+    with instrumented():
+        corrected_length(numb_forks(calculate_length(calculate_area(1e6, 100.0, 50.0), 0.5)))
+    assert {'calculate_area', 'calculate_length', 'numb_forks', 'corrected_length'} <= set(snapshot()['stages'])
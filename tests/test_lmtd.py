@@ -0,0 +1,50 @@
+import warnings
+import numpy as np
+import pytest
+from Tools.general import lmtd, lmtd_batch, lmtd_engine
+
+
+def _temperatures(n:int, seed:int=0):
+    rng = np.random.default_rng(seed)
+    T_hot_in = rng.uniform(150, 400, n)
+    T_hot_out = T_hot_in - rng.uniform(5, 120, n)
+    T_cold_in = rng.uniform(40, 140, n)
+    T_cold_out = T_cold_in + rng.uniform(5, 120, n)
+    return T_hot_in, T_hot_out, T_cold_in, T_cold_out
+
+
+def _scalar(exchanger_type, config, *temperatures):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return np.array([lmtd(exchanger_type, config, *point) for point in zip(*(T.tolist() for T in temperatures))])
+
+
+@pytest.mark.parametrize('exchanger_type', ['double pipe', 'pipe and shell'])
+@pytest.mark.parametrize('config', ['parallel', 'counter-current'])
+def test_engine_matches_scalar_lmtd_and_masks(exchanger_type, config):
+    temperatures = _temperatures(20_000)
+    value, F, valid = lmtd_engine(exchanger_type, config)(*temperatures)
+    expected = _scalar(exchanger_type, config, *temperatures)
+    # Points the scalar formula accepts (finite, positive) are exactly the valid ones.
+    np.testing.assert_array_equal(valid, np.isfinite(expected) & (expected > 0))
+    np.testing.assert_allclose(value[valid], expected[valid], rtol=1e-9)
+    assert np.isnan(value[~valid]).all() and np.isnan(F[~valid]).all()
+    if exchanger_type == 'double pipe':
+        assert (F[valid] == 1).all()
+    np.testing.assert_array_equal(lmtd_batch(exchanger_type, config, *temperatures)[0], value)
+
+
+def test_singular_points_use_their_limits():
+    # Counter-current with equal heat capacity flows: ΔT1 == ΔT2 == 50.
+    value, F, valid = lmtd_engine('double pipe', 'counter-current')(200.0, 150.0, 100.0, 150.0)
+    assert valid and value == pytest.approx(50.0)
+    # Pipe and shell with R == 1: the F-factor limit is finite.
+    T = np.array([200.0, 150.0, 100.0, 150.0]) + np.array([0, 0, 0, 1e-7])[None, :] * np.array([[0.0], [1.0]])
+    value, F, valid = lmtd_engine('pipe and shell', 'counter-current')(*T.T)
+    assert valid.all() and F[0] == pytest.approx(F[1], rel=1e-6)
+
+
+def test_temperature_cross_is_masked():
+    value, F, valid = lmtd_engine('double pipe', 'counter-current')([200.0, 200.0], [100.0, 90.0], [80.0, 95.0], [150.0, 210.0])
+    np.testing.assert_array_equal(valid, [True, False])
+    assert np.isnan(value[1])
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+import merkel
+from merkel import TABLE_NODES, DemandTable, merkel_number
+
+AXES = {'wet_bulb': np.arange(14.0, 27.0), 'range': np.arange(3.0, 13.0), 'approach': np.arange(3.0, 10.0),
+        'L_G': np.arange(0.6, 1.45, 0.1)}
+
+
+def _towers(n:int=200, seed:int=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(4, 12, n), rng.uniform(4, 9, n), rng.uniform(15, 26, n), rng.uniform(0.7, 1.3, n)
+
+
+def test_quadratures_agree():
+    towers = _towers()
+    adaptive = merkel_number(*towers)
+    feasible = np.isfinite(adaptive)
+    assert feasible.sum() > 150
+    np.testing.assert_allclose(merkel_number(*towers, method='gauss', points=16)[feasible], adaptive[feasible], rtol=1e-6)
+    # The CTI four-point Chebyshev rule is an engineering approximation.
+    np.testing.assert_allclose(merkel_number(*towers, method='chebyshev')[feasible], adaptive[feasible], rtol=1e-2)
+    with pytest.raises(ValueError, match='Unsupported method'):
+        merkel_number(*towers, method='simpson')
+
+
+def test_table_matches_the_quadrature():
+    table = DemandTable.build(AXES)
+    wet_bulb, range_, approach, L_G = np.meshgrid(*AXES.values(), indexing='ij')
+    nodes = table(range_, approach, wet_bulb, L_G, fallback=False)
+    exact = np.isfinite(nodes)
+    assert exact.mean() > 0.5
+    gauss = merkel_number(range_[exact], approach[exact], wet_bulb[exact], L_G[exact], method='gauss', points=TABLE_NODES)
+    np.testing.assert_allclose(nodes[exact], gauss, rtol=1e-12)
+    towers = _towers(seed=1)
+    adaptive = merkel_number(*towers)
+    feasible = np.isfinite(adaptive)
+    np.testing.assert_allclose(table(*towers)[feasible], adaptive[feasible], rtol=2e-2)
+
+
+def test_persisted_table_is_rebuilt_after_a_fingerprint_change(tmp_path, monkeypatch):
+    path = str(tmp_path / 'demand.npz')
+    first = DemandTable.load_or_build(path, AXES)
+    again = DemandTable.load_or_build(path, AXES)
+    assert again.fingerprint == first.fingerprint
+    np.testing.assert_array_equal(again.values, first.values)
+    # The fingerprint covers the table settings as well as the axes.
+    monkeypatch.setattr(merkel, 'PINCH_RATIO', 0.3)
+    rebuilt = DemandTable.load_or_build(path, AXES)
+    assert rebuilt.fingerprint != first.fingerprint
+    assert DemandTable.load(path).fingerprint == rebuilt.fingerprint
+    assert np.isfinite(rebuilt.values).sum() >= np.isfinite(first.values).sum()
+    narrow = dict(AXES, L_G=AXES['L_G'][:4])
+    assert DemandTable.load_or_build(path, narrow).values.shape[-1] == 4
+    assert DemandTable.load(path).values.shape[-1] == 4
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from Tools.catalog import CATALOG
+from Tools.optimize import optimal_design
+from Tools.sweep import evaluate_designs
+
+OIL = (53.0, 0.5, 7.0, 0.08)
+WATER = (62.3, 1.0, 1.9, 0.36)
+OPERATING = dict(hot_flow=20_000.0, T_hot_in=250.0, T_hot_out=150.0, T_cold_in=80.0, T_cold_out=120.0)
+
+
+def _brute_force(arms, max_dp_tube, max_dp_shell, min_fouling_margin, fouling_factor):
+    best = np.inf
+    for arm in arms:
+        d = evaluate_designs(CATALOG.columns, {key: np.array([value]) for key, value in OPERATING.items()}, OIL, WATER,
+                             fouling_factor=fouling_factor, fork_length_arm=arm)
+        surface = d['corrected_length'] * CATALOG.columns['linear_surface']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            margin = surface * d['lmtd'] / d['heat_flow'] - 1 / d['U_c']
+        feasible = (d['valid'] & (d['dp_tube'] <= max_dp_tube) & (d['dp_shell'] <= max_dp_shell)
+                    & (margin >= min_fouling_margin))
+        if feasible.any():
+            best = min(best, surface[feasible].min())
+    return best
+
+
+@pytest.mark.parametrize('arms, max_dp, min_margin, fouling', [
+    ((20,), 10, 0, 0), ((10, 15, 20), 10, 0.001, 0.001), ((10, 15, 20), 20, 0, 0.001), ((10, 15, 20), 50, 0, 0),
+    ((10, 15, 20), 50, 0.003, 0.001), ((20,), 3, 0, 0),
+])
+def test_optimal_design_matches_brute_force(arms, max_dp, min_margin, fouling):
+    result = optimal_design(OIL, WATER, fork_length_arms=arms, max_dp_tube=max_dp, max_dp_shell=max_dp,
+                            min_fouling_margin=min_margin, fouling_factor=fouling, **OPERATING)
+    expected = _brute_force(arms, max_dp, max_dp, min_margin, fouling)
+    if np.isinf(expected):
+        assert result['design'] is None
+    else:
+        assert result['objective'] == pytest.approx(expected, rel=1e-12)
+    assert result['pruned'] + result['invalid'] + result['evaluated'] + result['skipped'] == result['candidates']
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from Tools.general import lmtd
+from Tools.pinch import area_target, catalog_sizes, composite_curve, composite_curves, pinch_targets, problem_table
+
+# Kemp, Pinch Analysis and Process Integration, four-stream example (kW/K, °C).
+CP = np.array([20.0, 15.0, 30.0, 25.0])
+SUPPLY = np.array([20.0, 250.0, 140.0, 200.0])
+TARGET = np.array([180.0, 40.0, 230.0, 80.0])
+
+
+def test_kemp_example_targets():
+    targets = problem_table(CP, 1.0, SUPPLY, TARGET, 10.0)
+    assert targets['hot_utility'][0] == pytest.approx(750.0)
+    assert targets['cold_utility'][0] == pytest.approx(1000.0)
+    assert targets['pinch'][0] == pytest.approx(145.0)
+    assert (targets['hot_pinch'][0], targets['cold_pinch'][0]) == pytest.approx((150.0, 140.0))
+    assert targets['units'][0] == 7 and not targets['threshold'][0]
+    # Grand composite: zero at the pinch, the utilities at its ends.
+    grand = targets['grand_composite'][0]
+    assert grand.min() == pytest.approx(0.0, abs=1e-9)
+    assert (grand[0], grand[-1]) == pytest.approx((750.0, 1000.0))
+
+
+def test_sweep_matches_single_runs_and_balances():
+    dT_min = np.linspace(0, 40, 21)
+    sweep = problem_table(CP, 1.0, SUPPLY, TARGET, dT_min)
+    for i, dT in enumerate(dT_min):
+        single = problem_table(CP, 1.0, SUPPLY, TARGET, dT)
+        assert sweep['hot_utility'][i] == pytest.approx(single['hot_utility'][0], abs=1e-9)
+    np.testing.assert_allclose(sweep['cold_utility'] - sweep['hot_utility'], 6150.0 - 5900.0)
+    assert np.all(np.diff(sweep['hot_utility']) >= -1e-9)
+
+
+def test_composite_curves_of_kemp_example():
+    hot = SUPPLY > TARGET
+    temperatures, duty = composite_curve(CP[hot], 1.0, SUPPLY[hot], TARGET[hot])
+    assert (temperatures[0], temperatures[-1], duty[-1]) == pytest.approx((40.0, 250.0, 6150.0))
+    assert np.interp(80.0, temperatures, duty) == pytest.approx(15.0 * 40)
+    curves = composite_curves(CP, 1.0, SUPPLY, TARGET, 10.0)
+    assert curves['cold_duty'][0] == pytest.approx(1000.0)
+    assert curves['cold_duty'][-1] - curves['hot_duty'][-1] == pytest.approx(750.0)
+
+
+def test_threshold_problem_has_no_pinch():
+    targets = problem_table([10.0, 10.0], 1.0, [200.0, 50.0], [100.0, 80.0], 10.0)
+    assert targets['hot_utility'][0] == 0 and targets['cold_utility'][0] == pytest.approx(700.0)
+    assert targets['threshold'][0] and np.isnan(targets['pinch'][0]) and targets['units'][0] == 2
+
+
+def test_single_match_area_is_one_counter_current_exchanger():
+    area = area_target([1000.0, 2000.0], 1.0, [200.0, 60.0], [100.0, 110.0], [50.0, 80.0], 10.0)
+    expected = 1e5 * (1 / 50 + 1 / 80) / lmtd('double pipe', 'counter-current', 200, 100, 60, 110)
+    assert area == pytest.approx(expected, rel=1e-12)
+
+
+def test_area_sweep_and_catalog_sizes():
+    targets = pinch_targets(CP * 1000, 1.0, SUPPLY, TARGET, [10.0, 20.0], h=100.0,
+                            hot_utility=(300.0, 299.0, 1000.0), cold_utility=(10.0, 30.0, 500.0))
+    assert np.all(np.isfinite(targets['area'])) and targets['area'][0] > targets['area'][1]
+    catalog = targets['catalog']
+    assert np.all(catalog['surface'] >= targets['area'])
+    np.testing.assert_array_equal(catalog['surface'], np.nanmin(catalog['candidate_surface'], axis=1))
+    sized = catalog_sizes(targets['area'] / targets['units'], 1)
+    np.testing.assert_allclose(sized['surface'] * targets['units'], catalog['surface'])
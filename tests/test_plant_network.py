@@ -0,0 +1,40 @@
+import numpy as np
+from plant_network import PlantNetwork
+
+
+def _cooling_loop(UA, wet_bulb=22.0):
+    network = PlantNetwork()
+    network.stream('oil_in', 20_000, cp=2.1, temperature=120)
+    network.stream('oil_out', 20_000, cp=2.1)
+    network.stream('supply', 50_000)
+    network.stream('return', 50_000)
+    network.exchanger('E1', 'oil_in', 'oil_out', 'supply', 'return', UA=UA)
+    network.tower('CT', 'return', 'supply', characteristic=1.2, air_flow=60_000, wet_bulb=wet_bulb)
+    return network
+
+
+def test_recycle_loop_balances_exchanger_and_tower_duty():
+    result = _cooling_loop(np.array([5e4, 8e4, 1.2e5])).solve()
+    assert result['converged'].all()
+    assert result['tear_streams']
+    np.testing.assert_allclose(result['duties']['E1'], result['duties']['CT'], rtol=1e-9)
+    supply = result['temperatures']['supply']
+    assert ((supply > 22.0) & (supply < result['temperatures']['return'])).all()
+
+
+def test_many_scenarios_converge_to_the_single_scenario_solutions():
+    rng = np.random.default_rng(0)
+    UA, wet_bulb = rng.uniform(3e4, 1.5e5, 1000), rng.uniform(10, 28, 1000)
+    result = _cooling_loop(UA, wet_bulb).solve()
+    assert result['converged'].all()
+    np.testing.assert_allclose(result['duties']['E1'], result['duties']['CT'], rtol=1e-9)
+    for i in (0, 499, 999):
+        single = _cooling_loop(UA[i], wet_bulb[i]).solve()
+        np.testing.assert_allclose(result['temperatures']['supply'][i], single['temperatures']['supply'][0], rtol=1e-9)
+
+
+def test_unreachable_or_non_finite_scenarios_are_not_converged():
+    network = _cooling_loop(np.array([8e4, np.nan]))
+    assert network.solve()['converged'].tolist() == [True, False]
+    # Starting above TOWER_INLET_RANGE must not report the first sweep as a solution.
+    assert not _cooling_loop(np.array([8e4])).solve(initial=300.0)['converged'].any()
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from Tools.properties import FLUIDS, PROPERTIES, fluid_properties, properties_at
+from Tools.tables import fluid_property_data
+
+
+@pytest.mark.parametrize('substance', sorted(fluid_property_data))
+def test_interpolant_reproduces_the_table(substance):
+    data = fluid_property_data[substance]
+    values, valid = fluid_properties(substance, data['T'])
+    assert valid.all()
+    expected = np.stack([data[name] for name in PROPERTIES], axis=-1)
+    np.testing.assert_allclose(values, expected, rtol=1e-12)
+
+
+@pytest.mark.parametrize('substance', sorted(fluid_property_data))
+def test_interpolant_is_monotone_within_every_interval(substance):
+    T = FLUIDS[substance].T
+    s = np.linspace(0, 1, 101)
+    grid = T[:-1, None] + s * np.diff(T)[:, None]
+    values, _ = fluid_properties(substance, grid)
+    steps = np.diff(values, axis=1)
+    ends = values[:, -1] - values[:, 0]
+    # Fritsch-Carlson slopes keep each cubic between its end values, moving in one direction.
+    slack = 1e-12 * np.abs(values).max(axis=1)
+    assert (steps * np.sign(ends)[:, None, :] >= -slack[:, None, :]).all()
+    low, high = np.minimum(values[:, 0], values[:, -1]), np.maximum(values[:, 0], values[:, -1])
+    assert ((values >= low[:, None] - slack[:, None]) & (values <= high[:, None] + slack[:, None])).all()
+
+
+def test_outside_the_table_is_nan_and_unknown_substance_raises():
+    T = FLUIDS['water'].T
+    values, valid = fluid_properties('Water', [T[0] - 1, T[-1] + 1])
+    assert not valid.any() and np.isnan(values).all()
+    with pytest.raises(ValueError, match='outside'):
+        properties_at('water', float(T[-1] + 1))
+    with pytest.raises(ValueError, match='Unsupported substance'):
+        fluid_properties('mercury', 100.0)
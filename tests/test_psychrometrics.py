@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+from psychrometrics import air_state, hyland_wexler_saturation_pressure, saturation_pressure
+
+# Saturation pressure of water (kPa), ASHRAE Fundamentals to 4-5 figures, over ice below 0 °C.
+REFERENCE = {-40.0: 0.01285, -20.0: 0.10326, 0.0: 0.6112, 20.0: 2.3389, 25.0: 3.1693,
+             40.0: 7.3849, 60.0: 19.946, 80.0: 47.414, 100.0: 101.42}
+
+
+@pytest.mark.parametrize('function', [hyland_wexler_saturation_pressure, saturation_pressure])
+def test_saturation_pressure_matches_reference_points(function):
+    T = np.array(list(REFERENCE))
+    np.testing.assert_allclose(function(T), list(REFERENCE.values()), rtol=5e-4)
+
+
+def test_table_follows_the_formula_and_is_nan_outside():
+    T = np.linspace(-60, 120, 20001)
+    np.testing.assert_allclose(saturation_pressure(T), hyland_wexler_saturation_pressure(T), rtol=1e-4)
+    assert np.isnan(saturation_pressure([-60.1, 120.1, np.nan])).all()
+
+
+def test_wet_bulb_and_relative_humidity_describe_the_same_air():
+    state = air_state(30.0, wet_bulb=22.0)
+    again = air_state(30.0, relative_humidity=state['relative_humidity'])
+    np.testing.assert_allclose(again['humidity_ratio'], state['humidity_ratio'], rtol=1e-12)
+    saturated = air_state(25.0, wet_bulb=25.0)
+    np.testing.assert_allclose(saturated['relative_humidity'], 1.0, rtol=1e-9)
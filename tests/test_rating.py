@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from Tools.general import UnsupportedConfiguration
+from Tools.rating import RATING_CONFIGS, rate, rate_variable
+
+HOT, COLD = (2e4, 0.5, 250.0), (1e4, 1.0, 80.0)
+
+
+def _oil_cp(T):
+    return 0.45 + 6e-4 * np.asarray(T)
+
+
+def test_counter_current_balanced_streams_use_the_limit():
+    NTU_value = np.array([0.0, 0.5, 2.0, 20.0])
+    result = rate('counter-current', 1e4, 1.0, 250.0, 1e4, 1.0, 80.0, NTU_value * 1e4)
+    np.testing.assert_allclose(result['effectiveness'], NTU_value / (1 + NTU_value), rtol=1e-12)
+    near = rate('counter-current', 1e4, 1.0, 250.0, 1e4 * (1 + 1e-9), 1.0, 80.0, NTU_value * 1e4)
+    np.testing.assert_allclose(near['effectiveness'], result['effectiveness'], rtol=1e-8)
+    assert result['valid'].all()
+
+
+@pytest.mark.parametrize('config', RATING_CONFIGS)
+def test_constant_properties_reproduce_rate(config):
+    UA = np.linspace(1e3, 5e4, 50)
+    expected = rate(config, *HOT, *COLD, UA)
+    result = rate_variable(config, *HOT, *COLD, UA)
+    assert result['valid'].all()
+    for key in ('T_hot_out', 'T_cold_out', 'duty', 'effectiveness', 'NTU'):
+        np.testing.assert_allclose(result[key], expected[key], rtol=1e-12)
+
+
+def test_a_non_finite_step_does_not_accept_the_starting_duty():
+    calls = []
+
+    def UA(T_hot, T_cold):
+        # The finite-difference evaluation of the first Newton step fails once.
+        calls.append(None)
+        return np.full(np.shape(T_hot), np.nan if len(calls) == 3 else 2e4)
+
+    expected = rate_variable('counter-current', 2e4, _oil_cp, 250.0, 1e4, 1.0, 80.0, np.array([2e4]))
+    result = rate_variable('counter-current', 2e4, _oil_cp, 250.0, 1e4, 1.0, 80.0, UA)
+    assert result['valid'].all()
+    np.testing.assert_allclose(result['duty'], expected['duty'], rtol=1e-9)
+
+
+def test_unknown_configuration_raises():
+    with pytest.raises(UnsupportedConfiguration, match='cross-flow'):
+        rate('cross-flow', *HOT, *COLD, 1e4)
+    with pytest.raises(ValueError):
+        rate_variable('cross-flow', *HOT, *COLD, 1e4)
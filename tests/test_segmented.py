@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from Tools.catalog import CATALOG
+from Tools.segmented import segmented_design, segmented_rating
+from Tools.sweep import OPERATING_COLUMNS, evaluate_cases
+
+OIL = (53.0, 0.5, 7.0, 0.08)
+WATER = (62.3, 1.0, 1.9, 0.36)
+
+
+def _cases(n:int, seed:int=0):
+    rng = np.random.default_rng(seed)
+    rows = np.arange(n) % len(CATALOG)
+    geometry = {key: column[rows] for key, column in CATALOG.columns.items()}
+    T_hot_in = rng.uniform(200, 300, n)
+    T_cold_in = rng.uniform(60, 100, n)
+    operating = dict(hot_flow=rng.uniform(5e3, 3e4, n), T_hot_in=T_hot_in, T_hot_out=T_hot_in - rng.uniform(30, 80, n),
+                     T_cold_in=T_cold_in, T_cold_out=T_cold_in + rng.uniform(20, 50, n))
+    return geometry, operating
+
+
+@pytest.mark.parametrize('config', ['counter-current', 'parallel'])
+def test_constant_properties_reproduce_the_lumped_design(config):
+    geometry, operating = _cases(400)
+    segmented = segmented_design(geometry, operating, OIL, WATER, config=config)
+    lumped = evaluate_cases(geometry, operating, OIL, WATER, config=config)
+    valid = segmented['valid']
+    assert valid.sum() > 100
+    np.testing.assert_array_equal(valid, lumped['valid'])
+    np.testing.assert_allclose(segmented['area'][valid], lumped['area'][valid], rtol=1e-9)
+    np.testing.assert_allclose(segmented['lumped_area'][valid], lumped['area'][valid], rtol=1e-12)
+
+
+@pytest.mark.parametrize('config', ['counter-current', 'parallel'])
+def test_rating_the_designed_length_recovers_the_outlets(config):
+    geometry, operating = _cases(200, seed=1)
+    design = segmented_design(geometry, operating, OIL, WATER, config=config)
+    valid = design['valid']
+    rows = {key: value[valid] for key, value in geometry.items()}
+    op = {key: operating[key][valid] for key in OPERATING_COLUMNS}
+    rating = segmented_rating(rows, OIL, WATER, op['hot_flow'], op['T_hot_in'], design['cold_flow'][valid],
+                              op['T_cold_in'], design['length'][valid], config=config, tolerance=1e-4)
+    assert rating['valid'].all() and rating['converged'].all()
+    np.testing.assert_allclose(rating['T_hot_out'], op['T_hot_out'], atol=1e-2)
+    np.testing.assert_allclose(rating['T_cold_out'], op['T_cold_out'], atol=1e-2)
+
+
+@pytest.mark.parametrize('max_segments', [16, 8])
+def test_no_refinement_evaluates_once_at_the_given_segments(max_segments):
+    geometry, operating = _cases(100, seed=2)
+    fixed = segmented_design(geometry, operating, OIL, WATER, segments=16, max_segments=max_segments)
+    refined = segmented_design(geometry, operating, OIL, WATER, segments=16)
+    valid = fixed['valid']
+    np.testing.assert_array_equal(valid, refined['valid'])
+    assert valid.sum() > 20 and not fixed['converged'].any() and (fixed['segments'] == 16).all()
+    np.testing.assert_allclose(fixed['area'][valid], refined['area'][valid], rtol=1e-3)
@@ -0,0 +1,39 @@
+import dataclasses
+import numpy as np
+import pytest
+from cooling_tower_model import cases_from_specs, cooling_tower, cooling_tower_model, spec_inputs
+from specs_cooling_tower import Air, AirSpec, CaseBatch, Technical, TechnicalSpec, Water, WaterSpec
+
+
+@pytest.mark.parametrize('spec', [WaterSpec(), AirSpec(), TechnicalSpec()])
+def test_specs_are_frozen_and_slotted(spec):
+    field = dataclasses.fields(spec)[0].name
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        setattr(spec, field, 0)
+    assert not hasattr(spec, '__dict__')
+
+
+def test_specs_match_the_mutable_defaults():
+    assert spec_inputs(WaterSpec(), AirSpec(), TechnicalSpec()) == spec_inputs(Water(), Air(), Technical())
+
+
+def test_case_batch_round_trip(tmp_path):
+    batch = CaseBatch({'wet_bulb_temperature': np.linspace(18, 26, 9), 'L': 3.55})
+    path = tmp_path / 'cases.npy'
+    batch.save(str(path))
+    for mmap in (True, False):
+        loaded = CaseBatch.load(str(path), mmap=mmap)
+        assert loaded.names == batch.names and len(loaded) == 9
+        np.testing.assert_array_equal(loaded['wet_bulb_temperature'], batch['wet_bulb_temperature'])
+        np.testing.assert_array_equal(loaded['L'], np.full(9, 3.55))
+    assert len(batch[2:5]) == 3 and len(batch[batch['wet_bulb_temperature'] > 24]) == 2
+    assert batch[4]['wet_bulb_temperature'].tolist() == [22.0]
+
+
+def test_batch_from_specs_matches_one_case_at_a_time():
+    specs = [(WaterSpec(inlet_temperature=T), AirSpec(), TechnicalSpec(wet_bulb_temperature=T - 9)) for T in (30, 32, 35)]
+    batch = cases_from_specs(specs)
+    results = cooling_tower_model(batch)
+    for i, (water, air, technical) in enumerate(specs):
+        single = cooling_tower(water, air, technical)
+        assert results['fill_volume'][i] == pytest.approx(float(single['fill_volume']), rel=1e-12)
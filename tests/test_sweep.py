@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+from benchmarks import OIL, WATER
+from Tools.sweep import design_sweep, evaluate_designs, geometry_columns, operating_grid
+
+RANGES = dict(hot_flow=[8e3, 1.2e4], T_hot_in=[250.0], T_hot_out=[200.0], T_cold_in=[80.0], T_cold_out=[110.0, 120.0])
+
+
+def test_chunked_sweep_matches_one_evaluation():
+    result = design_sweep(OIL, WATER, **RANGES, chunk_size=3, workers=1)
+    expected = evaluate_designs(geometry_columns(('double pipe', 'pipe and shell')), operating_grid(**RANGES), OIL, WATER)
+    assert result.keys() == expected.keys()
+    assert result['valid'].any()
+    for key, value in expected.items():
+        np.testing.assert_array_equal(np.sort(result[key]), np.sort(value))
+
+
+@pytest.mark.parametrize('ranges, exchanger_types', [
+    (dict(RANGES, hot_flow=[]), ('double pipe', 'pipe and shell')),
+    (RANGES, ()),
+])
+def test_empty_grid_or_geometry_gives_empty_columns(ranges, exchanger_types):
+    result = design_sweep(OIL, WATER, **ranges, exchanger_types=exchanger_types, workers=1)
+    assert 'valid' in result and 'area' in result
+    assert all(len(value) == 0 for value in result.values())
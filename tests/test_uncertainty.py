@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from uncertainty import QuantileSketch, propagate, tower_model, transform, uniforms
+
+TOWER = {'wet_bulb_temperature': ('normal', 21, 0.8), 'allowable_evaporating_losses': ('uniform', 0.0005, 0.002)}
+
+
+def _rank(values:np.ndarray, estimate:float)->float:
+    return np.searchsorted(np.sort(values), estimate) / len(values)
+
+
+@pytest.mark.parametrize('q', [0.0, 0.05, 0.5, 0.9, 0.95, 1.0])
+def test_sketch_matches_np_quantile_on_narrow_spread(q):
+    values = 33.85 + 1e-4 * np.random.default_rng(1).standard_normal(500_000)
+    sketch = QuantileSketch()
+    for chunk in np.array_split(values, 8):
+        part = QuantileSketch()
+        part.add(chunk)
+        sketch.merge(part)
+    estimate = sketch.quantile(q)
+    assert values.min() <= estimate <= values.max()
+    assert abs(_rank(values, estimate) - q) < 2e-3
+    if q in (0.0, 1.0):
+        assert estimate == np.quantile(values, q)
+
+
+def test_sketch_is_exact_below_its_size():
+    values = np.random.default_rng(2).uniform(-1, 1, 1000)
+    sketch = QuantileSketch()
+    sketch.add(values)
+    for q in (0.05, 0.5, 0.9):
+        assert sketch.quantile(q) == pytest.approx(np.quantile(values, q), abs=np.ptp(values) / len(values))
+
+
+def test_tower_quantiles_match_np_quantile():
+    n = 50_000
+    summary = propagate(tower_model, TOWER, n=n)['make_up_water']
+    u = uniforms('sobol', 0, 0, n, len(TOWER), 0)
+    inputs = {name: transform(distribution, u[:, i]) for i, (name, distribution) in enumerate(TOWER.items())}
+    values = tower_model(inputs)['make_up_water']
+    assert summary['min'] <= summary['p05'] < summary['p50'] < summary['p90'] < summary['p95'] <= summary['max']
+    for q in (0.05, 0.5, 0.9, 0.95):
+        assert abs(_rank(values, summary[f'p{round(q * 100):02d}']) - q) < 2e-3
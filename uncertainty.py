@@ -0,0 +1,359 @@
+"""Monte Carlo uncertainty propagation through the exchanger and cooling tower models.
+
+    from uncertainty import propagate, exchanger_model, tower_model
+    tower = propagate(tower_model, {'wet_bulb_temperature': ('normal', 21, 0.8),
+                                    'allowable_evaporating_losses': ('uniform', 0.0005, 0.002)}, n=10_000_000)
+    tower['make_up_water']['p90']
+
+Uncertain inputs are given as distributions:
+
+    ('uniform', low, high)      ('normal', mean, std)      ('lognormal', mu, sigma)
+    ('triangular', low, mode, high)                        a number (fixed)
+
+Samples come from a scrambled Sobol sequence (default), Latin hypercube
+chunks or plain pseudo-random numbers. They are evaluated `chunk_size` at
+a time; every chunk only leaves running moments and a quantile sketch
+behind, so memory does not grow with `n`. Chunk k is generated from
+(seed, k) alone, and chunks are merged in order, so results do not depend
+on the number of worker processes.
+"""
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import numpy as np
+from Tools.catalog import CATALOG
+from Tools.sweep import OPERATING_COLUMNS, evaluate_cases
+from cooling_tower_model import cooling_tower_model, weather_inputs
+
+SAMPLERS = ('sobol', 'lhs', 'random')
+QUANTILES = (0.05, 0.5, 0.9, 0.95)
+
+# Sobol direction numbers (Joe & Kuo, new-joe-kuo-6.21201): degree s, polynomial a, initial m_1..m_s.
+_SOBOL_POLYNOMIALS = (
+    (1, 0, (1,)), (2, 1, (1, 3)), (3, 1, (1, 3, 1)), (3, 2, (1, 1, 1)), (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)), (5, 2, (1, 1, 5, 5, 17)), (5, 4, (1, 1, 5, 5, 5)), (5, 7, (1, 1, 7, 11, 19)),
+    (5, 11, (1, 1, 5, 1, 1)), (5, 13, (1, 1, 1, 3, 11)), (5, 14, (1, 3, 5, 5, 31)), (6, 1, (1, 3, 3, 9, 7, 49)),
+    (6, 13, (1, 1, 1, 15, 21, 21)), (6, 16, (1, 3, 1, 13, 27, 49)), (6, 19, (1, 1, 1, 15, 7, 5)),
+    (6, 22, (1, 3, 1, 15, 13, 25)), (6, 25, (1, 1, 5, 5, 19, 61)), (7, 1, (1, 3, 7, 11, 23, 15, 103)),
+    (7, 4, (1, 3, 7, 13, 13, 15, 69)),
+)
+_SOBOL_BITS = 32
+
+
+def _sobol_directions()->np.ndarray:
+    """Direction numbers V[dimension, bit] scaled to 32 bits; dimension 0 is the van der Corput sequence."""
+    V = np.zeros((len(_SOBOL_POLYNOMIALS) + 1, _SOBOL_BITS), dtype=np.uint64)
+    V[0] = [1 << (_SOBOL_BITS - 1 - i) for i in range(_SOBOL_BITS)]
+    for d, (s, a, m) in enumerate(_SOBOL_POLYNOMIALS, 1):
+        m = list(m)
+        for i in range(s, _SOBOL_BITS):
+            value = m[i - s] ^ (m[i - s] << s)
+            for k in range(1, s):
+                if (a >> (s - 1 - k)) & 1:
+                    value ^= m[i - k] << k
+            m.append(value)
+        V[d] = [m[i] << (_SOBOL_BITS - 1 - i) for i in range(_SOBOL_BITS)]
+    return V
+
+
+_SOBOL_V = _sobol_directions()
+MAX_SOBOL_DIMENSIONS = len(_SOBOL_V)
+
+
+def sobol(start:int, n:int, dimensions:int, seed:int|None = 0)->np.ndarray:
+    """Points start..start+n-1 of a Sobol sequence in (0, 1)^dimensions, shape (n, dimensions).
+
+    Points are taken directly from their index (Gray-code order), so any
+    chunk can be generated on its own. A seed applies a random digital
+    shift per dimension, which keeps the net properties; None gives the
+    unscrambled sequence. Values sit at the centre of their 2^-32 cell and
+    are never 0 or 1.
+    """
+    if dimensions > MAX_SOBOL_DIMENSIONS:
+        raise ValueError(f'Sobol sampling supports up to {MAX_SOBOL_DIMENSIONS} dimensions, got {dimensions}.')
+    index = np.arange(start, start + n, dtype=np.uint64)
+    gray = index ^ (index >> np.uint64(1))
+    x = np.zeros((n, dimensions), dtype=np.uint64)
+    for bit in range(_SOBOL_BITS):
+        on = ((gray >> np.uint64(bit)) & np.uint64(1)).astype(bool)
+        if on.any():
+            x[on] ^= _SOBOL_V[:dimensions, bit]
+    if seed is not None:
+        shift = np.random.default_rng(np.random.SeedSequence([seed, 0x50B01])).integers(0, 1 << _SOBOL_BITS, dimensions, dtype=np.uint64)
+        x ^= shift
+    return (x.astype(float) + 0.5) / float(1 << _SOBOL_BITS)
+
+
+def latin_hypercube(n:int, dimensions:int, rng:np.random.Generator)->np.ndarray:
+    """n points in (0, 1)^dimensions with exactly one point per 1/n stratum in every dimension."""
+    strata = np.argsort(rng.random((dimensions, n)), axis=1).T
+    return (strata + rng.random((n, dimensions))) / n
+
+
+def uniforms(method:str, chunk:int, start:int, n:int, dimensions:int, seed:int)->np.ndarray:
+    """Uniform samples of one chunk; chunk `chunk` depends only on (seed, chunk)."""
+    if method == 'sobol':
+        return sobol(start, n, dimensions, seed)
+    rng = np.random.default_rng(np.random.SeedSequence([seed, chunk]))
+    if method == 'lhs':
+        return latin_hypercube(n, dimensions, rng)
+    if method == 'random':
+        return rng.random((n, dimensions))
+    raise ValueError(f'Unsupported sampler: {method}')
+
+
+# Acklam's rational approximation of the normal quantile (relative error < 1.2e-9).
+_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02, 1.383577518672690e+02,
+      -3.066479806614716e+01, 2.506628277459239e+00)
+_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02, 6.680131188771972e+01,
+      -1.328068155288572e+01)
+_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00, -2.549732539343734e+00,
+      4.374664141464968e+00, 2.938163982698783e+00)
+_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00, 3.754408661907416e+00)
+
+
+def normal_quantile(u:np.ndarray)->np.ndarray:
+    """Inverse standard normal CDF for u in (0, 1)."""
+    u = np.asarray(u, dtype=float)
+    tail = np.minimum(u, 1 - u)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        q = u - 0.5
+        r = q * q
+        central = (((((_A[0] * r + _A[1]) * r + _A[2]) * r + _A[3]) * r + _A[4]) * r + _A[5]) * q / \
+                  (((((_B[0] * r + _B[1]) * r + _B[2]) * r + _B[3]) * r + _B[4]) * r + 1)
+        t = np.sqrt(-2 * np.log(tail))
+        outer = (((((_C[0] * t + _C[1]) * t + _C[2]) * t + _C[3]) * t + _C[4]) * t + _C[5]) / \
+                ((((_D[0] * t + _D[1]) * t + _D[2]) * t + _D[3]) * t + 1)
+    return np.where(tail < 0.02425, np.where(u < 0.5, outer, -outer), central)
+
+
+def transform(distribution, u:np.ndarray)->np.ndarray:
+    """Samples of `distribution` from uniforms `u` (inverse CDF)."""
+    if np.isscalar(distribution):
+        return np.full(u.shape, float(distribution))
+    kind, *parameters = distribution
+    if kind == 'uniform':
+        low, high = parameters
+        return low + (high - low) * u
+    if kind == 'normal':
+        mean, std = parameters
+        return mean + std * normal_quantile(u)
+    if kind == 'lognormal':
+        mu, sigma = parameters
+        return np.exp(mu + sigma * normal_quantile(u))
+    if kind == 'triangular':
+        low, mode, high = parameters
+        split = (mode - low) / (high - low)
+        return np.where(u < split, low + np.sqrt(u * (high - low) * (mode - low)),
+                        high - np.sqrt((1 - u) * (high - low) * (high - mode)))
+    raise ValueError(f'Unsupported distribution: {kind}')
+
+
+class RunningStats:
+    """Count, mean, variance, min and max of a stream, mergeable across chunks (Chan et al.)."""
+
+    def __init__(self):
+        self.count, self.mean, self.m2 = 0, 0.0, 0.0
+        self.min, self.max = np.inf, -np.inf
+
+    def add(self, values:np.ndarray):
+        other = RunningStats()
+        if len(values):
+            other.count, other.mean = len(values), float(values.mean())
+            other.m2 = float(((values - other.mean)**2).sum())
+            other.min, other.max = float(values.min()), float(values.max())
+        self.merge(other)
+
+    def merge(self, other:'RunningStats'):
+        count = self.count + other.count
+        if other.count:
+            delta = other.mean - self.mean
+            self.mean += delta * other.count / count
+            self.m2 += other.m2 + delta**2 * self.count * other.count / count
+            self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+            self.count = count
+
+    @property
+    def variance(self)->float:
+        return self.m2 / (self.count - 1) if self.count > 1 else np.nan
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with a bounded rank error (KLL compactor layout).
+
+    Values are kept in levels; a value on level h stands for 2**h samples.
+    When a level holds more than `size` values it is sorted and every other
+    value moves up one level, alternating the starting offset so that the
+    rank errors cancel. The rank error is at most about
+    log2(count / size) / size of the count and does not depend on the
+    spread or sign of the data. Compaction is deterministic, so merging the
+    same sketches in the same order gives the same quantiles. Quantiles are
+    clamped to the exact min and max.
+    """
+
+    def __init__(self, size:int=4096):
+        self.size = size
+        self.levels = []
+        self._offsets = []
+        self.count = 0
+        self.min, self.max = np.inf, -np.inf
+
+    def add(self, values:np.ndarray):
+        values = np.asarray(values, dtype=float).ravel()
+        if not len(values):
+            return
+        self.count += len(values)
+        self.min, self.max = min(self.min, float(values.min())), max(self.max, float(values.max()))
+        self._insert(0, values)
+        self._compress()
+
+    def merge(self, other:'QuantileSketch'):
+        if not other.count:
+            return
+        self.count += other.count
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+        for h, level in enumerate(other.levels):
+            self._insert(h, level)
+        self._compress()
+
+    def quantile(self, q:float)->float:
+        if not self.count:
+            return np.nan
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0**h) for h, level in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        # Midpoint ranks of the weighted values, read like np.quantile's linear interpolation.
+        cumulative = np.cumsum(weights[order])
+        ranks = (cumulative - weights[order] / 2) * (self.count - 1) / self.count
+        ranks = np.concatenate([[0.0], ranks, [self.count - 1.0]])
+        value = float(np.interp(q * (self.count - 1), ranks, np.concatenate([[self.min], values[order], [self.max]])))
+        return min(max(value, self.min), self.max)
+
+    def _insert(self, h:int, values:np.ndarray):
+        while len(self.levels) <= h:
+            self.levels.append(np.empty(0))
+            self._offsets.append(0)
+        self.levels[h] = np.concatenate([self.levels[h], values])
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self.size:
+                level = np.sort(level)
+                # An odd value out stays behind; the rest pair up and one of each pair moves up.
+                keep, level = level[:len(level) % 2], level[len(level) % 2:]
+                self.levels[h] = keep
+                self._insert(h + 1, level[self._offsets[h]::2])
+                self._offsets[h] ^= 1
+            h += 1
+
+
+def _chunk_statistics(model, distributions:dict, fixed:dict, method:str, seed:int, n:int, chunk_size:int,
+                      sketch_size:int, chunk:int)->dict:
+    """Sample and evaluate one chunk; only its statistics are returned."""
+    start = chunk * chunk_size
+    size = min(chunk_size, n - start)
+    names = list(distributions)
+    u = uniforms(method, chunk, start, size, len(names), seed)
+    inputs = {name: transform(distributions[name], u[:, i]) for i, name in enumerate(names)}
+    outputs = model({**fixed, **inputs})
+    statistics = {}
+    for name, values in outputs.items():
+        values = np.broadcast_to(np.asarray(values, dtype=float), (size,))
+        finite = values[np.isfinite(values)]
+        stats, sketch = RunningStats(), QuantileSketch(sketch_size)
+        stats.add(finite)
+        sketch.add(finite)
+        statistics[name] = (stats, sketch, size - len(finite))
+    return statistics
+
+
+def propagate(model, distributions:dict, n:int, fixed:dict|None = None, method:str='sobol', seed:int=0,
+              chunk_size:int=65536, workers:int|None = 1, sketch_size:int=4096,
+              quantiles:tuple[float, ...]=QUANTILES)->dict[str, dict]:
+    """Propagate input uncertainty through `model` with `n` samples.
+
+    Args:
+        model: Module-level function of a dict of input arrays returning a
+        dict of output arrays, such as `exchanger_model` or `tower_model`
+        (bind options with functools.partial).
+        distributions (dict): Input name -> distribution (see module docstring).
+        fixed (dict): Inputs that are not sampled.
+        method (str): 'sobol', 'lhs' (one Latin hypercube per chunk) or 'random'.
+        chunk_size (int): Samples per chunk; a power of two keeps Sobol chunks balanced.
+        workers (int): Processes; None uses every core, 1 stays in-process.
+        sketch_size (int): Values per level of the quantile sketch; the quantile
+        rank error is about log2(n / sketch_size) / sketch_size.
+
+    Returns:
+        dict[str, dict]: Per output: count, invalid (non-finite results),
+        mean, std, min, max and p05/p50/p90/... for `quantiles`.
+    """
+    if method not in SAMPLERS:
+        raise ValueError(f'Unsupported sampler: {method}')
+    chunks = range(math.ceil(n / chunk_size))
+    task = partial(_chunk_statistics, model, distributions, fixed or {}, method, seed, n, chunk_size, sketch_size)
+    workers = min(workers or os.cpu_count() or 1, len(chunks)) or 1
+    totals = {}
+
+    def merge(statistics):
+        for name, (stats, sketch, invalid) in statistics.items():
+            if name not in totals:
+                totals[name] = [RunningStats(), QuantileSketch(sketch_size), 0]
+            totals[name][0].merge(stats)
+            totals[name][1].merge(sketch)
+            totals[name][2] += invalid
+
+    if workers <= 1:
+        for chunk in chunks:
+            merge(task(chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for statistics in pool.map(task, chunks):
+                merge(statistics)
+    summary = {}
+    for name, (stats, sketch, invalid) in totals.items():
+        summary[name] = dict(count=stats.count, invalid=invalid, mean=stats.mean, std=math.sqrt(stats.variance),
+                             min=stats.min, max=stats.max)
+        summary[name].update({f'p{round(q * 100):02d}': sketch.quantile(q) for q in quantiles})
+    return summary
+
+
+DESIGN_OUTPUTS = ('area', 'U_d', 'corrected_length', 'forks', 'dp_tube', 'dp_shell', 'heat_flow', 'cold_flow')
+
+
+def exchanger_model(inputs:dict, exchanger_type:str='pipe and shell', size:str='3/4', bwg:int|None = 16,
+                    arrangement:str|None = 'square', config:str='counter-current', hot_in_tubes:bool=True,
+                    outputs:tuple[str, ...]=DESIGN_OUTPUTS)->dict[str, np.ndarray]:
+    """Design chain of one catalog geometry for sampled inputs.
+
+    Inputs are the design columns of `batch_runner.py`: the operating
+    point (hot_flow, T_hot_in, T_hot_out, T_cold_in, T_cold_out), hot_/cold_
+    density, cp, viscosity (lb/ft*h) and conductivity, fouling_factor and
+    fork_length_arm. Invalid designs give NaN.
+    """
+    row = CATALOG.index(size) if exchanger_type == 'double pipe' else CATALOG.index(size, bwg, arrangement)
+    if row is None:
+        raise ValueError(f'No {exchanger_type} geometry for {size}, BWG {bwg}, {arrangement} arrangement.')
+    n = max(np.size(value) for value in inputs.values())
+    geometry = {key: np.repeat(column[row:row + 1], n) for key, column in CATALOG.columns.items()}
+    operating = {key: np.broadcast_to(inputs[key], (n,)) for key in OPERATING_COLUMNS}
+    fluid = lambda side: tuple(np.broadcast_to(inputs[f'{side}_{name}'], (n,)) for name in ('density', 'cp', 'viscosity', 'conductivity'))
+    results = evaluate_cases(geometry, operating, fluid('hot'), fluid('cold'), config=config,
+                             fouling_factor=inputs.get('fouling_factor', 0), fork_length_arm=inputs.get('fork_length_arm', 20),
+                             hot_in_tubes=hot_in_tubes)
+    return {name: np.where(results['valid'], results[name], np.nan) for name in outputs}
+
+
+def tower_model(inputs:dict, outputs:tuple[str, ...]=('make_up_water', 'blow_down_loss', 'fill_volume', 'Z'),
+                characteristic:str='legacy')->dict[str, np.ndarray]:
+    """Cooling tower model for sampled inputs (names of DEFAULT_INPUTS or the weather columns of `weather_inputs`).
+
+    With `characteristic='merkel'` the fill follows the Merkel demand-curve
+    table, one interpolation per sample.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        results = cooling_tower_model(**weather_inputs(inputs), characteristic=characteristic)
+    return {name: results[name] for name in outputs}